@@ -4,5 +4,23 @@ from .geometry_uploader import GeometryUploader
 from .simulation_setup import SimulationSetup
 from .run_simulation import RunSimulation
 from .post_process import PostProcess
+from .mesh_pipeline import MeshPipeline
+from .parametric_sweep import ParametricSweep
+from .status_poller import StatusPoller, PollCancelled, default_poller
+from .status_watcher import StatusWatcher
+from .name_resolver import NameResolver
+from .pagination import iter_projects, iter_simulations, iter_simulation_runs, iter_geometries, iter_results, find_first
+from .geometry_cache import GeometryCache
+from .geometry_mapping_index import GeometryMappingIndex
+from .geometry_mapping_store import GeometryMappingStore
+from .geometry_primitive_cache import GeometryPrimitiveCache
+from .spec_template import SpecTemplate
+from .spec_fingerprint import spec_fingerprint, SimulationIndex
+from .mesh_cache import MeshCache
+from .budget_scheduler import BudgetScheduler, BudgetJob, BudgetLedger
+from .preflight import Preflight
+from .solution_archive import SolutionArchive, HttpRangeFile, parse_foam_field
+from .result_table import ResultTable, merge_series
+from .progress import ProgressPrinter
 #from .simulation_monitor import SimulationMonitor
 #from .post_processor import PostProcessor
@@ -3,6 +3,37 @@ import urllib3
     
 import simscale_sdk as sim_sdk
 
+from .folder_navigation import FolderNavigation
+from .geometry_uploader import GeometryUploader
+from .simulation_setup import SimulationSetup
+from .run_simulation import RunSimulation
+from .post_process import PostProcess
+
+class _PoolDefaults:
+    def __init__(self, default_timeout = None, **kwargs):
+        
+        #The SDK passes timeout=None and its own headers on every request, 
+        #which would override the pool defaults
+        super().__init__(**kwargs)
+        self.default_timeout = default_timeout
+    
+    def urlopen(self, method, url, redirect = True, **kw):
+        
+        if kw.get("timeout") is None and self.default_timeout is not None:
+            kw["timeout"] = self.default_timeout
+        request_headers = kw.get("headers") or {}
+        overridden = {key.lower() for key in request_headers}
+        headers = {key: value for key, value in self.headers.items() if key.lower() not in overridden}
+        headers.update(request_headers)
+        kw["headers"] = headers
+        return super().urlopen(method, url, redirect = redirect, **kw)
+
+class _PoolManager(_PoolDefaults, urllib3.PoolManager):
+    pass
+
+class _ProxyManager(_PoolDefaults, urllib3.ProxyManager):
+    pass
+
 class APIKeyManager:
     def __init__(self):
 
@@ -27,6 +58,16 @@ class APIKeyManager:
         self.table_import_api =None
         self.reports_api = None
         
+        #Connection Pool Variables, see configure_connection_pool()
+        self.pool_connections = 10
+        self.pool_maxsize = 32
+        self.pool_block = False
+        self.keep_alive = True
+        self.connect_timeout = 10
+        self.read_timeout = 300
+        self.gzip = True
+        self.retry_policy = urllib3.Retry(connect=5, read=5, redirect=0, status=5, backoff_factor=0.2)
+        
         #Project Variables 
         self.project_name = ""
         self.project_id   = ""
@@ -121,10 +162,143 @@ class APIKeyManager:
         configuration.debug = True
         configuration.api_key = {self.api_key_header: self.api_key}
         
+        configuration.connection_pool_maxsize = self.pool_maxsize
+        
         #Setup the API client connection 
         self.api_client = sim_sdk.ApiClient(configuration)
-        retry_policy = urllib3.Retry(connect=5, read=5, redirect=0, status=5, backoff_factor=0.2)
-        self.api_client.rest_client.pool_manager.connection_pool_kw["retries"] = retry_policy
+        self._build_pool_manager()
+        
+        #API objects sharing the pooled client
+        self.project_api = sim_sdk.ProjectsApi(self.api_client)
+        self.storage_api = sim_sdk.StorageApi(self.api_client)
+        self.geometry_import_api = sim_sdk.GeometryImportsApi(self.api_client)
+        self.geometry_api = sim_sdk.GeometriesApi(self.api_client)
+        self.materials_api = sim_sdk.MaterialsApi(self.api_client)
+        self.mesh_operation_api = sim_sdk.MeshOperationsApi(self.api_client)
+        self.simulation_api = sim_sdk.SimulationsApi(self.api_client)
+        self.simulation_run_api = sim_sdk.SimulationRunsApi(self.api_client)
+        self.table_import_api = sim_sdk.TableImportsApi(self.api_client)
+        self.reports_api = sim_sdk.ReportsApi(self.api_client)
+    
+    def configure_connection_pool(self, pool_connections = None, pool_maxsize = None, pool_block = None, 
+                                  keep_alive = None, connect_timeout = None, read_timeout = None, 
+                                  gzip = None, retry_policy = None):
+        '''
+        Set the HTTP connection pool settings, and rebuild the pool of the 
+        client if set_api_connection() was called already. Arguments left 
+        to None keep their current value.
+        
+        Parameters
+        ----------
+        pool_connections : int
+            Number of hosts a pool of connections is kept for (API, 
+            storage, result downloads...). Default is 10.
+        pool_maxsize : int
+            Connections kept open per host. Should be at least the number 
+            of threads making requests at the same time, or connections 
+            are discarded and new TLS handshakes made. Default is 32.
+        pool_block : boolean
+            If True, requests wait for a free connection instead of 
+            opening more than pool_maxsize. Default is False.
+        keep_alive : boolean
+            Ask the server to keep connections open. Default is True.
+        connect_timeout, read_timeout : float
+            Seconds, used for requests that do not set their own timeout. 
+            Defaults are 10 and 300.
+        gzip : boolean
+            Accept gzip compressed responses. Default is True.
+        retry_policy : urllib3.Retry
+            Retries of failed connections and requests.
+
+        Returns
+        -------
+        None.
+
+        '''
+        settings = dict(pool_connections = pool_connections, pool_maxsize = pool_maxsize, pool_block = pool_block, 
+                        keep_alive = keep_alive, connect_timeout = connect_timeout, read_timeout = read_timeout, 
+                        gzip = gzip, retry_policy = retry_policy)
+        for name, value in settings.items():
+            if value is not None:
+                setattr(self, name, value)
+        
+        if self.api_client is not None:
+            self.api_client.configuration.connection_pool_maxsize = self.pool_maxsize
+            self._build_pool_manager()
+    
+    def _build_pool_manager(self):
+        
+        rest_client = self.api_client.rest_client
+        old_pool_manager = rest_client.pool_manager
+        
+        #Keep the SSL and proxy settings the SDK configured
+        kwargs = dict(old_pool_manager.connection_pool_kw)
+        kwargs.pop("maxsize", None)
+        kwargs.pop("block", None)
+        kwargs["retries"] = self.retry_policy
+        kwargs["timeout"] = urllib3.Timeout(connect = self.connect_timeout, read = self.read_timeout)
+        headers = urllib3.make_headers(keep_alive = self.keep_alive, accept_encoding = self.gzip)
+        if not self.keep_alive:
+            headers["connection"] = "close"
+        
+        if isinstance(old_pool_manager, urllib3.ProxyManager):
+            pool_manager = _ProxyManager(
+                proxy_url = old_pool_manager.proxy.url, proxy_headers = old_pool_manager.proxy_headers,
+                default_timeout = kwargs["timeout"], num_pools = self.pool_connections,
+                maxsize = self.pool_maxsize, block = self.pool_block, headers = headers, **kwargs)
+        else:
+            pool_manager = _PoolManager(
+                default_timeout = kwargs["timeout"], num_pools = self.pool_connections,
+                maxsize = self.pool_maxsize, block = self.pool_block, headers = headers, **kwargs)
+        
+        rest_client.pool_manager = pool_manager
+        old_pool_manager.clear()
+    
+    def connection_stats(self):
+        '''
+        Return how well connections are reused: the connections opened 
+        and the requests sent per host pool. A reuse ratio close to 1 means 
+        almost every request went over an open connection, a low ratio 
+        that pool_maxsize is too small for the number of threads.
+        '''
+        pool_manager = self.api_client.rest_client.pool_manager
+        hosts = {}
+        for key in list(pool_manager.pools.keys()):
+            pool = pool_manager.pools.get(key)
+            if pool is None:
+                continue
+            hosts[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = {
+                "connections": pool.num_connections, "requests": pool.num_requests}
+        
+        connections = sum(host["connections"] for host in hosts.values())
+        requests = sum(host["requests"] for host in hosts.values())
+        stats = {"hosts": hosts, "connections": connections, "requests": requests,
+                 "reuse_ratio": 1 - connections / requests if requests else 0.0}
+        print(f"HTTP connections: {connections} opened for {requests} requests, "
+              f"reuse ratio {stats['reuse_ratio']:.2f}")
+        return stats
+    
+    def folder_navigation(self):
+        
+        return FolderNavigation(self.api_client)
+    
+    def geometry_uploader(self, project_id = None):
+        
+        return GeometryUploader(self.api_client, project_id or self.project_id)
+    
+    def simulation_setup(self, geometry_id = None, project_id = None):
+        
+        return SimulationSetup(self.api_client, self.geometry_api, geometry_id or self.geometry_id, 
+                               project_id or self.project_id)
+    
+    def run_simulation(self, project_id = None):
+        
+        return RunSimulation(self.simulation_run_api, project_id or self.project_id, 
+                             self.simulation_api, self.api_client)
+    
+    def post_process(self):
+        
+        return PostProcess(self.api_client, self.project_api, self.api_key, self.api_key_header)
 
         
        
@@ -0,0 +1,345 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .local_index import LocalIndex
+from .preflight import Preflight
+
+KINDS = ("mesh", "simulation")
+
+def consumed_core_hours(operation):
+    '''
+    Return the core hours a finished mesh operation or simulation run
+    reports as consumed, or None if it does not report any.
+    '''
+    resource = getattr(operation, "compute_resource", None)
+    value = getattr(resource, "value", resource)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+class BudgetLedger:
+    def __init__(self, directory = None):
+        '''
+        Persistent record of estimated against actual core hours of every
+        mesh operation and simulation run done by a BudgetScheduler.
+
+        The ratio of actual to estimated consumption of past jobs corrects
+        the estimates of new jobs, and spent() gives the consumption since
+        e.g. the start of the month to derive the remaining quota.
+
+        Parameters
+        ----------
+        directory : pathlib.Path, optional
+            Where the ledger is kept, see LocalIndex.
+
+        '''
+        self.entries = LocalIndex("budget_ledger", directory)
+
+    def record(self, kind, name, estimated, actual, operation_id = None):
+
+        key = f"{kind}:{operation_id or uuid.uuid4().hex}"
+        self.entries.set(key, {"kind": kind, "name": name, "estimated": estimated,
+                               "actual": actual, "time": time.time()})
+
+    def history(self, kind = None, since = None):
+
+        entries = [entry for _, entry in self.entries.items()
+                   if (kind is None or entry["kind"] == kind) and (since is None or entry["time"] >= since)]
+        return sorted(entries, key = lambda entry: entry["time"])
+
+    def correction(self, kind, window = 50, min_samples = 3):
+        '''
+        Return the factor by which the estimates of a kind of job have to
+        be multiplied, from the last window jobs with both an estimated
+        and an actual consumption. 1.0 until min_samples jobs are known.
+        '''
+        samples = [entry for entry in self.history(kind)
+                   if entry["estimated"] and entry["actual"] is not None][-window:]
+        if len(samples) < min_samples:
+            return 1.0
+        return sum(entry["actual"] for entry in samples) / sum(entry["estimated"] for entry in samples)
+
+    def spent(self, since = None):
+        '''
+        Return the core hours consumed since the given time stamp, counting
+        the estimate of jobs that did not report their consumption.
+        '''
+        total = 0.0
+        for entry in self.history(since = since):
+            value = entry["actual"] if entry["actual"] is not None else entry["estimated"]
+            total += value or 0.0
+        return total
+
+class BudgetJob:
+    def __init__(self, setup, run_name = "Run 1", priority = 0, name = None):
+        '''
+        A simulation to mesh and solve under a BudgetScheduler.
+
+        Parameters
+        ----------
+        setup : SimulationSetup
+            A setup on which create_simulation() and complete_mesh_settings()
+            have been called.
+
+        run_name : str, optional
+            The name of the simulation run to create.
+
+        priority : int, optional
+            Jobs with a higher priority are admitted first, jobs of equal
+            priority cheapest first.
+
+        name : str, optional
+            Name used in the report and the ledger, the simulation name by
+            default.
+
+        '''
+        self.setup = setup
+        self.run_name = run_name
+        self.priority = priority
+        self.name = name or getattr(setup.simulation_spec, "name", None) or setup.simulation_id
+
+        self.run = None
+        self.preflight = None
+        #Core hours as estimated by the API, corrected by the ledger, and consumed
+        self.estimated = dict.fromkeys(KINDS)
+        self.planned = dict.fromkeys(KINDS, 0.0)
+        self.actual = dict.fromkeys(KINDS)
+        self.status = "pending"
+        self.error = None
+
+    @property
+    def planned_cost(self):
+
+        return sum(self.planned.values())
+
+    def to_dict(self):
+
+        return {"name": self.name, "priority": self.priority, "status": self.status,
+                "estimated": dict(self.estimated), "planned": dict(self.planned),
+                "actual": dict(self.actual), "error": self.error}
+
+class BudgetScheduler:
+    def __init__(self, core_hour_budget, max_meshing = 4, max_running = 4, estimate_workers = 8,
+                 ledger = None, unknown_cost = None, preflight = None):
+        '''
+        Mesh and solve a batch of simulations without exceeding a core hour
+        budget.
+
+        The mesh and simulation estimates of the whole batch are collected
+        in parallel by a Preflight, which also checks the setups, the jobs are ranked by priority and cost, and a job is
+        only admitted once its planned cost fits in what is left of the
+        budget. The planned cost of every job is reserved while it runs and
+        replaced by the reported consumption once it finishes, so the
+        budget freed by jobs cheaper than estimated is used for the jobs
+        still waiting.
+
+        Parameters
+        ----------
+        core_hour_budget : float
+            The core hours the batch may use, e.g. the monthly quota minus
+            ledger.spent(since = start of the month).
+
+        max_meshing, max_running : int, optional
+            Maximum number of concurrent mesh operations and simulation
+            runs.
+
+        estimate_workers : int, optional
+            Number of concurrent estimate requests of the default
+            preflight.
+
+        ledger : BudgetLedger, optional
+            Where estimated and actual consumption are recorded, and from
+            which the estimates are corrected.
+
+        unknown_cost : float, optional
+            Core hours planned for a job stage without an estimate. The
+            default is the mean estimate of that stage in the batch.
+
+        preflight : Preflight, optional
+            Estimates and checks the jobs, and caches the results.
+
+        '''
+        self.core_hour_budget = core_hour_budget
+        self.max_meshing = max_meshing
+        self.max_running = max_running
+        self.estimate_workers = estimate_workers
+        self.ledger = ledger if ledger is not None else BudgetLedger()
+        self.unknown_cost = unknown_cost
+        self.preflight = preflight if preflight is not None else Preflight(max_workers = estimate_workers)
+
+        self.spent = 0.0
+        self.reserved = 0.0
+        self.jobs = []
+
+        self._condition = threading.Condition()
+        self._semaphores = {"mesh": threading.BoundedSemaphore(max_meshing),
+                            "simulation": threading.BoundedSemaphore(max_running)}
+
+    @property
+    def remaining(self):
+
+        return self.core_hour_budget - self.spent - self.reserved
+
+    def estimate(self, jobs):
+        '''
+        Preflight all the jobs in parallel and set their planned cost, a
+        job whose estimate or setup check failed is not run.
+        '''
+        for job, result in zip(jobs, self.preflight.run([job.setup for job in jobs])):
+            job.preflight = result
+            job.run = result.run
+            job.estimated.update(result.estimated_core_hours())
+            if result.ok:
+                job.status = "estimated"
+                continue
+            job.status = "failed"
+            job.error = next(iter(result.failures.values()), None) or Exception("; ".join(result.errors))
+            print(f"Preflight of {job.name} failed: {job.error}")
+
+        estimated = [job for job in jobs if job.status == "estimated"]
+        for kind in KINDS:
+            correction = self.ledger.correction(kind)
+            known = [job.estimated[kind] for job in estimated if job.estimated[kind] is not None]
+            unknown_cost = self.unknown_cost
+            if unknown_cost is None:
+                unknown_cost = sum(known) / len(known) if known else 0.0
+            for job in estimated:
+                if kind == "mesh" and job.setup.reused_mesh:
+                    job.planned[kind] = 0.0
+                elif job.estimated[kind] is None:
+                    job.planned[kind] = unknown_cost
+                else:
+                    job.planned[kind] = job.estimated[kind] * correction
+        return estimated
+
+    def rank(self, jobs):
+
+        return sorted(jobs, key = lambda job: (-job.priority, job.planned_cost))
+
+    def _settle(self, job, kind, operation, operation_id):
+
+        #Replace the reservation of a stage by what it actually consumed
+        job.actual[kind] = consumed_core_hours(operation)
+        charged = job.actual[kind] if job.actual[kind] is not None else job.planned[kind]
+        with self._condition:
+            self.reserved -= job.planned[kind]
+            self.spent += charged
+            self._condition.notify_all()
+        self.ledger.record(kind, job.name, job.estimated[kind], job.actual[kind], operation_id)
+
+    def _release(self, job, kinds):
+
+        with self._condition:
+            self.reserved -= sum(job.planned[kind] for kind in kinds)
+            self._condition.notify_all()
+
+    def _run_job(self, job):
+
+        setup = job.setup
+        stages = list(KINDS)
+        try:
+            with self._semaphores["mesh"]:
+                job.status = "meshing"
+                reused_mesh = setup.reused_mesh
+                setup.start_meshing_operation(run_state = False)
+            if reused_mesh:
+                self._release(job, ["mesh"])
+            else:
+                self._settle(job, "mesh", setup.mesh_operation, setup.mesh_operation_id)
+            stages.remove("mesh")
+
+            with self._semaphores["simulation"]:
+                job.status = "running"
+                job.run.create_simulation_run(job.run_name)
+                job.run.start_simulation_run(wait_for_results = True)
+            self._settle(job, "simulation", job.run.simulation_run, job.run.run_id)
+            stages.remove("simulation")
+
+            if job.run.simulation_run.status != "FINISHED":
+                raise Exception(f"Simulation run {job.run.run_id} ended with status {job.run.simulation_run.status}")
+            job.status = "finished"
+        except Exception as e:
+            job.status = "failed"
+            job.error = e
+            print(f"Job {job.name} failed: {e}")
+            #Charge the stage that failed at its plan, nothing is known about what it used
+            if stages:
+                with self._condition:
+                    self.reserved -= job.planned[stages[0]]
+                    self.spent += job.planned[stages[0]]
+                    self._condition.notify_all()
+                self._release(job, stages[1:])
+
+    def run(self, jobs):
+        '''
+        Estimate, rank, and mesh and solve the jobs within the budget.
+
+        Parameters
+        ----------
+        jobs : list
+            BudgetJob objects.
+
+        Returns
+        -------
+        jobs : list
+            The jobs, with the status "finished", "failed" or "over_budget"
+            for the jobs that did not fit in the budget.
+
+        '''
+        self.jobs = list(jobs)
+        pending = self.rank(self.estimate(self.jobs))
+        max_in_flight = self.max_meshing + self.max_running
+        in_flight = [0]
+
+        def _done(_):
+            with self._condition:
+                in_flight[0] -= 1
+                self._condition.notify_all()
+
+        with ThreadPoolExecutor(max_workers = max_in_flight, thread_name_prefix = "budget") as executor:
+            with self._condition:
+                while pending:
+                    if in_flight[0] >= max_in_flight:
+                        self._condition.wait()
+                        continue
+
+                    #Highest ranked job that fits, smaller jobs fill the gaps left by bigger ones
+                    job = next((job for job in pending if job.planned_cost <= self.remaining), None)
+                    if job is None:
+                        if in_flight[0] == 0:
+                            for job in pending:
+                                job.status = "over_budget"
+                                print(f"Job {job.name} skipped, {job.planned_cost:.1f} core hours planned "
+                                      f"and {self.remaining:.1f} left")
+                            break
+                        self._condition.wait()
+                        continue
+
+                    pending.remove(job)
+                    self.reserved += job.planned_cost
+                    job.status = "admitted"
+                    in_flight[0] += 1
+                    executor.submit(self._run_job, job).add_done_callback(_done)
+
+        return self.jobs
+
+    def report(self):
+        '''
+        Print and return the estimated, planned and actual core hours per
+        job and the budget used.
+        '''
+        jobs = [job.to_dict() for job in self.jobs]
+
+        print("*"*10)
+        for job in jobs:
+            actual = [value for value in job["actual"].values() if value is not None]
+            print("{name:<30} {status:<12} planned {planned:>8.1f}  actual {actual:>8}".format(
+                name = str(job["name"]), status = job["status"], planned = sum(job["planned"].values()),
+                actual = "{:.1f}".format(sum(actual)) if actual else "-"))
+        print(f"Spent {self.spent:.1f} of {self.core_hour_budget:.1f} core hours")
+        print("*"*10)
+
+        return {"jobs": jobs, "spent": self.spent, "budget": self.core_hour_budget}
@@ -1,6 +1,33 @@
+import pathlib
 import shutil    
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import simscale_sdk as sim_sdk
 
+from .name_resolver import NameResolver
+from .geometry_uploader import GeometryUploader
+from .geometry_cache import GeometryCache
+
+#Formats that are already compressed are stored in the zip as they are
+STORE_EXTENSIONS = (".zip", ".gz", ".7z", ".rar", ".3dm", ".glb")
+
+def _zip_cad(path, compresslevel, store_extensions):
+    
+    #Zip a CAD file or folder next to itself, module level so it can run in a process pool
+    start = time.time()
+    path = pathlib.Path(path)
+    output = str(path) + ".zip"
+    #A folder is zipped with its content at the root of the archive, like shutil.make_archive
+    files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+    with zipfile.ZipFile(output, "w") as archive:
+        for file in files:
+            store = str(file).lower().endswith(tuple(store_extensions)) or compresslevel == 0
+            archive.write(file, arcname = file.relative_to(path).as_posix() if path.is_dir() else path.name,
+                          compress_type = zipfile.ZIP_STORED if store else zipfile.ZIP_DEFLATED,
+                          compresslevel = None if store else compresslevel)
+    return output, time.time() - start
+
 class FolderNavigation:
 
     def __init__(self, api_client):
@@ -8,6 +35,7 @@ class FolderNavigation:
         self.api_client = api_client
         #Define the required API clients for the simulation 
         self.project_api = sim_sdk.ProjectsApi(self.api_client)
+        self.resolver = NameResolver.for_client(self.api_client)
         #Project Variables 
         self.project_name = ""
         self.project_id   = ""
@@ -36,28 +64,21 @@ class FolderNavigation:
 
         '''
         
-        try:
-            #Check if the project already exists
-            projects = self.project_api.get_projects(limit=1000).to_dict()['embedded']
-            found = None
-            for project in projects:
-                if project['name'] == name:
-                    found = project
-                    print('Project found: \n' + str(found['name']))
-                    break
-            if found is None:
-                raise Exception('could not find project with name: ' + name)
-            
-            self.project_id = found['project_id']
+        #Check if the project already exists
+        project_id = self.resolver.project_id(name)
+        if project_id is not None:
+            print('Project found: \n' + str(name))
+            self.project_id = project_id
             self.project_name = name
             print("Cannot create project with the same name, using existing project")
-        except:
+        else:
             #If not then create a new project
             project = sim_sdk.Project(name=name, description=description,
                                       measurement_system = measurement_system)
             project = self.project_api.create_project(project)
             self.project_id = project.project_id
-            self.project_name = name        
+            self.project_name = name
+            self.resolver.add(("projects",), name, self.project_id)
             
     def zip_cad_for_upload(self, file_name, base_path): 
      
@@ -95,4 +116,137 @@ class FolderNavigation:
              #Retruns a zip file(s) path of the associated CAD, 
              geometry_path.append(shutil.make_archive(output_filename, 'zip', path)) 
      
-         return geometry_path
\ No newline at end of file
+         return geometry_path
+
+    def zip_cad_parallel(self, file_name, base_path, max_workers = None, compresslevel = 6,
+                         store_extensions = STORE_EXTENSIONS, use_processes = True):
+        
+        '''
+        Zip each CAD file separately in a pool of workers.
+        
+        Parameters
+        ----------
+        file_name : list
+            A list with the exact names of the CAD files to zip
+            
+        base_path : Pathlib Path
+            path to the directory that contains the CAD files 
+            
+        max_workers : int, optional
+            Number of files compressed at the same time, defaults to the 
+            number of CPUs.
+            
+        compresslevel : int, optional
+            zlib compression level from 0 (store only) to 9.
+            
+        store_extensions : tuple, optional
+            File extensions that are already compressed and are stored 
+            without compression.
+            
+        use_processes : bool, optional
+            Compress in a process pool. Set to False to use threads, e.g. 
+            inside Rhino where worker processes cannot be spawned (zlib 
+            releases the GIL, so threads still compress in parallel).
+
+        Returns
+        -------
+        geometry_path : list
+            The paths of the zipped files, in the order of file_name.
+        zip_times : dict
+            Seconds spent zipping each file, keyed by zip path.
+
+        '''
+        paths = [base_path / cad for cad in file_name]
+        pool = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with pool(max_workers = max_workers) as executor:
+            results = list(executor.map(_zip_cad, paths, [compresslevel] * len(paths),
+                                        [store_extensions] * len(paths)))
+        
+        return [r[0] for r in results], {r[0]: r[1] for r in results}
+    
+    def zip_and_upload_cad(self, file_name, base_path, api_client = None, units = "m", _format = "STEP",
+                           max_zip_workers = None, max_upload_workers = 4, compresslevel = 6,
+                           store_extensions = STORE_EXTENSIONS, use_processes = True):
+        
+        '''
+        Zip the CAD files in a pool of workers and upload each zip to the 
+        current project as soon as it is ready, so compression of the 
+        remaining files overlaps with the uploads and imports.
+        
+        Parameters
+        ----------
+        file_name : list
+            A list with the exact names of the CAD files to upload, the 
+            geometry names are the file names without extension.
+            
+        base_path : Pathlib Path
+            path to the directory that contains the CAD files 
+            
+        api_client : object, optional
+            The API client used for the uploads, defaults to the client of 
+            this FolderNavigation.
+            
+        units, _format : str, optional
+            Passed to GeometryUploader.upload_geometry.
+            
+        max_zip_workers, compresslevel, store_extensions, use_processes :
+            See zip_cad_parallel.
+            
+        max_upload_workers : int, optional
+            Number of files uploaded and imported at the same time.
+
+        Returns
+        -------
+        uploads : dict
+            For every CAD file name, a dict with the zip_path, geometry_id, 
+            zip_time and upload_time (seconds), or the error of the file 
+            that failed to zip or upload. A failed file does not stop the 
+            others, the failures are printed after the batch.
+
+        '''
+        api_client = api_client if api_client is not None else self.api_client
+        uploads = {cad: {} for cad in file_name}
+        geometry_cache = GeometryCache()
+        
+        def _upload(cad, zip_path):
+            start = time.time()
+            uploader = GeometryUploader(api_client, self.project_id, geometry_cache)
+            uploader.upload_geometry(pathlib.Path(cad).stem, path = zip_path, units = units, _format = _format,
+                                     reuse = True)
+            return uploader.geometry_id, time.time() - start
+        
+        pool = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with pool(max_workers = max_zip_workers) as zip_executor, \
+             ThreadPoolExecutor(max_workers = max_upload_workers) as upload_executor:
+            
+            zip_futures = {zip_executor.submit(_zip_cad, base_path / cad, compresslevel, store_extensions): cad
+                           for cad in file_name}
+            upload_futures = {}
+            for future in as_completed(zip_futures):
+                cad = zip_futures[future]
+                try:
+                    zip_path, zip_time = future.result()
+                except Exception as e:
+                    uploads[cad]["error"] = e
+                    continue
+                uploads[cad].update(zip_path = zip_path, zip_time = zip_time)
+                print(f"Zipped {cad} in {zip_time:.1f} s")
+                upload_futures[upload_executor.submit(_upload, cad, zip_path)] = cad
+            
+            for future in as_completed(upload_futures):
+                cad = upload_futures[future]
+                try:
+                    geometry_id, upload_time = future.result()
+                except Exception as e:
+                    uploads[cad]["error"] = e
+                    continue
+                uploads[cad].update(geometry_id = geometry_id, upload_time = upload_time)
+                print(f"Uploaded {cad} in {upload_time:.1f} s")
+        
+        failed = [cad for cad in file_name if "error" in uploads[cad]]
+        if failed:
+            print(f"{len(failed)} of {len(file_name)} CAD files failed:")
+            for cad in failed:
+                print(f"    {cad}: {uploads[cad]['error']}")
+        
+        return uploads
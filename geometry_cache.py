@@ -0,0 +1,59 @@
+import hashlib
+import json
+import os
+
+from .local_index import LocalIndex
+
+class GeometryCache:
+    def __init__(self, directory = None):
+        '''
+        Content addressed cache of imported geometries.
+
+        Maps a hash of the CAD file content plus the import settings (units,
+        format, import options) to the geometry_id it was imported as, per
+        project, so an identical file is never uploaded and imported twice.
+
+        Parameters
+        ----------
+        directory : pathlib.Path, optional
+            Where the cache index is kept, see LocalIndex.
+
+        '''
+        self.geometries = LocalIndex("geometry_cache", directory)
+        #(path, size, mtime) -> file digest, to avoid re-hashing unchanged files
+        self.digests = LocalIndex("geometry_file_digests", directory)
+
+    def file_digest(self, path, chunk_size = 1024 * 1024):
+
+        stat = os.stat(path)
+        stamp = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        digest = self.digests.get(stamp)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(path, "rb") as file:
+                for chunk in iter(lambda: file.read(chunk_size), b""):
+                    sha.update(chunk)
+            digest = sha.hexdigest()
+            self.digests.set(stamp, digest)
+        return digest
+
+    def key(self, project_id, path, units, _format, options):
+        '''
+        Return the cache key of a file imported with the given settings.
+        '''
+        settings = json.dumps({"units": units, "format": _format, "options": options}, sort_keys = True)
+        return "{}:{}:{}".format(project_id, self.file_digest(path),
+                                 hashlib.sha256(settings.encode("utf-8")).hexdigest()[:16])
+
+    def get(self, key):
+
+        entry = self.geometries.get(key)
+        return entry["geometry_id"] if entry else None
+
+    def put(self, key, geometry_id, name):
+
+        self.geometries.set(key, {"geometry_id": geometry_id, "name": name})
+
+    def discard(self, key):
+
+        self.geometries.pop(key)
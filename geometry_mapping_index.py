@@ -0,0 +1,213 @@
+import json
+
+from .pagination import iter_items
+
+class _JsonResponse:
+
+    #ApiClient.deserialize reads the JSON body of a response from .data
+    def __init__(self, data):
+
+        self.data = json.dumps(data)
+
+class GeometryMappingEntry:
+    __slots__ = ("name", "entity_class", "bodies", "entities", "attributes", "data", "mapping")
+
+    def __init__(self, name, entity_class = None, bodies = (), entities = (), attributes = (), data = None):
+
+        self.name = name
+        self.entity_class = entity_class
+        self.bodies = list(bodies)
+        self.entities = list(entities)
+        #List of (attribute name, value as str)
+        self.attributes = [tuple(a) for a in attributes]
+        #The mapping as the API returns it, from which the SDK GeometryMapping is rebuilt
+        self.data = data
+        self.mapping = None
+
+    @classmethod
+    def from_mapping(cls, mapping, api_client = None):
+
+        #Normalise an SDK GeometryMapping once, when the index is built
+        d = mapping.to_dict() if hasattr(mapping, "to_dict") else dict(mapping)
+        originate_from = d.get("originate_from") or []
+        bodies = d.get("bodies") or [o.get("body") for o in originate_from if o.get("body") is not None]
+        entities = [o.get("entity") for o in originate_from if o.get("entity") is not None]
+
+        attributes = []
+        for attribute in d.get("attributes") or []:
+            attribute_name = attribute.get("attribute", attribute.get("name"))
+            values = attribute.get("values", attribute.get("value"))
+            if not isinstance(values, (list, tuple)):
+                values = [values]
+            attributes.extend((attribute_name, str(value)) for value in values)
+
+        data = api_client.sanitize_for_serialization(mapping) if api_client is not None else None
+        entry = cls(d.get("name"), d.get("_class", d.get("entity_class")), bodies, entities, attributes, data)
+        entry.mapping = mapping
+        return entry
+
+    def to_mapping(self, api_client):
+        '''
+        Return the SDK GeometryMapping of the entry, rebuilt from the stored
+        data if the entry was loaded from a file.
+        '''
+        if self.mapping is None:
+            if self.data is None:
+                raise Exception(f"No mapping data stored for {self.name}")
+            self.mapping = api_client.deserialize(_JsonResponse(self.data), "GeometryMapping")
+        return self.mapping
+
+    def to_dict(self):
+
+        return {"name": self.name, "entity_class": self.entity_class, "bodies": self.bodies,
+                "entities": self.entities, "attributes": [list(a) for a in self.attributes],
+                "data": self.data}
+
+    def __repr__(self):
+
+        return f"GeometryMappingEntry({self.name!r}, {self.entity_class!r})"
+
+class GeometryMappingIndex:
+    def __init__(self, geometry_id, entries, api_client = None):
+        '''
+        In-memory index of all the geometry mappings of a geometry.
+
+        Answers the same filters as geometry_api.get_geometry_mappings
+        (_class, bodies, entities, attributes and values) without a round
+        trip per lookup.
+
+        Parameters
+        ----------
+        geometry_id : str
+            The geometry the mappings belong to.
+
+        entries : list
+            GeometryMappingEntry objects, in the order of the API listing.
+
+        api_client : ApiClient, optional
+            Used by mappings() to rebuild the SDK objects of entries loaded
+            from a file.
+
+        '''
+        self.geometry_id = geometry_id
+        self.entries = list(entries)
+        self.api_client = api_client
+
+        self.by_name = {}
+        self.by_class = {}
+        self.by_body = {}
+        self.by_entity = {}
+        self.by_attribute = {}
+
+        for position, entry in enumerate(self.entries):
+            self.by_name.setdefault(entry.name, []).append(position)
+            self.by_class.setdefault(entry.entity_class, []).append(position)
+            for body in entry.bodies:
+                self.by_body.setdefault(body, []).append(position)
+            for entity in entry.entities + [entry.name]:
+                self.by_entity.setdefault(entity, []).append(position)
+            for attribute in entry.attributes:
+                self.by_attribute.setdefault(attribute, []).append(position)
+
+    @classmethod
+    def fetch(cls, geometry_api, project_id, geometry_id, page_size = 500):
+        '''
+        Build the index from all the pages of get_geometry_mappings.
+        '''
+        mappings = iter_items(geometry_api.get_geometry_mappings, project_id, geometry_id,
+                              page_size = page_size, prefetch = True)
+        api_client = geometry_api.api_client
+        return cls(geometry_id, [GeometryMappingEntry.from_mapping(m, api_client) for m in mappings], api_client)
+
+    @staticmethod
+    def _positions(index, keys):
+
+        positions = set()
+        for key in keys:
+            positions.update(index.get(key, ()))
+        return positions
+
+    def query(self, _class = None, bodies = None, entities = None, attributes = None, values = None, **kwargs):
+        '''
+        Return the entries matching all the given filters, in listing order.
+
+        Parameters
+        ----------
+        _class : str, optional
+            Entity class, e.g. "face" or "body".
+
+        bodies : list, optional
+            Entities belonging to any of these bodies.
+
+        entities : list, optional
+            Entities with any of these names.
+
+        attributes, values : list, optional
+            Entities having any of the attributes with any of the values.
+
+        Returns
+        -------
+        entries : list
+            GeometryMappingEntry objects, see mappings() for the SDK
+            GeometryMapping objects.
+
+        '''
+        unknown = set(kwargs) - {"limit", "page"}
+        if unknown:
+            raise TypeError(f"Unsupported geometry mapping filters: {sorted(unknown)}")
+
+        selected = None
+
+        def narrow(positions):
+            return positions if selected is None else selected & positions
+
+        if _class is not None:
+            selected = narrow(set(self.by_class.get(_class, ())))
+        if bodies is not None:
+            selected = narrow(self._positions(self.by_body, bodies))
+        if entities is not None:
+            selected = narrow(self._positions(self.by_entity, entities))
+        if attributes is not None or values is not None:
+            if values is None:
+                keys = [key for key in self.by_attribute if key[0] in attributes]
+            elif attributes is None:
+                values = [str(v) for v in values]
+                keys = [key for key in self.by_attribute if key[1] in values]
+            else:
+                keys = [(a, str(v)) for a in attributes for v in values]
+            selected = narrow(self._positions(self.by_attribute, keys))
+
+        if selected is None:
+            return list(self.entries)
+        return [self.entries[position] for position in sorted(selected)]
+
+    def mappings(self, **filters):
+        '''
+        Return the SDK GeometryMapping objects matching the filters of
+        query(), as geometry_api.get_geometry_mappings would.
+        '''
+        return [entry.to_mapping(self.api_client) for entry in self.query(**filters)]
+
+    def names(self, **filters):
+
+        return [entry.name for entry in self.query(**filters)]
+
+    def to_dict(self):
+
+        return {"geometry_id": self.geometry_id, "entries": [entry.to_dict() for entry in self.entries]}
+
+    @classmethod
+    def from_dict(cls, data, api_client = None):
+
+        return cls(data["geometry_id"], [GeometryMappingEntry(**entry) for entry in data["entries"]], api_client)
+
+    def save(self, path):
+
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file)
+
+    @classmethod
+    def load(cls, path, api_client = None):
+
+        with open(path, "r") as file:
+            return cls.from_dict(json.load(file), api_client)
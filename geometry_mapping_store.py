@@ -0,0 +1,126 @@
+import contextlib
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+from .local_index import cache_dir
+from .geometry_mapping_index import GeometryMappingIndex
+
+class GeometryMappingStore:
+    def __init__(self, directory = None, max_bytes = 200 * 1024 * 1024, max_age = 90 * 24 * 3600):
+        '''
+        Persistent SQLite cache of the full geometry mapping table of each
+        imported geometry.
+
+        The mappings of an imported geometry_id never change, so once
+        stored they are served without any API call. Every entry is stored
+        compressed with a checksum that is verified on read; entries older
+        than max_age are dropped, and the least recently used entries are
+        dropped while the store is larger than max_bytes.
+
+        Parameters
+        ----------
+        directory : pathlib.Path, optional
+            Where the database is kept, see local_index.cache_dir.
+
+        max_bytes : int, optional
+            Maximum total size of the stored mappings.
+
+        max_age : float, optional
+            Maximum age of an entry in seconds.
+
+        '''
+        self.path = cache_dir(directory) / "geometry_mappings.sqlite"
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        #One connection shared by all threads, every use holds the lock
+        self._lock = threading.Lock()
+        self._connection = None
+
+    @contextlib.contextmanager
+    def _connect(self):
+
+        #Open the database on first use, then commit on success and roll back on error
+        if self._connection is None:
+            self.path.parent.mkdir(parents = True, exist_ok = True)
+            self._connection = sqlite3.connect(str(self.path), timeout = 30, check_same_thread = False)
+            with self._connection:
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS mappings ("
+                    "geometry_id TEXT PRIMARY KEY, project_id TEXT, payload BLOB, checksum TEXT, "
+                    "size INTEGER, created REAL, last_used REAL)")
+        with self._connection:
+            yield self._connection
+
+    def close(self):
+
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def get(self, geometry_id):
+        '''
+        Return the stored GeometryMappingIndex of geometry_id, or None.
+        '''
+        with self._lock, self._connect() as connection:
+            row = connection.execute("SELECT payload, checksum, created FROM mappings WHERE geometry_id = ?",
+                                     (geometry_id,)).fetchone()
+            if row is None:
+                return None
+            payload, checksum, created = row
+
+            if hashlib.sha256(payload).hexdigest() != checksum or time.time() - created > self.max_age:
+                connection.execute("DELETE FROM mappings WHERE geometry_id = ?", (geometry_id,))
+                return None
+
+            connection.execute("UPDATE mappings SET last_used = ? WHERE geometry_id = ?", (time.time(), geometry_id))
+
+        try:
+            index = GeometryMappingIndex.from_dict(json.loads(zlib.decompress(payload).decode("utf-8")))
+        except (zlib.error, ValueError, KeyError, TypeError):
+            index = None
+        #Entries stored without their mapping data cannot give back the SDK objects, fetch them again
+        if index is None or any(entry.data is None for entry in index.entries):
+            self.discard(geometry_id)
+            return None
+        return index
+
+    def put(self, index, project_id = None):
+        '''
+        Store the mappings of a GeometryMappingIndex and apply the eviction
+        policy.
+        '''
+        payload = zlib.compress(json.dumps(index.to_dict()).encode("utf-8"))
+        now = time.time()
+        with self._lock, self._connect() as connection:
+            connection.execute("INSERT OR REPLACE INTO mappings VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (index.geometry_id, project_id, payload, hashlib.sha256(payload).hexdigest(),
+                                len(payload), now, now))
+            self._evict(connection)
+
+    def _evict(self, connection):
+
+        connection.execute("DELETE FROM mappings WHERE created < ?", (time.time() - self.max_age,))
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM mappings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for geometry_id, size in connection.execute(
+                "SELECT geometry_id, size FROM mappings ORDER BY last_used").fetchall():
+            connection.execute("DELETE FROM mappings WHERE geometry_id = ?", (geometry_id,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def discard(self, geometry_id):
+
+        with self._lock, self._connect() as connection:
+            connection.execute("DELETE FROM mappings WHERE geometry_id = ?", (geometry_id,))
+
+    def clear(self):
+
+        with self._lock, self._connect() as connection:
+            connection.execute("DELETE FROM mappings")
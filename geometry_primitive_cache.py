@@ -0,0 +1,42 @@
+from .local_index import LocalIndex
+
+class GeometryPrimitiveCache:
+    def __init__(self, directory = None, decimals = 6):
+        '''
+        Remember the geometry_primitive_id of every point primitive created,
+        keyed by project, name, rounded coordinates and unit, so repeated
+        sweep variants reuse their probe points instead of creating them
+        again.
+
+        Parameters
+        ----------
+        directory : pathlib.Path, optional
+            Where the cache index is kept, see LocalIndex.
+
+        decimals : int, optional
+            Number of decimals the coordinates are rounded to in the key.
+
+        '''
+        self.primitives = LocalIndex("geometry_primitives", directory)
+        self.decimals = decimals
+
+    def key(self, project_id, name, pos_x, pos_y, pos_z, unit = "m"):
+
+        x, y, z = (round(float(p), self.decimals) for p in (pos_x, pos_y, pos_z))
+        #+ 0.0 turns -0.0 into 0.0 so both give the same key
+        return f"{project_id}|{name}|{x + 0.0!r}|{y + 0.0!r}|{z + 0.0!r}|{unit}"
+
+    def get(self, key):
+
+        return self.primitives.get(key)
+
+    def put(self, key, geometry_primitive_id):
+
+        self.primitives.set(key, geometry_primitive_id)
+
+    def put_many(self, primitive_ids):
+        '''
+        Store a {key: geometry_primitive_id} dict with a single write.
+        '''
+        if primitive_ids:
+            self.primitives.update(primitive_ids)
@@ -1,8 +1,56 @@
-import time   
+import os
+import queue
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 import simscale_sdk as sim_sdk
+from simscale_sdk import ApiException
+
+from .status_poller import StatusPoller, default_poller
+from .status_watcher import StatusWatcher
+from .name_resolver import NameResolver
+from .geometry_cache import GeometryCache
+from .progress import ProgressPrinter
+
+#BCA should facet split be true?
+IMPORT_OPTIONS = dict(facet_split=False, sewing=False, improve=True, optimize_for_lbm_solver=False)
+
+class _ProgressReader:
+    def __init__(self, file, total, chunk_size, callback):
+        
+        #File-like wrapper that hands the file to the HTTP connection in 
+        #chunks and reports the bytes sent
+        self.file = file
+        self.total = total
+        self.chunk_size = chunk_size
+        self.callback = callback
+        self.sent = 0
+        self.start = time.time()
+        
+    def read(self, size = -1):
+        
+        if size is None or size < 0 or size > self.chunk_size:
+            size = self.chunk_size
+        chunk = self.file.read(size)
+        self.sent += len(chunk)
+        if chunk and self.callback is not None:
+            elapsed = max(time.time() - self.start, 1e-6)
+            self.callback(self.sent, self.total, self.sent / elapsed)
+        return chunk
+    
+    def tell(self):
+        
+        return self.file.tell()
+    
+    def seek(self, offset, whence = 0):
+        
+        #urllib3 rewinds the body before retrying a request
+        position = self.file.seek(offset, whence)
+        self.sent = position
+        self.start = time.time()
+        return position
 
 class GeometryUploader:
-    def __init__(self, api_client, project_id):
+    def __init__(self, api_client, project_id, geometry_cache = None):
         
         self.api_client = api_client
         self.project_id = project_id
@@ -13,7 +61,16 @@ class GeometryUploader:
         self.geometry_import_api = sim_sdk.GeometryImportsApi(self.api_client)
         self.geometry_api = sim_sdk.GeometriesApi(self.api_client)
         
-    def upload_geometry(self, name, path=None, units="m", _format="STEP"): #BCA- major changes to this section
+        #Poller used to wait for geometry imports
+        self.poller = default_poller
+        self.resolver = NameResolver.for_client(self.api_client)
+        #Uploaders of a batch can share one cache
+        self.geometry_cache = geometry_cache if geometry_cache is not None else GeometryCache()
+        
+        #Geometry IDs of batch uploads, by geometry name
+        self.geometry_ids = {}
+        
+    def upload_geometry(self, name, path=None, units="m", _format="STEP", progress_callback=None, reuse=False): #BCA- major changes to this section
             
             '''
             Upload a geometry to the SimScale platform to a preassigned project.
@@ -36,6 +93,18 @@ class GeometryUploader:
                 
                 The default is "STL".
                 
+            progress_callback : callable, optional
+                Called as progress_callback(bytes_sent, total_bytes, 
+                bytes_per_second) while the file is uploaded. By default 
+                the progress is printed every few seconds.
+                
+            reuse : bool, optional
+                If True, a file with the same content and import settings 
+                that was already imported into this project is reused 
+                instead of being uploaded and imported again.
+                
+                The default is False.
+                
             facet_split : bool, optional
                 Decide on weather to split facet geometry (such as .stl file 
                 types). We prefer not to do this for API use.
@@ -53,19 +122,24 @@ class GeometryUploader:
         
             '''
             self.geometry_name = name
+            self.geometry_path = path
+            
+            #Reuse an identical geometry imported before
+            cache_key = None
+            if reuse and path is not None:
+                cache_key = self.geometry_cache.key(self.project_id, path, units, _format, IMPORT_OPTIONS)
+                geometry_id = self.geometry_cache.get(cache_key)
+                if geometry_id is not None:
+                    if self._geometry_exists(geometry_id):
+                        self.geometry_id = geometry_id
+                        print(f"Identical geometry already imported, reusing geometry_id: {geometry_id}")
+                        return
+                    self.geometry_cache.discard(cache_key)
             
             #Check if the geometry already exists
-            project_id = self.project_id
-            geometry_api = self.geometry_api
-        
-            geometries = geometry_api.get_geometries(project_id).to_dict()['embedded']
-            found = None
-            for geometry in geometries:
-                if geometry['name'] == name:
-                    found = geometry
-                    print('Geometry found: \n' + str(found['name']))
-                    name=name + '1' #Add a 1 to show it is a new geometry (needs a better way)
-                    break
+            if self.resolver.geometry_id(self.project_id, name) is not None:
+                print('Geometry found: \n' + str(name))
+                name=name + '1' #Add a 1 to show it is a new geometry (needs a better way)
                         
             #if found is None:
             #    raise Exception('could not find geometry with id: ' + name)
@@ -73,37 +147,230 @@ class GeometryUploader:
             #self.geometry_name = found
             #self.geometry_id = found["geometry_id"]
             #print("Cannot upload geometry with the same name, using existing geometry")
-                
-            self.geometry_path = path
 
-            storage = self.storage_api.create_storage()
-            with open(self.geometry_path, 'rb') as file:
-                self.api_client.rest_client.PUT(url=storage.url, headers={'Content-Type': 'application/octet-stream'},
-                                                body=file.read())
-            self.storage_id = storage.storage_id
-
-            geometry_import = sim_sdk.GeometryImportRequest(
-                name=name,
-                location=sim_sdk.GeometryImportRequestLocation(self.storage_id),
-                format=_format,
-                input_unit=units,
-                options=sim_sdk.GeometryImportRequestOptions(facet_split= False, sewing=False, improve=True,
-                                                        optimize_for_lbm_solver=False), #BCA should facet split be true?
-            )
-
-            geometry_import = self.geometry_import_api.import_geometry(self.project_id, geometry_import)
+            self.storage_id = self.upload_file_to_storage(self.geometry_path, progress_callback = progress_callback)
+
+            geometry_import = self._import_geometry(name, self.storage_id, units, _format)
             geometry_import_id = geometry_import.geometry_import_id
 
-            geometry_import_start = time.time()
-            while geometry_import.status not in ('FINISHED', 'CANCELED', 'FAILED'):
-                # adjust timeout for larger geometries
-                if time.time() > geometry_import_start + 900:
-                    raise TimeoutError()
-                time.sleep(10)
-                geometry_import = self.geometry_import_api.get_geometry_import(self.project_id, geometry_import_id)
-                print(f'Geometry import status: {geometry_import.status}')
+            # adjust timeout for larger geometries
+            geometry_import = self.poller.wait(
+                lambda: self.geometry_import_api.get_geometry_import(self.project_id, geometry_import_id),
+                initial = geometry_import, timeout = 900,
+                on_poll = lambda job: print(f'Geometry import status: {job.status}'))
             self.geometry_id = geometry_import.geometry_id
+            if geometry_import.status == 'FINISHED':
+                self.resolver.add(("geometries", self.project_id), name, self.geometry_id)
+                if cache_key is not None:
+                    self.geometry_cache.put(cache_key, self.geometry_id, name)
+    
+    def _import_geometry(self, name, storage_id, units, _format):
+        
+        geometry_import = sim_sdk.GeometryImportRequest(
+            name=name,
+            location=sim_sdk.GeometryImportRequestLocation(storage_id),
+            format=_format,
+            input_unit=units,
+            options=sim_sdk.GeometryImportRequestOptions(**IMPORT_OPTIONS),
+        )
+        return self.geometry_import_api.import_geometry(self.project_id, geometry_import)
+    
+    def _geometry_exists(self, geometry_id):
+        
+        #The cached geometry may have been deleted on the platform since
+        try:
+            self.geometry_api.get_geometry(self.project_id, geometry_id)
+            return True
+        except ApiException as ae:
+            if ae.status == 404:
+                return False
+            raise ae
+
+    
+    def upload_file_to_storage(self, path, progress_callback = None, retries = 3, chunk_size = 1024 * 1024):
+        
+        '''
+        Stream a file from disk into a new SimScale storage slot.
+        
+        The file is sent in chunks of chunk_size bytes, so memory stays 
+        flat regardless of the file size. If the transfer fails only the 
+        PUT of this file is retried, the storage slot is kept.
+        
+        Parameters
+        ----------
+        path : pathlib.Path or str
+            The file to upload.
+            
+        progress_callback : callable, optional
+            Called as progress_callback(bytes_sent, total_bytes, 
+            bytes_per_second). By default the progress is printed.
+            
+        retries : int, optional
+            Number of times a failed transfer is retried.
+            
+        chunk_size : int, optional
+            Number of bytes read from disk at a time.
+
+        Returns
+        -------
+        storage_id : str
+            The ID of the storage slot holding the file.
+
+        '''
+        storage = self.storage_api.create_storage()
+        self.put_file(storage.url, path, progress_callback = progress_callback,
+                      retries = retries, chunk_size = chunk_size)
+        return storage.storage_id
+    
+    def put_file(self, url, path, progress_callback = None, retries = 3, chunk_size = 1024 * 1024):
+        
+        '''
+        Stream a file from disk to an upload URL, see upload_file_to_storage.
+        '''
+        if progress_callback is None:
+            progress_callback = ProgressPrinter(os.path.basename(str(path)))
+        
+        size = os.path.getsize(path)
+        headers = {'Content-Type': 'application/octet-stream', 'Content-Length': str(size)}
+        pool_manager = self.api_client.rest_client.pool_manager
+        
+        for attempt in range(retries + 1):
+            try:
+                with open(path, 'rb') as file:
+                    body = _ProgressReader(file, size, chunk_size, progress_callback)
+                    response = pool_manager.request('PUT', url, body = body, headers = headers)
+                if not 200 <= response.status < 300:
+                    raise Exception(f"Upload of {path} failed with status {response.status}", response.data)
+                return
+            except Exception as e:
+                if attempt == retries:
+                    raise
+                print(f"Upload of {path} failed ({e}), retrying")
+                time.sleep(2 ** attempt)
+
+    
+    def iter_upload_geometries(self, geometries, max_workers = 4, timeout = 900, reuse = False, watcher = None):
+        
+        '''
+        Upload and import several geometries at once, yielding each 
+        geometry as soon as its import has finished.
+        
+        Storage slots for all the files are created up front, the files 
+        are uploaded concurrently over the pooled connection, each import 
+        is submitted as soon as its upload is done and all the imports are 
+        waited on together by one StatusWatcher.
+        
+        Parameters
+        ----------
+        geometries : list
+            A list of dicts with a "name" and "path", and optionally 
+            "units" (default "m") and "_format" (default "STEP").
+            
+        max_workers : int, optional
+            Number of files uploaded at the same time.
+            
+        timeout : float, optional
+            Maximum time in seconds for each import.
+            
+        reuse : bool, optional
+            Reuse identical geometries already imported, see 
+            upload_geometry. The default is False.
+            
+        watcher : StatusWatcher, optional
+            The watcher used for the imports. By default a watcher is 
+            created for this batch and stopped at the end.
+
+        Yields
+        ------
+        name, geometry_id, error : tuple
+            In completion order. geometry_id is None and error is set if 
+            the upload or import of that geometry failed.
+
+        '''
+        entries = [dict({"units": "m", "_format": "STEP"}, **g) for g in geometries]
+        
+        #Cached geometries are done straight away
+        to_upload = []
+        for entry in entries:
+            entry["cache_key"] = None
+            if reuse:
+                entry["cache_key"] = self.geometry_cache.key(self.project_id, entry["path"], entry["units"],
+                                                             entry["_format"], IMPORT_OPTIONS)
+                geometry_id = self.geometry_cache.get(entry["cache_key"])
+                if geometry_id is not None and self._geometry_exists(geometry_id):
+                    print(f"Identical geometry already imported, reusing geometry_id: {geometry_id}")
+                    self.geometry_ids[entry["name"]] = geometry_id
+                    yield entry["name"], geometry_id, None
+                    continue
+            to_upload.append(entry)
+        
+        if not to_upload:
+            return
+        
+        own_watcher = watcher is None
+        if own_watcher:
+            watcher = StatusWatcher(self.api_client, poller = StatusPoller(min_interval = 2.0, max_interval = 30.0))
+        finished = queue.Queue()
+        executor = ThreadPoolExecutor(max_workers = max_workers, thread_name_prefix = "geometry-upload")
+        
+        def _upload_and_import(entry, storage):
+            name = entry["name"]
+            try:
+                storage = storage.result()
+                self.put_file(storage.url, entry["path"])
+                if self.resolver.geometry_id(self.project_id, name) is not None:
+                    name = name + '1' #Add a 1 to show it is a new geometry (needs a better way)
+                geometry_import = self._import_geometry(name, storage.storage_id, entry["units"], entry["_format"])
+                future = watcher.watch_geometry_import(self.project_id, geometry_import.geometry_import_id,
+                                                       timeout = timeout)
+                future.add_done_callback(lambda f: finished.put((entry, name, f)))
+            except Exception as e:
+                error = Future()
+                error.set_exception(e)
+                finished.put((entry, name, error))
+        
+        try:
+            #Pre-allocate the storage slots, a slot that fails only fails its own geometry
+            storages = [executor.submit(self.storage_api.create_storage) for _ in to_upload]
+            for entry, storage in zip(to_upload, storages):
+                executor.submit(_upload_and_import, entry, storage)
+            
+            for _ in to_upload:
+                entry, name, future = finished.get()
+                error = future.exception()
+                geometry_import = None if error is not None else future.result()
+                if error is None and geometry_import.status != "FINISHED":
+                    error = Exception(f"Geometry import of {name} ended with status {geometry_import.status}")
+                if error is not None:
+                    print(f"Geometry {entry['name']} failed: {error}")
+                    yield entry["name"], None, error
+                    continue
+                
+                geometry_id = geometry_import.geometry_id
+                self.geometry_ids[entry["name"]] = geometry_id
+                self.resolver.add(("geometries", self.project_id), name, geometry_id)
+                if entry["cache_key"] is not None:
+                    self.geometry_cache.put(entry["cache_key"], geometry_id, name)
+                yield entry["name"], geometry_id, None
+        finally:
+            executor.shutdown(wait = False)
+            if own_watcher:
+                watcher.stop(wait = False)
+    
+    def upload_geometries(self, geometries, max_workers = 4, timeout = 900, reuse = False, watcher = None):
+        
+        '''
+        Upload and import several geometries at once and wait for all of 
+        them, see iter_upload_geometries.
+
+        Returns
+        -------
+        geometry_ids : dict
+            The geometry_id of every geometry name, None for the failed ones.
 
+        '''
+        return {name: geometry_id for name, geometry_id, error in
+                self.iter_upload_geometries(geometries, max_workers, timeout, reuse, watcher)}
 
         # def get_geometry_BCA(self): #Get list of geometry on simscale.
         #     #Check if the geometry already exists
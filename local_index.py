@@ -0,0 +1,155 @@
+import contextlib
+import json
+import os
+import pathlib
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    #Windows, msvcrt locks the first byte of the lock file instead
+    fcntl = None
+    import msvcrt
+
+DEFAULT_CACHE_DIR = pathlib.Path.home() / ".simscale_bca"
+
+#One thread lock per index file, shared by all the LocalIndex objects of that file
+_path_locks = {}
+_path_locks_lock = threading.Lock()
+
+def cache_dir(directory = None):
+    '''
+    Return the directory of the local caches: directory if given, else the
+    SIMSCALE_BCA_CACHE_DIR environment variable, else ~/.simscale_bca.
+    '''
+    if directory is None:
+        directory = os.getenv("SIMSCALE_BCA_CACHE_DIR") or DEFAULT_CACHE_DIR
+    return pathlib.Path(directory)
+
+def _path_lock(path):
+
+    key = os.path.abspath(str(path))
+    with _path_locks_lock:
+        return _path_locks.setdefault(key, threading.RLock())
+
+@contextlib.contextmanager
+def _file_lock(path):
+
+    #Exclusive lock between processes, held while the index is read, changed and written
+    path.parent.mkdir(parents = True, exist_ok = True)
+    with open(str(path) + ".lock", "a+") as file:
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+class LocalIndex:
+    def __init__(self, name, directory = None):
+        '''
+        A small JSON file backed key -> value store, used to remember
+        SimScale IDs between Python sessions.
+
+        Every change re-reads the file and writes it back under a lock
+        shared by all the LocalIndex objects of the file, in this and other
+        processes, so concurrent writers never drop each other's entries.
+
+        Parameters
+        ----------
+        name : str
+            The file name (without extension) of the index.
+
+        directory : pathlib.Path, optional
+            Where to keep the index. The default is ~/.simscale_bca, or
+            the SIMSCALE_BCA_CACHE_DIR environment variable if set.
+
+        '''
+        self.path = cache_dir(directory) / f"{name}.json"
+        self._data = None
+        self._stamp = None
+        self._lock = _path_lock(self.path)
+
+    def _file_stamp(self):
+
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _load(self):
+
+        #Read again whenever another writer replaced the file
+        stamp = self._file_stamp()
+        if self._data is None or stamp != self._stamp:
+            try:
+                with open(self.path, "r") as file:
+                    self._data = json.load(file)
+            except (OSError, ValueError):
+                #Missing or corrupt index, start again
+                self._data = {}
+            self._stamp = stamp
+        return self._data
+
+    def _save(self):
+
+        self.path.parent.mkdir(parents = True, exist_ok = True)
+        #Write to a temporary file first so a crash never leaves half an index
+        fd, tmp = tempfile.mkstemp(dir = str(self.path.parent), suffix = ".tmp")
+        try:
+            with os.fdopen(fd, "w") as file:
+                json.dump(self._data, file, indent = 1, sort_keys = True)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._stamp = self._file_stamp()
+
+    @contextlib.contextmanager
+    def _modify(self):
+
+        #Changes are applied to what is on disk now, not to what this object read earlier
+        with self._lock, _file_lock(self.path):
+            data = self._load()
+            yield data
+            self._save()
+
+    def get(self, key, default = None):
+
+        with self._lock:
+            return self._load().get(key, default)
+
+    def set(self, key, value):
+
+        with self._modify() as data:
+            data[key] = value
+
+    def update(self, values):
+
+        #Set many keys with a single write of the index
+        with self._modify() as data:
+            data.update(values)
+
+    def pop(self, key, default = None):
+
+        with self._modify() as data:
+            return data.pop(key, default)
+
+    def items(self):
+
+        with self._lock:
+            return list(self._load().items())
+
+    def clear(self):
+
+        with self._modify() as data:
+            data.clear()
@@ -0,0 +1,59 @@
+import hashlib
+import json
+
+from .local_index import LocalIndex
+
+class MeshCache:
+    def __init__(self, directory = None):
+        '''
+        Local index of finished meshes, keyed by a hash of the geometry and
+        all the mesh settings, so simulations that only differ in thermal
+        values can share one mesh instead of meshing again.
+        '''
+        self.meshes = LocalIndex("meshes", directory)
+
+    @staticmethod
+    def key(project_id, geometry_id, mesh_model, api_client = None, physics = None):
+        '''
+        Return the cache key of a mesh.
+
+        Parameters
+        ----------
+        project_id, geometry_id : str
+            Meshes can only be reused within a project and geometry.
+
+        mesh_model : object
+            The mesh model, e.g. SimmetrixMeshingFluid, with sizing, layer,
+            advanced and refinement settings.
+
+        api_client : object, optional
+            Used to serialize the SDK model like the API requests do.
+
+        physics : object, optional
+            What physics based meshing depends on (boundary condition
+            types and assignments), JSON types.
+
+        '''
+        model = api_client.sanitize_for_serialization(mesh_model) if api_client is not None else mesh_model.to_dict()
+        data = json.dumps({"geometry_id": geometry_id, "model": model, "physics": physics},
+                          sort_keys = True, separators = (",", ":"), default = str)
+        return f"{project_id}:{hashlib.sha256(data.encode('utf-8')).hexdigest()}"
+
+    def get(self, key):
+
+        entry = self.meshes.get(key)
+        return entry["mesh_id"] if entry else None
+
+    def entry(self, key):
+        '''
+        Return {"mesh_id", "mesh_operation_id"} of a cached mesh, or None.
+        '''
+        return self.meshes.get(key)
+
+    def put(self, key, mesh_id, mesh_operation_id = None):
+
+        self.meshes.set(key, {"mesh_id": mesh_id, "mesh_operation_id": mesh_operation_id})
+
+    def discard(self, key):
+
+        self.meshes.pop(key)
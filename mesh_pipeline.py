@@ -0,0 +1,92 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+class MeshPipeline:
+    def __init__(self, max_workers = 16):
+
+        #One waiting thread per mesh operation in flight, the meshing itself
+        #runs on SimScale so the threads only sleep and poll
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers = max_workers,
+                                           thread_name_prefix = "mesh")
+
+        #Futures of the submitted setups, in submission order
+        self.futures = []
+        self.mesh_times = {}
+
+    def submit(self, setup):
+        '''
+        Start the mesh operation of a SimulationSetup and return a future
+        that resolves to its mesh_id once the mesh is finished and attached
+        to the simulation spec.
+
+        complete_mesh_settings(), create_simulation() and preferably
+        estimate_mesh_operation() must have been called on the setup.
+
+        Parameters
+        ----------
+        setup : SimulationSetup
+            A setup with a created mesh operation and simulation.
+
+        Returns
+        -------
+        future : concurrent.futures.Future
+
+        '''
+        start = time.time()
+        future = setup.start_meshing_operation_async(executor = self.executor)
+
+        def _record(f, setup = setup):
+            #A reused mesh has no mesh operation to time
+            if setup.mesh_operation_id is not None:
+                self.mesh_times[setup.mesh_operation_id] = time.time() - start
+
+        future.add_done_callback(_record)
+        future.setup = setup
+        self.futures.append(future)
+        return future
+
+    def run(self, setups, callback = None):
+        '''
+        Mesh all the given setups concurrently and wait for all of them.
+
+        Each simulation spec is patched with its mesh_id as soon as that
+        mesh finishes, the callback is called in completion order.
+
+        Parameters
+        ----------
+        setups : list
+            A list of SimulationSetup objects.
+
+        callback : callable, optional
+            Called as callback(setup, mesh_id, error) for every finished
+            mesh operation; error is None on success.
+
+        Returns
+        -------
+        mesh_ids : list
+            The mesh_id of every setup in the input order, None for the mesh
+            operations that failed.
+
+        '''
+        futures = [self.submit(setup) for setup in setups]
+
+        for future in as_completed(futures):
+            error = future.exception()
+            mesh_id = None if error is not None else future.result()
+            if error is not None:
+                print(f"Mesh operation {future.setup.mesh_operation_id} failed: {error}")
+            if callback is not None:
+                callback(future.setup, mesh_id, error)
+
+        return [None if f.exception() is not None else f.result() for f in futures]
+
+    def shutdown(self, wait = True):
+
+        self.executor.shutdown(wait = wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
@@ -0,0 +1,191 @@
+import threading
+import time
+import weakref
+
+import simscale_sdk as sim_sdk
+
+from .pagination import iter_projects, iter_simulations, iter_simulation_runs, iter_geometries
+
+class _ScopeIndex:
+    def __init__(self, items):
+
+        self.started = time.time()
+        self.names = {}
+        #Remaining (name, id) pairs of the listing, None once fully indexed
+        self._items = items
+        self._lock = threading.Lock()
+
+    def find(self, name):
+
+        with self._lock:
+            if name in self.names:
+                return self.names[name]
+            while self._items is not None:
+                try:
+                    item_name, _id = next(self._items)
+                except StopIteration:
+                    self._items = None
+                    break
+                #Keep the first match, like the linear scans did
+                self.names.setdefault(item_name, _id)
+                if item_name == name:
+                    return self.names[name]
+            return None
+
+class NameResolver:
+    #One resolver per API client, shared by all the classes using that client
+    _shared = weakref.WeakKeyDictionary()
+    _shared_lock = threading.Lock()
+
+    def __init__(self, api_client, ttl = 300, page_size = 100, refresh_interval = 10):
+        '''
+        Resolve project, simulation, run and geometry names to their IDs
+        from cached name -> ID indexes.
+
+        Each scope (the projects of the account, the simulations or
+        geometries of a project, the runs of a simulation) is listed once,
+        lazily page by page, indexed by name and kept for ttl seconds.
+        Names created through this package are added to the index
+        directly, so they do not trigger a new listing, and a name missing
+        from an index within its ttl is taken not to exist.
+
+        Parameters
+        ----------
+        api_client : object
+            The SimScale API client.
+
+        ttl : float, optional
+            Seconds after which a scope is listed again.
+
+        page_size : int, optional
+            Number of items fetched per page of a listing.
+
+        refresh_interval : float, optional
+            Minimum age in seconds of an index before a lookup with
+            refresh = True lists its scope again on a miss.
+
+        '''
+        self.api_client = api_client
+        self.ttl = ttl
+        self.page_size = page_size
+        self.refresh_interval = refresh_interval
+
+        self.project_api = sim_sdk.ProjectsApi(self.api_client)
+        self.simulation_api = sim_sdk.SimulationsApi(self.api_client)
+        self.simulation_run_api = sim_sdk.SimulationRunsApi(self.api_client)
+        self.geometry_api = sim_sdk.GeometriesApi(self.api_client)
+
+        #scope -> _ScopeIndex
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+        #Counters
+        self.hits = 0
+        self.listings = 0
+
+    @classmethod
+    def for_client(cls, api_client):
+
+        with cls._shared_lock:
+            resolver = cls._shared.get(api_client)
+            if resolver is None:
+                resolver = cls(api_client)
+                cls._shared[api_client] = resolver
+            return resolver
+
+    def _iter(self, scope):
+
+        kind = scope[0]
+        if kind == "projects":
+            return ((p.name, p.project_id) for p in iter_projects(self.project_api, self.page_size))
+        elif kind == "simulations":
+            return ((s.name, s.simulation_id) for s in iter_simulations(self.simulation_api, scope[1], self.page_size))
+        elif kind == "runs":
+            return ((r.name, r.run_id) for r in iter_simulation_runs(self.simulation_run_api, scope[1], scope[2], self.page_size))
+        elif kind == "geometries":
+            return ((g.name, g.geometry_id) for g in iter_geometries(self.geometry_api, scope[1], self.page_size))
+        raise ValueError(f"Unknown scope: {kind}")
+
+    def _new_index(self, scope):
+
+        index = _ScopeIndex(self._iter(scope))
+        with self._lock:
+            self._indexes[scope] = index
+            self.listings += 1
+        return index
+
+    def _index(self, scope):
+
+        with self._lock:
+            index = self._indexes.get(scope)
+        if index is None or time.time() - index.started > self.ttl:
+            return self._new_index(scope), True
+        return index, False
+
+    def lookup(self, scope, name, refresh = False):
+        '''
+        Return the ID of name in scope, or None if it does not exist.
+
+        The listing of a scope is walked page by page only as far as needed
+        to find the name, and trusted for ttl seconds: checking a name that
+        does not exist yet, e.g. before creating it, costs no API call.
+
+        With refresh = True a miss lists the scope again, at most once
+        every refresh_interval seconds, for names that may have been
+        created outside of this resolver, e.g. in the web UI.
+        '''
+        index, fresh = self._index(scope)
+        _id = index.find(name)
+        if _id is None and refresh and not fresh and time.time() - index.started > self.refresh_interval:
+            _id = self._new_index(scope).find(name)
+        elif _id is not None:
+            with self._lock:
+                self.hits += 1
+        return _id
+
+    def project_id(self, name, refresh = False):
+
+        return self.lookup(("projects",), name, refresh)
+
+    def simulation_id(self, project_id, name, refresh = False):
+
+        return self.lookup(("simulations", project_id), name, refresh)
+
+    def run_id(self, project_id, simulation_id, name, refresh = False):
+
+        return self.lookup(("runs", project_id, simulation_id), name, refresh)
+
+    def geometry_id(self, project_id, name, refresh = False):
+
+        return self.lookup(("geometries", project_id), name, refresh)
+
+    def add(self, scope, name, _id):
+        '''
+        Register a newly created object, e.g. add(("simulations",
+        project_id), name, simulation_id).
+        '''
+        with self._lock:
+            index = self._indexes.get(scope)
+        if index is not None:
+            with index._lock:
+                index.names.setdefault(name, _id)
+
+    def remove(self, scope, name):
+        '''
+        Forget a deleted object.
+        '''
+        with self._lock:
+            index = self._indexes.get(scope)
+        if index is not None:
+            with index._lock:
+                index.names.pop(name, None)
+
+    def invalidate(self, scope = None):
+        '''
+        Drop the index of one scope, or of all scopes if scope is None.
+        '''
+        with self._lock:
+            if scope is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(scope, None)
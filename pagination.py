@@ -0,0 +1,93 @@
+from concurrent.futures import ThreadPoolExecutor
+
+def iter_items(list_call, *args, page_size = 100, prefetch = False, **kwargs):
+    '''
+    Lazily walk all the pages of a SimScale list endpoint.
+
+    Pages are only requested when the previous one has been consumed, so a
+    caller that stops iterating early (e.g. after finding a name) never
+    fetches the remaining pages.
+
+    Parameters
+    ----------
+    list_call : callable
+        A list endpoint such as project_api.get_projects.
+
+    *args :
+        Positional arguments of the endpoint, e.g. the project_id.
+
+    page_size : int, optional
+        Number of items requested per page.
+
+    prefetch : bool, optional
+        If True, the next page is requested in the background while the
+        items of the current page are being consumed.
+
+    **kwargs :
+        Extra filters passed to the endpoint.
+
+    Yields
+    ------
+    item : object
+        The SDK model of every listed item.
+
+    '''
+    def fetch(page):
+        response = list_call(*args, limit = page_size, page = page, **kwargs)
+        return response.embedded or []
+
+    executor = ThreadPoolExecutor(max_workers = 1) if prefetch else None
+    try:
+        page = 1
+        items = fetch(page)
+        while items:
+            last_page = len(items) < page_size
+            next_page = None
+            if executor is not None and not last_page:
+                next_page = executor.submit(fetch, page + 1)
+
+            for item in items:
+                yield item
+
+            if last_page:
+                break
+            page += 1
+            items = next_page.result() if next_page is not None else fetch(page)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait = False)
+
+def iter_projects(project_api, page_size = 100, prefetch = False):
+
+    return iter_items(project_api.get_projects, page_size = page_size, prefetch = prefetch)
+
+def iter_simulations(simulation_api, project_id, page_size = 100, prefetch = False):
+
+    return iter_items(simulation_api.get_simulations, project_id, page_size = page_size, prefetch = prefetch)
+
+def iter_simulation_runs(simulation_run_api, project_id, simulation_id, page_size = 100, prefetch = False):
+
+    return iter_items(simulation_run_api.get_simulation_runs, project_id, simulation_id,
+                      page_size = page_size, prefetch = prefetch)
+
+def iter_geometries(geometry_api, project_id, page_size = 100, prefetch = False):
+
+    return iter_items(geometry_api.get_geometries, project_id, page_size = page_size, prefetch = prefetch)
+
+def iter_results(simulation_run_api, project_id, simulation_id, run_id, page_size = 100, prefetch = False, **filters):
+    '''
+    Walk the results of a simulation run, filters such as category,
+    quantity or name are passed to get_simulation_run_results.
+    '''
+    return iter_items(simulation_run_api.get_simulation_run_results, project_id, simulation_id, run_id,
+                      page_size = page_size, prefetch = prefetch, **filters)
+
+def find_first(items, name):
+    '''
+    Return the first item with the given name, or None. Stops consuming
+    the iterator as soon as the name is found.
+    '''
+    for item in items:
+        if item.name == name:
+            return item
+    return None
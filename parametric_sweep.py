@@ -0,0 +1,289 @@
+import pathlib
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import simscale_sdk as sim_sdk
+
+from .geometry_uploader import GeometryUploader
+from .geometry_cache import GeometryCache
+from .geometry_primitive_cache import GeometryPrimitiveCache
+from .spec_fingerprint import SimulationIndex
+from .mesh_cache import MeshCache
+from .simulation_setup import SimulationSetup
+from .run_simulation import RunSimulation
+from .post_process import PostProcess
+
+STAGES = ("upload", "setup", "mesh", "run", "download")
+
+class StageStats:
+    def __init__(self, name, limit):
+
+        self.name = name
+        self.limit = limit
+        self.completed = 0
+        self.failed = 0
+        self.busy_time = 0.0
+        self.first_start = None
+        self.last_end = None
+        self._lock = threading.Lock()
+
+    def record(self, start, end, ok):
+
+        with self._lock:
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self.busy_time += end - start
+            self.first_start = start if self.first_start is None else min(self.first_start, start)
+            self.last_end = end if self.last_end is None else max(self.last_end, end)
+
+    def to_dict(self):
+
+        span = (self.last_end - self.first_start) if self.first_start is not None else 0.0
+        return {
+            "stage": self.name,
+            "limit": self.limit,
+            "completed": self.completed,
+            "failed": self.failed,
+            "busy_time": self.busy_time,
+            "span": span,
+            #Jobs finished per hour over the time the stage was active
+            "throughput_per_hour": (self.completed / span * 3600) if span > 0 else 0.0,
+            "mean_job_time": (self.busy_time / (self.completed + self.failed)) if (self.completed + self.failed) else 0.0,
+        }
+
+class ParametricSweep:
+    def __init__(self, api_key_manager, project_id, build_setup,
+                 stage_limits = None, downloads = None,
+                 run_name = "Run 1", dir_name = "sweep_results"):
+        '''
+        Drive many variants through upload, setup, mesh, run and download
+        with a bounded number of jobs per stage, so the stages of different
+        variants overlap.
+
+        Parameters
+        ----------
+        api_key_manager : APIKeyManager
+            A manager on which set_api_connection() has been called.
+
+        project_id : str
+            The project all the variants are created in.
+
+        build_setup : callable
+            Called as build_setup(setup, params) with a fresh SimulationSetup
+            and the parameter set of the variant. It must do the set_*
+            calls of the variant (materials, boundary conditions, controls,
+            mesh layer settings...) and finish with set_simulation_spec().
+
+        stage_limits : dict, optional
+            Maximum number of concurrent jobs per stage, e.g.
+            {"upload": 2, "mesh": 4, "run": 4}. Missing stages default to 2.
+
+        downloads : list, optional
+            (name, data_type, field) tuples passed to
+            PostProcess.get_surface_data_results for every finished run.
+            Can be overridden per variant with a "downloads" key.
+
+        run_name : str, optional
+            The name of the simulation run created for every variant.
+
+        dir_name : str, optional
+            Results of every variant are written to dir_name/<variant name>.
+
+        '''
+        self.api_key_manager = api_key_manager
+        self.api_client = api_key_manager.api_client
+        self.project_id = project_id
+        self.build_setup = build_setup
+        self.downloads = downloads or []
+        self.run_name = run_name
+        self.dir_name = dir_name
+
+        stage_limits = stage_limits or {}
+        self.stage_limits = {stage: stage_limits.get(stage, 2) for stage in STAGES}
+        self._semaphores = {stage: threading.BoundedSemaphore(limit) for stage, limit in self.stage_limits.items()}
+        self.stage_stats = {stage: StageStats(stage, limit) for stage, limit in self.stage_limits.items()}
+
+        #Geometry uploads shared between variants, keyed by (path, units, format)
+        self._geometries = {}
+        self._geometries_lock = threading.Lock()
+        #Local caches shared by all the uploaders and setups of the sweep
+        self.geometry_cache = GeometryCache()
+        self.primitive_cache = GeometryPrimitiveCache()
+        self.simulation_index = SimulationIndex()
+        self.mesh_cache = MeshCache()
+
+        self.results = []
+        self.wall_time = None
+
+    def _stage(self, stage, function, *args):
+
+        with self._semaphores[stage]:
+            start = time.time()
+            ok = False
+            try:
+                value = function(*args)
+                ok = True
+                return value
+            finally:
+                self.stage_stats[stage].record(start, time.time(), ok)
+
+    def _get_geometry_id(self, params):
+
+        path = str(params["geometry_path"])
+        units = params.get("units", "m")
+        _format = params.get("format", "STEP")
+        key = (path, units, _format)
+
+        with self._geometries_lock:
+            future = self._geometries.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._geometries[key] = future
+
+        #Only the first variant that needs a geometry uploads it, the others wait
+        if owner:
+            try:
+                name = params.get("geometry_name", pathlib.Path(path).stem)
+                future.set_result(self._stage("upload", self._upload, name, path, units, _format))
+            except BaseException as e:
+                future.set_exception(e)
+
+        return future.result()
+
+    def _upload(self, name, path, units, _format):
+
+        uploader = GeometryUploader(self.api_client, self.project_id, self.geometry_cache)
+        uploader.upload_geometry(name, path = path, units = units, _format = _format, reuse = True)
+        return uploader.geometry_id
+
+    def _setup(self, params, geometry_id):
+
+        setup = SimulationSetup(self.api_client, sim_sdk.GeometriesApi(self.api_client), geometry_id, self.project_id)
+        setup.primitive_cache = self.primitive_cache
+        setup.simulation_index = self.simulation_index
+        setup.mesh_cache = self.mesh_cache
+        self.build_setup(setup, params)
+        setup.create_simulation(reuse = True,
+                                fingerprint_extra = {"fineness": params.get("fineness", 5),
+                                                     "physics_based_meshing": params.get("physics_based_meshing", True)})
+        if setup.reused_simulation and setup.mesh_id is not None:
+            #Identical simulation already meshed, skip the mesh settings
+            return setup
+        setup.complete_mesh_settings(params["name"] + " mesh", fineness = params.get("fineness", 5),
+                                     physics_based_meshing = params.get("physics_based_meshing", True), reuse = True)
+        setup.estimate_mesh_operation()
+        setup.check_simulation_and_mesh_settings()
+        return setup
+
+    def _mesh(self, setup):
+
+        if setup.reused_simulation and setup.mesh_id is not None:
+            return setup.mesh_id
+        setup.start_meshing_operation(run_state = False)
+        return setup.mesh_id
+
+    def _run(self, setup):
+
+        run = RunSimulation(setup.simulation_run_api, self.project_id, setup.simulation_api, self.api_client)
+        run.simulation_id = setup.simulation_id
+        if setup.reused_simulation and run.find_finished_run():
+            return run
+        run.estimate_simulation()
+        run.create_simulation_run(self.run_name)
+        run.start_simulation_run(wait_for_results = True)
+        if run.simulation_run.status != "FINISHED":
+            raise Exception(f"Simulation run {run.run_id} ended with status {run.simulation_run.status}")
+        return run
+
+    def _download(self, params, setup, run):
+
+        post_process = PostProcess(self.api_client, sim_sdk.ProjectsApi(self.api_client), self.api_key_manager.api_key,
+                                   self.api_key_manager.api_key_header)
+        post_process.project_id = self.project_id
+        post_process.simulation_id = setup.simulation_id
+        post_process.run_id = run.run_id
+        post_process.simulation_results = post_process.simulation_run_api.get_simulation_run_results(
+            self.project_id, setup.simulation_id, run.run_id)
+
+        dir_name = str(pathlib.Path(self.dir_name) / params["name"])
+        results = {}
+        for name, data_type, field in params.get("downloads", self.downloads):
+            results[(name, data_type, field)] = post_process.get_surface_data_results(
+                name, data_type = data_type, field = field, dir_name = dir_name)
+        return results
+
+    def _run_variant(self, params):
+
+        result = {"name": params["name"], "params": params, "error": None, "failed_stage": None}
+        stage = "upload"
+        try:
+            result["geometry_id"] = self._get_geometry_id(params)
+
+            stage = "setup"
+            setup = self._stage("setup", self._setup, params, result["geometry_id"])
+            result["simulation_id"] = setup.simulation_id
+
+            stage = "mesh"
+            result["mesh_id"] = self._stage("mesh", self._mesh, setup)
+
+            stage = "run"
+            run = self._stage("run", self._run, setup)
+            result["run_id"] = run.run_id
+
+            stage = "download"
+            result["results"] = self._stage("download", self._download, params, setup, run)
+        except Exception as e:
+            result["error"] = e
+            result["failed_stage"] = stage
+            print(f"Variant {params['name']} failed in stage {stage}: {e}")
+        return result
+
+    def run(self, parameter_sets):
+        '''
+        Run every parameter set through all the stages.
+
+        Parameters
+        ----------
+        parameter_sets : list
+            A list of dicts, one per variant. Every dict needs a unique
+            "name" and a "geometry_path"; "geometry_name", "units",
+            "format", "fineness", "physics_based_meshing" and "downloads"
+            are optional. Any other keys (conductivities, HTCs, ambient
+            temperatures...) are only read by build_setup.
+
+        Returns
+        -------
+        results : list
+            One dict per variant, in input order, with the created ids, the
+            downloaded results and the error if a stage failed.
+
+        '''
+        start = time.time()
+
+        #Enough variant drivers to keep every stage busy at its limit
+        max_workers = sum(self.stage_limits.values())
+        with ThreadPoolExecutor(max_workers = max_workers, thread_name_prefix = "sweep") as executor:
+            self.results = list(executor.map(self._run_variant, parameter_sets))
+
+        self.wall_time = time.time() - start
+        return self.results
+
+    def report(self):
+        '''
+        Print and return the per stage throughput and the total wall time.
+        '''
+        stats = [self.stage_stats[stage].to_dict() for stage in STAGES]
+
+        print("*"*10)
+        for s in stats:
+            print("{stage:<9} limit {limit:>3}  done {completed:>4}  failed {failed:>3}  "
+                  "busy {busy_time:>9.0f} s  {throughput_per_hour:>7.1f} jobs/h".format(**s))
+        if self.wall_time is not None:
+            print(f"Total wall time: {self.wall_time:.0f} s")
+        print("*"*10)
+
+        return {"stages": stats, "wall_time": self.wall_time}
@@ -1,10 +1,50 @@
 
+import hashlib
+import os
 import pathlib
+import re
 import time
-import zipfile
 import csv
-from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
 import simscale_sdk as sim_sdk
+from simscale_sdk import ApiException
+
+from .status_poller import default_poller
+from .name_resolver import NameResolver
+from .pagination import iter_results
+from .progress import ProgressPrinter
+from .solution_archive import SolutionArchive
+from .result_table import ResultTable, merge_series
+
+#Results downloaded by download_results() unless other categories are given
+CSV_RESULT_CATEGORIES = ("AREA_AVERAGE", "AREA_INTEGRAL", "PROBE_POINT_PLOT")
+
+#HTTP statuses after which a download is tried again
+RETRY_STATUSES = (408, 429, 500, 502, 503, 504)
+
+def file_checksum(path, algorithm = "sha256", chunk_size = 1024 * 1024):
+    
+    digest = hashlib.new(algorithm)
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _validator(headers):
+    
+    #Strong ETag, else Last-Modified: what If-Range accepts to resume the same file
+    headers = headers or {}
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
+
+def _result_file_name(result):
+    
+    parts = [result.category, result.name, getattr(result, "quantity", None)]
+    stem = "_".join(str(part) for part in parts if part)
+    download_format = getattr(result.download, "format", None) or "csv"
+    return re.sub(r'[<>:"/\\|?*\s]+', "_", stem) + "." + str(download_format).lower()
 
 class PostProcess:
     def __init__(self, api_client, project_api, api_key, api_key_header):
@@ -28,44 +68,31 @@ class PostProcess:
         self.probe_point_plot_data_response = None
         self.solution_info = None
         self.reports_api = None
+        
+        #Poller used to wait for report generation
+        self.poller = default_poller
+        self.resolver = NameResolver.for_client(self.api_client)
 
     def get_simulation_results(self, name, sim_name, run_name): 
         #Check if the project already exists
-        projects = self.project_api.get_projects(limit=1000).to_dict()['embedded']
-        found = None
-        for project in projects:
-            if project['name'] == name:
-                found = project
-                print('Project found: \n' + str(found['name']))
-                break
-        if found is None:
+        #The objects must exist, possibly created elsewhere, so a miss lists again
+        project_id = self.resolver.project_id(name, refresh = True)
+        if project_id is None:
             raise Exception('could not find project with name: ' + name)
+        print('Project found: \n' + str(name))
         
-        self.project_id = found['project_id']
+        self.project_id = project_id
         self.project_name = name
-        print("Cannot create project with the same name, using existing project")
 
-        simulations = self.simulation_api.get_simulations(self.project_id).to_dict()['embedded']
-        found = None
-        for simulation in simulations:
-            if simulation['name'] == sim_name:
-                found = simulation
-                print('Simulation found: \n' + str(found['name']))
-                break
-        if found is None:
+        simulation_id = self.resolver.simulation_id(self.project_id, sim_name, refresh = True)
+        if simulation_id is None:
             raise Exception('could not find simulation with id: ' + sim_name)
-        self.simulation = found
-        self.simulation_id = found["simulation_id"]
-        #self.simulation_run = sim_sdk.SimulationRun(name= run_name)
+        print('Simulation found: \n' + str(sim_name))
+        self.simulation = {'name': sim_name, 'simulation_id': simulation_id}
+        self.simulation_id = simulation_id
 
-        self.simulation_runs = self.simulation_run_api.get_simulation_runs(self.project_id, self.simulation_id).to_dict()
-
-        # Iterating through each simulation in the embedded list
-        for simulation in self.simulation_runs['embedded']:
-            if simulation['name'] == run_name:
-                self.run_id = simulation['run_id']
-                break
-        else:
+        self.run_id = self.resolver.run_id(self.project_id, self.simulation_id, run_name, refresh = True)
+        if self.run_id is None:
             print(f"No simulation found with the name '{run_name}'")
 
         print("Project ID:",self.project_id)
@@ -147,15 +174,241 @@ class PostProcess:
         return area_average_results_csv
 
         
+    def download_file(self, url, path, chunk_size = 1024 * 1024, progress_callback = None, 
+                      resume = True, checksum = None, checksum_algorithm = "sha256", retries = 3):
+        
+        '''
+        Stream a download to disk in chunks, so memory use does not depend 
+        on the file size.
+        
+        The data is written to <path>.part, which is moved to path once 
+        complete. If the download is interrupted it continues from the 
+        end of the .part file with an HTTP range request, also on a later 
+        call with the same path. The ETag (or Last-Modified) of the remote 
+        file is kept in <path>.part.validator and sent as If-Range, so a 
+        .part file of another file, e.g. the solution of an earlier run 
+        downloaded to the same path, is never continued: the server sends 
+        the whole file instead. A .part file without a validator is 
+        discarded.
+        
+        Parameters
+        ----------
+        url : str
+            The download url, e.g. result.download.url.
+        
+        path : str or pathlib.Path
+            Where the file is written.
+        
+        chunk_size : int, optional
+            Bytes read and written at a time.
+        
+        progress_callback : callable, optional
+            Called as progress_callback(received, total, rate) after every 
+            chunk, total is None if the server does not send the size. 
+            False disables the progress output.
+        
+        resume : boolean, optional
+            If False, a .part file left by an earlier call is discarded.
+        
+        checksum : str, optional
+            Expected hex digest of the whole file.
+        
+        checksum_algorithm : str, optional
+            The hashlib algorithm of the checksum.
+        
+        retries : int, optional
+            Number of times an interrupted download is resumed.
+        
+        Returns
+        -------
+        path : pathlib.Path
+        
+        '''
+        path = pathlib.Path(path)
+        part = path.with_name(path.name + ".part")
+        validator_file = path.with_name(path.name + ".part.validator")
+        path.parent.mkdir(parents = True, exist_ok = True)
+        if progress_callback is None:
+            progress_callback = ProgressPrinter(path.name, action = "Downloading")
+        
+        def discard():
+            for partial in (part, validator_file):
+                if partial.exists():
+                    partial.unlink()
+        
+        if not resume:
+            discard()
+        
+        for attempt in range(retries + 1):
+            validator = validator_file.read_text() if validator_file.exists() else None
+            if part.exists() and not validator:
+                #Nothing tells which remote file the data came from
+                discard()
+            offset = part.stat().st_size if part.exists() else 0
+            #Ranges are in bytes as stored, so ask for the file uncompressed
+            headers = {self.api_key_header: self.api_key, "accept-encoding": "identity"}
+            if offset:
+                headers["Range"] = f"bytes={offset}-"
+                headers["If-Range"] = validator
+            
+            response = None
+            try:
+                response = self.api_client.rest_client.GET(url = url, headers = headers, _preload_content = False)
+                if response.status != 206:
+                    #Range not honoured or the remote file changed, start again from the beginning
+                    offset = 0
+                    validator = _validator(response.headers)
+                    if validator:
+                        validator_file.write_text(validator)
+                    elif validator_file.exists():
+                        validator_file.unlink()
+                length = response.headers.get("Content-Length")
+                total = offset + int(length) if length is not None else None
+                
+                received = offset
+                start = time.time()
+                with open(part, "ab" if offset else "wb") as file:
+                    for chunk in response.stream(chunk_size, decode_content = False):
+                        file.write(chunk)
+                        received += len(chunk)
+                        if progress_callback:
+                            progress_callback(received, total, (received - offset) / max(time.time() - start, 1e-6))
+                
+                if total is not None and received < total:
+                    raise IOError(f"Download of {path.name} interrupted at {received} of {total} bytes")
+                break
+            except ApiException as ae:
+                if ae.status == 416 and offset:
+                    #The .part file does not match the remote file, start again
+                    discard()
+                    continue
+                if attempt == retries or ae.status not in RETRY_STATUSES:
+                    raise ae
+                print(f"Download of {path.name} failed with status {ae.status}, retrying")
+                time.sleep(min(30, 2 ** attempt))
+            except Exception as e:
+                if attempt == retries:
+                    raise e
+                print(f"Download of {path.name} interrupted, resuming: {e}")
+                time.sleep(min(30, 2 ** attempt))
+            finally:
+                if response is not None:
+                    response.release_conn()
+        else:
+            raise Exception(f"Download of {path.name} failed after {retries + 1} attempts")
+        
+        if checksum is not None:
+            actual = file_checksum(part, checksum_algorithm)
+            if actual != checksum.lower():
+                discard()
+                raise Exception(f"Checksum mismatch for {path.name}", checksum, actual)
+        
+        os.replace(part, path)
+        if validator_file.exists():
+            validator_file.unlink()
+        return path
+    
+    def download_results(self, categories = CSV_RESULT_CATEGORIES, names = None, quantities = None, 
+                         dir_name = "simulation_results", max_workers = 8, retries = 3):
+        
+        '''
+        Download all the results of the run matching the filters at once.
+        
+        Parameters
+        ----------
+        categories : list, optional
+            Result categories, e.g. "AREA_AVERAGE", "AREA_INTEGRAL" or 
+            "PROBE_POINT_PLOT". None for all categories, including the 
+            SOLUTION archive.
+        
+        names : list, optional
+            Result names, e.g. the names of the surface data or probe point 
+            plots. None for all names.
+        
+        quantities : list, optional
+            Fields, e.g. 'T', 'p', 'Ux', 'wallHeatFlux'. None for all.
+        
+        dir_name : str, optional
+            Directory the results are written to, as 
+            <category>_<name>_<quantity>.<format>.
+        
+        max_workers : int, optional
+            Number of results downloaded at the same time.
+        
+        retries : int, optional
+            Retries of every single result before it is reported as failed.
+        
+        Returns
+        -------
+        downloaded : dict
+            {(category, name, quantity): path} of the written results.
+        
+        failed : dict
+            {(category, name, quantity): exception} of the results that 
+            could not be downloaded.
+        
+        '''
+        results = [r for r in iter_results(self.simulation_run_api, self.project_id, self.simulation_id, 
+                                           self.run_id, prefetch = True)
+                   if r.download is not None
+                   and (categories is None or r.category in categories)
+                   and (names is None or r.name in names)
+                   and (quantities is None or getattr(r, "quantity", None) in quantities)]
+        print(f"Downloading {len(results)} results to {dir_name}")
+        
+        directory = pathlib.Path(dir_name)
+        downloaded = {}
+        failed = {}
+        with ThreadPoolExecutor(max_workers = max_workers, thread_name_prefix = "results") as executor:
+            futures = [(r, executor.submit(self.download_file, r.download.url, directory / _result_file_name(r), 
+                                           progress_callback = False, retries = retries)) 
+                       for r in results]
+            for r, future in futures:
+                key = (r.category, r.name, getattr(r, "quantity", None))
+                try:
+                    downloaded[key] = future.result()
+                except Exception as e:
+                    failed[key] = e
+                    print(f"Download of {key} failed: {e}")
+        
+        print(f"Downloaded {len(downloaded)} results, {len(failed)} failed")
+        return downloaded, failed
+    
     def get_simulation_case_files(self): 
         
         self.solution_info = [r for r in self.simulation_results._embedded if r.category == "SOLUTION"][0]
-        solution_response = self.api_client.rest_client.GET(
-            url=self.solution_info.download.url, headers={self.api_key_header: self.api_key}, _preload_content=False)
-        with open("case_file_solution.zip", "wb") as file:
-               file.write(solution_response.data)
-        zip = zipfile.ZipFile("case_file_solution.zip")
-        print(f"Averaged solution ZIP file content: {zip.namelist()}")
+        self.download_file(self.solution_info.download.url, "case_file_solution.zip")
+        archive = SolutionArchive("case_file_solution.zip")
+        print(f"Averaged solution ZIP file content: {archive.zip.namelist()}")
+        return archive
+    
+    def open_solution_archive(self, remote = True, path = "case_file_solution.zip"):
+        
+        '''
+        Open the SOLUTION archive of the run for reading single fields.
+        
+        Parameters
+        ----------
+        remote : boolean, optional
+            If True the archive is read with HTTP range requests, only the 
+            fields read are transferred. If False it is downloaded to path 
+            first, unless already there.
+        
+        path : str, optional
+            The local archive.
+        
+        Returns
+        -------
+        archive : SolutionArchive
+        
+        '''
+        self.solution_info = [r for r in self.simulation_results._embedded if r.category == "SOLUTION"][0]
+        if remote:
+            return SolutionArchive.from_url(self.api_client.rest_client, self.solution_info.download.url,
+                                            headers = {self.api_key_header: self.api_key})
+        if not pathlib.Path(path).exists():
+            self.download_file(self.solution_info.download.url, path)
+        return SolutionArchive(path)
     
     def get_simulation_report(self, part_id = "region1"):
         self.reports_api = sim_sdk.ReportsApi(self.api_client) 
@@ -196,62 +449,57 @@ class PostProcess:
         
         report = self.reports_api.get_report(self.project_id, report_id)
         
-        while report.status not in ("FINISHED", "CANCELED", "FAILED"):
-            time.sleep(30)
-            report = self.reports_api.get_report(self.project_id, report_id)
+        report = self.poller.wait(lambda: self.reports_api.get_report(self.project_id, report_id),
+                                  initial = report)
         
         print(f"Report finished with status {report.status}")
         
         if report.status == "FINISHED":
             # Download the report
             print("Downloading report result")
-            report_response = self.api_client.rest_client.GET(
-                url=report.download.url,
-                headers={self.api_key_header: self.api_key},
-                _preload_content=False,
-            )
-        
             file_name = home_dir / f"report.{report.download.format}"
-            with open(file_name, "wb") as file:
-                file.write(report_response.data)
-                print(f"Finished downloading report with name {file_name}")
+            self.download_file(report.download.url, file_name)
+            print(f"Finished downloading report with name {file_name}")
         elif report.status == "FAILED":
             raise Exception("Report generation failed", report.failure_reason)
 
-    # Function to read CSV data from a string and convert it into a list of dictionaries
+    # Function to read CSV data from a string into a columnar ResultTable
     def read_csv_data(self, csv_string):
-        data = StringIO(csv_string)
-        reader = csv.DictReader(data)
-        return [row for row in reader]
+        return ResultTable.from_csv_string(csv_string)
 
     # Function to calculate sum of all columns except the first one (time column) and add it as a new column
     def process_data(self, data):
-        processed_data = []
-        for row in data:
-            row_data = list(row.values())
-            time = row_data[0]
-            values = list(map(float, row_data[1:]))
-            sum_values = sum(values)
-            processed_data.append(row_data + [sum_values])
-        return processed_data
+        if not isinstance(data, ResultTable):
+            #List of row dicts, as returned by csv.DictReader
+            data = ResultTable.from_columns({key: [float(row[key]) for row in data] for key in (data[0] if data else [])})
+        return data.with_column("sum", data.row_sum())
 
     # Function to write the processed data to a CSV file
-    def write_to_csv(self, file_name, data, headers):
+    def write_to_csv(self, file_name, data, headers = None):
         # Path object for the directory
         home_dir = pathlib.Path.home()
         file_path = home_dir / file_name
+        if isinstance(data, ResultTable) and headers is None:
+            data.to_csv(file_path)
+            return
         with open(file_path, mode='w', newline='') as file:
             writer = csv.writer(file)
             writer.writerow(headers)
             writer.writerows(data)
 
-    def combine_data(self, internal_data, external_data):
-        combined_data = []
-        # Assuming both datasets are of the same length and ordered by time
-        for internal_row, external_row in zip(internal_data, external_data):
-            # Assuming the first element is the time which should be identical in both rows
-            time = internal_row[0]
-            internal_sum = internal_row[-1]  # The sum is the last element in the processed data
-            external_sum = external_row[-1]
-            combined_data.append([time, internal_sum, external_sum])
-        return combined_data
\ No newline at end of file
+    def combine_data(self, internal_data, external_data, how = "exact", tolerance = None):
+        '''
+        Align the summed heat flows of the internal and external data on 
+        time, see merge_series for how and tolerance. Any number of 
+        series can be merged at once with merge_series directly.
+        
+        ResultTables give a ResultTable. Lists of rows with the time first 
+        and the sum last, as returned by earlier versions of process_data, 
+        still give a list of [time, internal, external] rows.
+        '''
+        legacy = not isinstance(internal_data, ResultTable)
+        tables = [data if isinstance(data, ResultTable) else
+                  ResultTable(["time", "sum"], [[float(row[0]) for row in data], [float(row[-1]) for row in data]])
+                  for data in (internal_data, external_data)]
+        merged = merge_series(tables, ["internal", "external"], column = -1, how = how, tolerance = tolerance)
+        return merged.rows() if legacy else merged
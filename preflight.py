@@ -0,0 +1,220 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .local_index import LocalIndex
+from .run_simulation import RunSimulation
+
+def _interval(estimation, name):
+
+    value = getattr(estimation, name, None)
+    if value is None:
+        return None
+    return {"value": value.value, "min": value.interval_min, "max": value.interval_max}
+
+def summarize_estimation(estimation):
+    '''
+    Return the cell count, core hours and duration of an estimation as
+    JSON types, or None.
+    '''
+    if estimation is None:
+        return None
+    return {name: _interval(estimation, name) for name in ("cell_count", "compute_resource", "duration")}
+
+class PreflightResult:
+    def __init__(self, setup, run):
+
+        self.setup = setup
+        self.run = run
+        self.name = getattr(setup.simulation_spec, "name", None) or setup.simulation_id
+        self.mesh_estimation = None
+        self.simulation_estimation = None
+        self.warnings = []
+        self.errors = []
+        #Exceptions of the requests themselves, e.g. an estimation that failed
+        self.failures = {}
+        self.runtimes = {}
+        self.cached = False
+
+    @property
+    def ok(self):
+
+        return not self.errors and not self.failures
+
+    def estimated_core_hours(self):
+        '''
+        Return the estimated core hours of the mesh and of the simulation,
+        None for an estimate that is not known.
+        '''
+        core_hours = {}
+        for kind, estimation in (("mesh", self.mesh_estimation), ("simulation", self.simulation_estimation)):
+            resource = estimation["compute_resource"] if estimation else None
+            core_hours[kind] = float(resource["value"]) if resource and resource["value"] is not None else None
+        return core_hours
+
+    def core_hours(self):
+
+        return sum(value for value in self.estimated_core_hours().values() if value is not None)
+
+    def to_dict(self):
+
+        return {"name": self.name, "simulation_id": self.setup.simulation_id, "ok": self.ok,
+                "cached": self.cached, "mesh_estimation": self.mesh_estimation,
+                "simulation_estimation": self.simulation_estimation, "warnings": self.warnings,
+                "errors": self.errors, "failures": {key: str(e) for key, e in self.failures.items()},
+                "runtimes": self.runtimes}
+
+class Preflight:
+    def __init__(self, max_workers = 16, directory = None, max_age = 7 * 24 * 3600):
+        '''
+        Mesh estimate, mesh and simulation setup check and simulation
+        estimate of many simulations at once.
+
+        All the requests of all the setups are in flight at the same time,
+        so validating a sweep takes about one round trip instead of three
+        per variant. Results are cached by spec fingerprint and mesh
+        settings, an unchanged variant is not checked again.
+
+        Parameters
+        ----------
+        max_workers : int, optional
+            Maximum number of concurrent requests.
+
+        directory : pathlib.Path, optional
+            Where the cache is kept, see LocalIndex.
+
+        max_age : float, optional
+            Seconds after which a cached result is requested again, as the
+            estimates change over time.
+
+        '''
+        self.max_workers = max_workers
+        self.max_age = max_age
+        self.cache = LocalIndex("preflight", directory)
+        self.results = []
+
+    @staticmethod
+    def key(setup):
+
+        if setup.spec_fingerprint is None:
+            return None
+        return f"{setup.project_id}:{setup.spec_fingerprint}:{setup.mesh_cache_key}"
+
+    def _mesh_estimate(self, result):
+
+        result.mesh_estimation = summarize_estimation(
+            result.setup.estimate_mesh_operation(maximum_cpu_consumption_limit = None))
+
+    def _check(self, result):
+
+        mesh_check = result.setup.check_simulation_and_mesh_settings(raise_on_error = False)
+        entries = mesh_check.entries if mesh_check is not None else []
+        result.warnings = [entry.message for entry in entries if entry.severity == "WARNING"]
+        result.errors = [entry.message for entry in entries if entry.severity == "ERROR"]
+
+    def _simulation_estimate(self, result):
+
+        result.simulation_estimation = summarize_estimation(
+            result.run.estimate_simulation(maximum_cpu_consumption_limit = None))
+
+    def _store(self, result):
+
+        setup, run = result.setup, result.run
+        result.runtimes = {"mesh_expected_runtime": setup.mesh_expected_runtime,
+                           "mesh_max_runtime": setup.mesh_max_runtime,
+                           "sim_expected_run_time": run.sim_expected_run_time,
+                           "sim_max_run_time": run.sim_max_run_time}
+        key = self.key(setup)
+        if key is not None and result.ok:
+            self.cache.set(key, {"time": time.time(), "mesh_estimation": result.mesh_estimation,
+                                 "simulation_estimation": result.simulation_estimation,
+                                 "warnings": result.warnings, "runtimes": result.runtimes})
+
+    def _load(self, result):
+
+        key = self.key(result.setup)
+        entry = self.cache.get(key) if key is not None else None
+        if entry is None or time.time() - entry["time"] > self.max_age:
+            return False
+
+        result.mesh_estimation = entry["mesh_estimation"]
+        result.simulation_estimation = entry["simulation_estimation"]
+        result.warnings = entry["warnings"]
+        result.runtimes = entry["runtimes"]
+        result.cached = True
+
+        #The waits of the setup and run use the estimated runtimes
+        runtimes = entry["runtimes"]
+        result.setup.mesh_expected_runtime = runtimes["mesh_expected_runtime"]
+        result.setup.mesh_max_runtime = runtimes["mesh_max_runtime"]
+        result.run.sim_expected_run_time = runtimes["sim_expected_run_time"]
+        result.run.sim_max_run_time = runtimes["sim_max_run_time"]
+        return True
+
+    def run(self, setups, use_cache = True):
+        '''
+        Preflight all the setups.
+
+        Parameters
+        ----------
+        setups : list
+            SimulationSetup objects on which create_simulation() and
+            complete_mesh_settings() have been called.
+
+        use_cache : boolean, optional
+            If False every setup is requested again.
+
+        Returns
+        -------
+        results : list
+            One PreflightResult per setup, in input order. result.run is a
+            RunSimulation of the simulation with its estimate set, ready
+            for create_simulation_run().
+
+        '''
+        self.results = []
+        for setup in setups:
+            run = RunSimulation(setup.simulation_run_api, setup.project_id, setup.simulation_api, setup.api_client)
+            run.simulation_id = setup.simulation_id
+            self.results.append(PreflightResult(setup, run))
+
+        requests = (("mesh_estimate", self._mesh_estimate), ("check", self._check),
+                    ("simulation_estimate", self._simulation_estimate))
+
+        with ThreadPoolExecutor(max_workers = self.max_workers, thread_name_prefix = "preflight") as executor:
+            futures = []
+            for result in self.results:
+                if use_cache and self._load(result):
+                    continue
+                futures.append((result, [(name, executor.submit(request, result)) for name, request in requests]))
+
+            for result, requested in futures:
+                for name, future in requested:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        result.failures[name] = e
+                self._store(result)
+
+        return self.results
+
+    def report(self):
+        '''
+        Print and return the consolidated preflight results.
+        '''
+        results = [result.to_dict() for result in self.results]
+
+        print("*"*10)
+        for result, summary in zip(self.results, results):
+            print("{name:<30} {state:<7} {core_hours:>8.1f} core hours  {warnings} warnings{cached}".format(
+                name = str(summary["name"]), state = "OK" if summary["ok"] else "FAILED",
+                core_hours = result.core_hours(), warnings = len(summary["warnings"]),
+                cached = " (cached)" if summary["cached"] else ""))
+            for message in summary["errors"]:
+                print(f"    error: {message}")
+            for name, message in summary["failures"].items():
+                print(f"    {name} failed: {message}")
+        failed = sum(1 for summary in results if not summary["ok"])
+        print(f"{len(results) - failed} of {len(results)} simulations passed the preflight")
+        print("*"*10)
+
+        return {"results": results, "failed": failed}
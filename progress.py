@@ -0,0 +1,33 @@
+import time
+
+class ProgressPrinter:
+    def __init__(self, name, every = 5.0, action = "Uploading"):
+        '''
+        Progress callback of uploads and downloads that prints the MB
+        transferred and the rate at most every few seconds, and once at
+        the end.
+
+        Parameters
+        ----------
+        name : str
+            The name of the file printed with the progress.
+
+        every : float, optional
+            Seconds between two printed lines.
+
+        action : str, optional
+            The verb printed before the name, e.g. "Downloading".
+
+        '''
+        self.name = name
+        self.every = every
+        self.action = action
+        self.last = 0.0
+
+    def __call__(self, sent, total, rate):
+
+        now = time.time()
+        if sent == total or now - self.last >= self.every:
+            self.last = now
+            size = f"{total / 1e6:.1f}" if total is not None else "?"
+            print(f"{self.action} {self.name}: {sent / 1e6:.1f} / {size} MB ({rate / 1e6:.1f} MB/s)")
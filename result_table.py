@@ -0,0 +1,303 @@
+import csv
+import warnings
+from io import StringIO
+
+try:
+    import numpy as np
+except ImportError:
+    #Rhino's Python may not have NumPy, columns are then plain lists
+    np = None
+
+class ResultTable:
+    def __init__(self, columns, values):
+        '''
+        A result CSV held column by column, e.g. an area integral or a
+        probe point plot with the time in the first column.
+
+        With NumPy the values are one 2D float array of shape (rows,
+        columns) and every operation is vectorized, without it they are a
+        list of float lists, one per column.
+
+        Parameters
+        ----------
+        columns : list
+            The column names.
+
+        values : list or numpy.ndarray
+            One sequence of values per column, or a (rows, columns) array.
+
+        '''
+        self.columns = list(columns)
+        if np is None:
+            self.values = [list(column) for column in values]
+        elif isinstance(values, np.ndarray) and values.ndim == 2:
+            self.values = values.astype(float, copy = False)
+        elif len(values):
+            self.values = np.column_stack([np.asarray(column, dtype = float) for column in values])
+        else:
+            self.values = np.empty((0, len(self.columns)))
+
+    @classmethod
+    def from_columns(cls, columns):
+        '''
+        Build a table from {name: values}, all of the same length.
+        '''
+        names = list(columns)
+        return cls(names, [columns[name] for name in names])
+
+    @classmethod
+    def from_csv_string(cls, csv_string):
+        '''
+        Parse a result CSV with one header line and numeric values.
+        '''
+        header, _, body = csv_string.lstrip("\ufeff").partition("\n")
+        columns = next(csv.reader([header.strip()]))
+        body = body.strip()
+        if not body:
+            return cls(columns, [[] for _ in columns])
+
+        if np is not None:
+            #Rows joined into one comma separated list are parsed in a single C call,
+            #NumPy only warns if it stops early on e.g. an empty value
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("error")
+                    flat = np.fromstring(body.replace("\r", "").replace("\n", ","), dtype = float, sep = ",")
+            except (DeprecationWarning, ValueError):
+                flat = None
+            #Only a full row on every line is reshaped, anything else is left to genfromtxt
+            if flat is not None and flat.size == len(columns) * (body.count("\n") + 1) and \
+                    all(line.count(",") == len(columns) - 1 for line in body.split("\n")):
+                return cls(columns, flat.reshape(-1, len(columns)))
+            values = np.genfromtxt(StringIO(body), delimiter = ",", dtype = float, ndmin = 2)
+            if values.shape[1] != len(columns):
+                raise ValueError(f"The rows have {values.shape[1]} values for {len(columns)} columns")
+            return cls(columns, values)
+
+        rows = [row for row in csv.reader(StringIO(body)) if row]
+        for number, row in enumerate(rows, 1):
+            if len(row) != len(columns):
+                raise ValueError(f"Row {number} has {len(row)} values for {len(columns)} columns")
+        return cls(columns, [[float(value) if value != "" else float("nan") for value in column]
+                             for column in zip(*rows)])
+
+    @classmethod
+    def read_csv(cls, path):
+
+        with open(path, "r", newline = "") as file:
+            return cls.from_csv_string(file.read())
+
+    def __len__(self):
+
+        if np is not None:
+            return self.values.shape[0]
+        return len(self.values[0]) if self.values else 0
+
+    def _index(self, column):
+
+        return column if isinstance(column, int) else self.columns.index(column)
+
+    def column(self, column):
+        '''
+        Return a column by name or position, a view of the array with
+        NumPy.
+        '''
+        index = self._index(column)
+        if np is not None:
+            return self.values[:, index]
+        return self.values[index]
+
+    __getitem__ = column
+
+    @property
+    def time(self):
+
+        return self.column(0)
+
+    def select(self, columns):
+
+        indexes = [self._index(column) for column in columns]
+        names = [self.columns[index] for index in indexes]
+        if np is not None:
+            return ResultTable(names, self.values[:, indexes])
+        return ResultTable(names, [self.values[index] for index in indexes])
+
+    def row_sum(self, columns = None):
+        '''
+        Sum of the given columns per row, by default of all the columns
+        but the first (time) one.
+        '''
+        indexes = [self._index(column) for column in columns] if columns is not None else range(1, len(self.columns))
+        indexes = list(indexes)
+        if np is not None:
+            return self.values[:, indexes].sum(axis = 1)
+        if not indexes:
+            return [0.0] * len(self)
+        return [sum(row) for row in zip(*(self.values[index] for index in indexes))]
+
+    def with_column(self, name, values):
+        '''
+        Return a new table with a column appended.
+        '''
+        if np is not None:
+            return ResultTable(self.columns + [name], np.column_stack([self.values, np.asarray(values, dtype = float)]))
+        return ResultTable(self.columns + [name], self.values + [values])
+
+    def sorted_by_time(self):
+        '''
+        Return the table sorted by time with duplicate times removed (the
+        last row written for a time is kept, e.g. after a restart), or the
+        table itself if it already is.
+        '''
+        time = self.time
+        if np is not None:
+            if len(time) < 2 or np.all(time[1:] > time[:-1]):
+                return self
+            order = np.argsort(time, kind = "stable")
+            values = self.values[order]
+            keep = np.append(values[1:, 0] != values[:-1, 0], True)
+            return ResultTable(self.columns, values[keep])
+
+        if all(a < b for a, b in zip(time, time[1:])):
+            return self
+        order = sorted(range(len(time)), key = time.__getitem__)
+        order = [i for position, i in enumerate(order)
+                 if position + 1 == len(order) or time[order[position + 1]] != time[i]]
+        return ResultTable(self.columns, [[column[i] for i in order] for column in self.values])
+
+    def rows(self):
+        '''
+        Return the values as a list of rows, e.g. for csv.writer.
+        '''
+        if np is not None:
+            return self.values.tolist()
+        return [list(row) for row in zip(*self.values)]
+
+    def __iter__(self):
+
+        return iter(self.rows())
+
+    def to_csv(self, path):
+
+        with open(path, "w", newline = "") as file:
+            if np is not None:
+                file.write(",".join(self.columns) + "\n")
+                np.savetxt(file, self.values, delimiter = ",", fmt = "%.10g")
+            else:
+                writer = csv.writer(file)
+                writer.writerow(self.columns)
+                writer.writerows(self.rows())
+
+    def __repr__(self):
+
+        return f"ResultTable({len(self)} rows, columns={self.columns})"
+
+MERGE_METHODS = ("exact", "nearest", "linear")
+
+def _align(reference, times, values, how, tolerance):
+
+    #Values of a time sorted series at the reference times, in one pass
+    nan = float("nan")
+    if np is not None:
+        if len(times) == 0:
+            return np.full(len(reference), nan)
+        if how == "linear":
+            return np.interp(reference, times, values, left = nan, right = nan)
+        right = np.clip(np.searchsorted(times, reference), 0, len(times) - 1)
+        left = np.clip(right - 1, 0, len(times) - 1)
+        pick = np.where(np.abs(times[left] - reference) <= np.abs(times[right] - reference), left, right)
+        aligned = np.asarray(values, dtype = float)[pick]
+        if tolerance is not None:
+            aligned[np.abs(times[pick] - reference) > tolerance] = nan
+        return aligned
+
+    aligned = []
+    j, n = 0, len(times)
+    for t in reference:
+        while j + 1 < n and times[j + 1] <= t:
+            j += 1
+        if n == 0:
+            aligned.append(nan)
+        elif how == "linear":
+            if t < times[0] or t > times[-1]:
+                aligned.append(nan)
+            elif times[j] == t:
+                aligned.append(values[j])
+            else:
+                fraction = (t - times[j]) / (times[j + 1] - times[j])
+                aligned.append(values[j] + fraction * (values[j + 1] - values[j]))
+        else:
+            k = j + 1 if j + 1 < n and abs(times[j + 1] - t) < abs(times[j] - t) else j
+            aligned.append(values[k] if tolerance is None or abs(times[k] - t) <= tolerance else nan)
+    return aligned
+
+def merge_series(tables, names = None, column = -1, how = "exact", tolerance = None, times = None):
+    '''
+    Align a column of many result tables on their time column.
+
+    Every table is sorted by time once and then walked in step with the
+    reference times (a sorted-merge join), so the merge is linear in the
+    number of rows, whatever the write intervals of the tables.
+
+    Parameters
+    ----------
+    tables : list
+        ResultTable objects with the time in the first column.
+
+    names : list, optional
+        Column names of the merged series, series_0, series_1... by
+        default.
+
+    column : int or str, optional
+        The column taken from every table, by default the last one (the
+        sum appended by PostProcess.process_data).
+
+    how : str, optional
+        "exact" - only the times found in all the tables are kept.
+        "nearest" - the value at the nearest time of every table.
+        "linear" - linear interpolation between the times of every table,
+        NaN outside of them.
+
+    tolerance : float, optional
+        Largest time difference for a match with "exact" (default 0) and
+        "nearest" (default unlimited), NaN beyond it for "nearest".
+
+    times : list, optional
+        The times of the merged table for "nearest" and "linear", by
+        default the times of the first table.
+
+    Returns
+    -------
+    merged : ResultTable
+        A "time" column and one column per table.
+
+    '''
+    if how not in MERGE_METHODS:
+        raise ValueError(f"how must be one of {MERGE_METHODS}, not {how!r}")
+    tables = [table.sorted_by_time() for table in tables]
+    names = list(names) if names is not None else [f"series_{i}" for i in range(len(tables))]
+    if len(names) != len(tables):
+        raise ValueError("One name per table is needed")
+    if not tables:
+        return ResultTable(["time"], [[]])
+
+    if how == "exact":
+        tolerance = tolerance or 0.0
+        reference = tables[0].time
+        #Keep the times every other table has, narrowing table by table
+        for table in tables[1:]:
+            matched = _align(reference, table.time, table.time, "nearest", tolerance)
+            if np is not None:
+                reference = reference[~np.isnan(matched)]
+            else:
+                reference = [t for t, m in zip(reference, matched) if m == m]
+        how = "nearest"
+    elif times is not None:
+        reference = np.sort(np.asarray(times, dtype = float)) if np is not None else sorted(times)
+    else:
+        reference = tables[0].time
+
+    columns = {"time": reference}
+    for name, table in zip(names, tables):
+        columns[name] = _align(reference, table.time, table.column(column), how, tolerance)
+    return ResultTable.from_columns(columns)
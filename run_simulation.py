@@ -1,8 +1,12 @@
-import time
 import isodate
  
+from simscale_sdk import ApiException
 import simscale_sdk as sim_sdk
 
+from .status_poller import default_poller
+from .name_resolver import NameResolver
+from .pagination import iter_simulation_runs
+
 class RunSimulation:
     def __init__(self, simulation_run_api, project_id, simulation_api, api_client):
          
@@ -10,6 +14,13 @@ class RunSimulation:
         self.project_id = project_id
         self.simulation_api = simulation_api
         self.api_client = api_client
+        
+        #Set by estimate_simulation and used to schedule status polls
+        self.sim_max_run_time = None
+        self.sim_expected_run_time = None
+        self.estimation = None
+        self.poller = default_poller
+        self.resolver = NameResolver.for_client(self.api_client)
           
          
     def find_simulation(self, name):
@@ -41,23 +52,33 @@ class RunSimulation:
             A simulation object that was matched by the provided name.
     
         '''
-        project_id = self.project_id
-        simulation_api = self.simulation_api
-    
-        simulations = simulation_api.get_simulations(project_id).to_dict()['embedded']
-        found = None
-        for simulation in simulations:
-            if simulation['name'] == name:
-                found = simulation
-                print('Simulation found: \n' + str(found['name']))
-                break
-        if found is None:
+        simulation_id = self.resolver.simulation_id(self.project_id, name)
+        if simulation_id is None:
             raise Exception('could not find simulation with id: ' + name)
-        self.simulation = found
-        self.simulation_id = found["simulation_id"]
+        print('Simulation found: \n' + str(name))
+        self.simulation = {'name': name, 'simulation_id': simulation_id}
+        self.simulation_id = simulation_id
         
     def estimate_simulation(self, maximum_cpu_consumption_limit = 200):
         
+        '''
+        Estimate the simulation and set the expected and maximum runtime 
+        used when waiting for the run.
+
+        Parameters
+        ----------
+        maximum_cpu_consumption_limit : float, optional
+            Raise if the expected core hours are above this limit. None 
+            disables the check, e.g. when a BudgetScheduler decides.
+
+        Returns
+        -------
+        estimation : Estimation
+            The estimation of the API, or None if no estimation is 
+            available.
+
+        '''
+        self.estimation = None
         try:
             estimation = self.simulation_api.estimate_simulation_setup(self.project_id, self.simulation_id)
             # print(f"Simulation estimation: {estimation}")
@@ -74,10 +95,13 @@ class RunSimulation:
                                                                avg   =  estimation.duration.value.replace('PT','')))          
             print("*"*10)
             
-            if estimation.compute_resource is not None and estimation.compute_resource.value > maximum_cpu_consumption_limit:
+            self.estimation = estimation
+            if (maximum_cpu_consumption_limit is not None and estimation.compute_resource is not None 
+                    and estimation.compute_resource.value > maximum_cpu_consumption_limit):
                 raise Exception("Too expensive", estimation)
         
             if estimation.duration is not None:
+                self.sim_expected_run_time = isodate.parse_duration(estimation.duration.value).total_seconds()
                 self.sim_max_run_time = isodate.parse_duration(estimation.duration.interval_max).total_seconds()
                 self.sim_max_run_time = max(3600, self.sim_max_run_time * 2)
             else:
@@ -89,13 +113,35 @@ class RunSimulation:
                 print(f"Simulation estimation not available, assuming max runtime of {self.sim_max_run_time} seconds")
             else:
                 raise ae
+        return self.estimation
+        
+
+    def find_finished_run(self):
         
+        '''
+        Look for a finished run of the simulation, e.g. of a reused 
+        simulation, and select it instead of creating a new run.
+
+        Returns
+        -------
+        found : boolean
+            True if a finished run was found and selected.
+
+        '''
+        for run in iter_simulation_runs(self.simulation_run_api, self.project_id, self.simulation_id):
+            if run.status == "FINISHED":
+                self.run_id = run.run_id
+                self.simulation_run = self.simulation_run_api.get_simulation_run(self.project_id, self.simulation_id, self.run_id)
+                print(f"Finished run found, reusing runId: {self.run_id}")
+                return True
+        return False
 
     def create_simulation_run(self, sim_name ):
         self.simulation_run = sim_sdk.SimulationRun(name= sim_name)
         self.simulation_run = self.simulation_run_api.create_simulation_run(self.project_id, self.simulation_id, self.simulation_run) #ERROR HERE
         self.run_id = self.simulation_run.run_id
         print(f"runId: {self.run_id}")
+        self.resolver.add(("runs", self.project_id, self.simulation_id), sim_name, self.run_id)
         
         # Read simulation run and update with the deserialized model
         self.simulation_run = self.simulation_run_api.get_simulation_run(self.project_id, self.simulation_id, self.run_id)
@@ -133,12 +179,55 @@ class RunSimulation:
             else: 
                 self.simulation_run_api.start_simulation_run(self.project_id, self.simulation_id, self.run_id)
                 self.simulation_run = self.simulation_run_api.get_simulation_run(self.project_id, self.simulation_id, self.run_id)
-                simulation_run_start = time.time()
-                while self.simulation_run.status not in ("FINISHED", "CANCELED", "FAILED"):
-                    if time.time() > simulation_run_start + self.sim_max_run_time:
-                        raise TimeoutError()
-                    time.sleep(30)
-                    self.simulation_run = self.simulation_run_api.get_simulation_run(self.project_id, self.simulation_id, self.run_id)
-                    print(f"Simulation run status: {self.simulation_run.status} - {self.simulation_run.progress}")
+                self.wait_for_simulation_run()
+    
+    def wait_for_simulation_run(self, cancel_event = None):
+        
+        '''
+        Block until the simulation run reaches a terminal state, polling 
+        adaptively based on the estimated duration and reported progress.
+        
+        Raises
+        ------
+        TimeoutError
+            If the run takes longer than sim_max_run_time.
+        PollCancelled
+            If cancel_event is set while waiting.
+        
+        '''
+        sim_max_run_time = self.sim_max_run_time if self.sim_max_run_time is not None else 36000
+        
+        self.simulation_run = self.poller.wait(
+            lambda: self.simulation_run_api.get_simulation_run(self.project_id, self.simulation_id, self.run_id),
+            initial = self.simulation_run, expected_duration = self.sim_expected_run_time,
+            timeout = sim_max_run_time, cancel_event = cancel_event,
+            on_poll = lambda run: print(f"Simulation run status: {run.status} - {run.progress}"))
 
-    
\ No newline at end of file
+    def watch_simulation_run(self, watcher, callback = None):
+        
+        '''
+        Hand the started simulation run over to a shared StatusWatcher 
+        instead of blocking a thread in wait_for_simulation_run.
+        
+        Parameters
+        ----------
+        watcher : StatusWatcher
+            The watcher polling all the runs.
+        
+        callback : callable, optional
+            Called with the simulation run once it is in a terminal state.
+        
+        Returns
+        -------
+        future : concurrent.futures.Future
+            Resolves to the simulation run in its terminal state.
+        
+        '''
+        def _done(simulation_run):
+            self.simulation_run = simulation_run
+            if callback is not None:
+                callback(simulation_run)
+        
+        return watcher.watch_simulation_run(self.project_id, self.simulation_id, self.run_id,
+                                            callback = _done, expected_duration = self.sim_expected_run_time,
+                                            timeout = self.sim_max_run_time)
@@ -1,8 +1,9 @@
-import time
+import csv
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 import isodate
 
-#import pandas as pd #Don't think we need this for now. Doesn't work in Rhino currently.
-
 from simscale_sdk import ApiException \
 
 from simscale_sdk import  CoupledConjugateHeatTransfer, \
@@ -13,8 +14,16 @@ from simscale_sdk import  CoupledConjugateHeatTransfer, \
     
 import simscale_sdk as sim_sdk
 
+from .status_poller import default_poller
+from .name_resolver import NameResolver
+from .geometry_mapping_index import GeometryMappingIndex
+from .geometry_mapping_store import GeometryMappingStore
+from .geometry_primitive_cache import GeometryPrimitiveCache
+from .spec_fingerprint import spec_fingerprint, SimulationIndex
+from .mesh_cache import MeshCache
+
 class SimulationSetup:
-    def __init__(self, api_client, geometry_api, geometry_id, project_id):
+    def __init__(self, api_client, geometry_api, geometry_id, project_id, mapping_store = None):
 
         self.api_client = api_client
         self.geometry_api = geometry_api
@@ -27,6 +36,7 @@ class SimulationSetup:
         self.table_import_api = sim_sdk.TableImportsApi(self.api_client)
         self.reports_api = sim_sdk.ReportsApi(self.api_client) 
         self.wind_api = sim_sdk.WindApi(self.api_client)
+        self.resolver = NameResolver.for_client(self.api_client)
 
         #Geometry Mapping 
         self.single_entity     = {} #for later: separate the faces from volumes 
@@ -34,6 +44,15 @@ class SimulationSetup:
                                     #assignments for the same entity (materials)
         self.multiple_entities = {}
         
+        #Geometry mapping indexes by geometry_id, so entity lookups do not 
+        #need one API call each
+        self.use_mapping_index = True
+        self.mapping_indexes   = {}
+        #Persistent mapping cache: a GeometryMappingStore, the directory of 
+        #one, or False to keep the mappings in memory only. The default store 
+        #is only opened when a mapping is first looked up
+        self._mapping_store    = mapping_store
+        
         #Global Simulation Settings
         self.compressible = False
         self.turbulence_model = None
@@ -79,6 +98,7 @@ class SimulationSetup:
         #Geometry Primitive Variables 
         self.geometry_primitive_uuid = None
         self.geometry_primitive_uuid_list = []
+        self.primitive_cache = GeometryPrimitiveCache()
         
         #Contact Definition
         self.contact_detection = "AUTO"
@@ -91,12 +111,21 @@ class SimulationSetup:
         self.mesh_refinement = [] 
         self.mesh_id = None
         self.mesh_max_runtime = None
+        self.mesh_expected_runtime = None
+        self.mesh_estimation = None
+        self.mesh_cache = MeshCache()
+        self.mesh_cache_key = None
+        self.reused_mesh = False
+        self.poller = default_poller
 
         #Simulation Creation Variables
         self.model = None 
         self.sim_max_run_time = None
         self.simulation_spec = None
         self.simulation_id   = None
+        self.spec_fingerprint = None
+        self.reused_simulation = False
+        self.simulation_index = SimulationIndex()
         self.simulation_run  = None 
         self.run_id = None
         
@@ -107,30 +136,69 @@ class SimulationSetup:
         self.solution_info = None
         
         #Get geometry mappings (make sure the exception of those works properly)
+    @property
+    def mapping_store(self):
+        
+        if self._mapping_store is None or isinstance(self._mapping_store, (str, os.PathLike)):
+            directory = self._mapping_store
+            self._mapping_store = GeometryMappingStore(directory)
+        return self._mapping_store or None
+    
+    @mapping_store.setter
+    def mapping_store(self, mapping_store):
+        
+        self._mapping_store = mapping_store if mapping_store is not None else False
+    
+    def get_mapping_index(self, project_id, geometry_id):
+        
+        '''
+        Return the index of all the geometry mappings of a geometry, fetched 
+        once (page by page) and then reused for every entity lookup.
+        
+        The index is read from and saved to the persistent mapping_store, 
+        so a geometry that was used before needs no API call at all.
+        '''
+        if geometry_id not in self.mapping_indexes:
+            mapping_store = self.mapping_store
+            index = mapping_store.get(geometry_id) if mapping_store is not None else None
+            if index is None:
+                index = GeometryMappingIndex.fetch(self.geometry_api, project_id, geometry_id)
+                if mapping_store is not None:
+                    mapping_store.put(index, project_id)
+            index.api_client = self.api_client
+            self.mapping_indexes[geometry_id] = index
+        return self.mapping_indexes[geometry_id]
+    
+    def _get_geometry_mappings(self, project_id, geometry_id, **kwargs):
+        
+        if self.use_mapping_index:
+            return self.get_mapping_index(project_id, geometry_id).mappings(**kwargs)
+        return self.geometry_api.get_geometry_mappings(project_id, geometry_id, **kwargs)._embedded
+    
     def get_single_entity_name(self, project_id, geometry_id, key ,**kwargs):
         
-        entity = self.geometry_api.get_geometry_mappings(project_id, geometry_id, **kwargs)._embedded
+        entity = self._get_geometry_mappings(project_id, geometry_id, **kwargs)
         if len(entity) == 1:
             # print(entity[0].name)
             self.single_entity[key] = entity[0].name
             return self.single_entity[key]
         else:
-            raise Exception(f"Found {len(self.single_entity[key])} entities instead of 1: {self.single_entity[key]}")
+            raise Exception(f"Found {len(entity)} entities instead of 1: {[e.name for e in entity]}")
 
     def get_entity_names(self, project_id, geometry_id, key, number = None ,**kwargs):
         
-        entities = self.geometry_api.get_geometry_mappings(project_id, geometry_id, **kwargs)._embedded
+        entities = self._get_geometry_mappings(project_id, geometry_id, **kwargs)
     
         if number is None or len(entities) == number:
             # print(len(entities))
             self.multiple_entities[key] = entities[0].name
             return [self.multiple_entities[key] for e in entities]
         else:
-            raise Exception(f"Found {len(self.multiple_entities[key])} entities instead of {number}: {self.multiple_entities[key]}")
+            raise Exception(f"Found {len(entities)} entities instead of {number}: {[e.name for e in entities]}")
     
     def get_entity_names_BCA(self, project_id, geometry_id, number = None ,**kwargs):
         
-        entities = self.geometry_api.get_geometry_mappings(project_id, geometry_id, **kwargs)._embedded
+        entities = self._get_geometry_mappings(project_id, geometry_id, **kwargs)
         return entities
         
         #if number is None or len(entities) == number:
@@ -753,37 +821,101 @@ class SimulationSetup:
                     
     def set_single_geometry_primitive_point(self, name, pos_x, pos_y, pos_z):
         
+        key = self.primitive_cache.key(self.project_id, name, pos_x, pos_y, pos_z) if self.primitive_cache is not None else None
+        self.geometry_primitive_uuid = self.primitive_cache.get(key) if key is not None else None
+        
+        if self.geometry_primitive_uuid is None:
+            self.geometry_primitive_uuid = self._create_geometry_primitive_point(name, pos_x, pos_y, pos_z)
+            if key is not None:
+                self.primitive_cache.put(key, self.geometry_primitive_uuid)
+        
+        print(f"geometry_primitive_uuid: {self.geometry_primitive_uuid}")
+    
+    def _create_geometry_primitive_point(self, name, pos_x, pos_y, pos_z):
+        
         geometry_primitive_point = sim_sdk.Point(
             name= name,
             center=sim_sdk.DimensionalVectorLength(value=sim_sdk.DecimalVector(x=pos_x, y=pos_y, z=pos_z), unit="m"),
         )
-        self.geometry_primitive_uuid = self.simulation_api.create_geometry_primitive(
+        return self.simulation_api.create_geometry_primitive(
             self.project_id, geometry_primitive_point).geometry_primitive_id
+    
+    @staticmethod
+    def read_probe_points(path_to_csv):
         
-        print(f"geometry_primitive_uuid: {self.geometry_primitive_uuid}")
+        '''
+        Read a probe point file in one pass, without pandas.
+        
+        csv format: Label X Y Z (delimiter is one or more spaces, first 
+        line is the header)
+
+        Raises
+        ------
+        ValueError
+            Listing every malformed row if the file does not validate.
+
+        Returns
+        -------
+        points : list
+            (label, x, y, z) tuples in file order.
+
+        '''
+        points = []
+        errors = []
+        with open(path_to_csv, newline = '') as file:
+            reader = csv.reader(file, delimiter = ' ', skipinitialspace = True)
+            header = [value for value in next(reader, []) if value]
+            #Use the header to find the columns, fall back to Label X Y Z order
+            columns = [header.index(c) if c in header else i for i, c in enumerate(("Label", "X", "Y", "Z"))]
+            for line_number, row in enumerate(reader, start = 2):
+                row = [value for value in row if value]
+                if not row:
+                    continue
+                if len(row) != len(header):
+                    errors.append(f"line {line_number}: expected {len(header)} columns, got {len(row)}")
+                    continue
+                label, x, y, z = (row[i] for i in columns)
+                try:
+                    points.append((label, float(x), float(y), float(z)))
+                except ValueError:
+                    errors.append(f"line {line_number}: coordinates are not numbers: {[x, y, z]}")
+        
+        if errors:
+            raise ValueError(f"{len(errors)} invalid rows in {path_to_csv}:\n" + "\n".join(errors[:20]))
+        return points
     
-    def set_multiple_geometry_primitive_points(self, path_to_csv):
+    def set_multiple_geometry_primitive_points(self, path_to_csv, max_workers = 8):
         
-        #csv format: Label X Y Z (delimiter is a space)
+        '''
+        Create a geometry primitive point for every row of a probe point 
+        file, see read_probe_points for the format.
         
-        probe_pd = pd.read_csv( path_to_csv , header = 0, delimiter = ' ') 
-        probe_pd.set_index("Label")
-        for row in probe_pd.index:
-            pos_x = probe_pd['X'][row]
-            pos_y = probe_pd['Y'][row]
-            pos_z = probe_pd['Z'][row]
-            print(pos_x)
-            print(pos_y)
-            print(pos_z)
+        Points already created with the same name and coordinates are taken 
+        from the primitive_cache, the others are created concurrently by 
+        max_workers threads. The UUIDs are appended to 
+        geometry_primitive_uuid_list in file order.
+        '''
+        points = [("point{}".format(row), pos_x, pos_y, pos_z)
+                  for row, (label, pos_x, pos_y, pos_z) in enumerate(self.read_probe_points(path_to_csv))]
         
-            geometry_primitive_point = sim_sdk.Point(
-                name= "point{}".format(row),
-                center=sim_sdk.DimensionalVectorLength(value=sim_sdk.DecimalVector(x=float(pos_x), y=float(pos_y), z=float(pos_z)), unit="m"),
-            )
-            self.geometry_primitive_uuid_list.append(self.simulation_api.create_geometry_primitive(
-                self.project_id, geometry_primitive_point).geometry_primitive_id)
-            
-        print(f"geometry_primitive_uuid: {self.geometry_primitive_uuid}")
+        #Reuse the points created before with the same name and coordinates
+        uuids = [None] * len(points)
+        keys = [None] * len(points)
+        if self.primitive_cache is not None:
+            keys = [self.primitive_cache.key(self.project_id, *point) for point in points]
+            uuids = [self.primitive_cache.get(key) for key in keys]
+        missing = [i for i, uuid in enumerate(uuids) if uuid is None]
+        
+        with ThreadPoolExecutor(max_workers = max_workers) as executor:
+            created = list(executor.map(lambda i: self._create_geometry_primitive_point(*points[i]), missing))
+        
+        for i, uuid in zip(missing, created):
+            uuids[i] = uuid
+        if self.primitive_cache is not None:
+            self.primitive_cache.put_many({keys[i]: uuid for i, uuid in zip(missing, created)})
+        
+        self.geometry_primitive_uuid_list.extend(uuids)
+        print(f"Created {len(missing)} geometry primitive points, reused {len(points) - len(missing)}")
         
         
     def set_field_calculations(self):
@@ -837,11 +969,66 @@ class SimulationSetup:
                                                       geometry_id=self.geometry_id, 
                                                       model=self.model)
         
-    def create_simulation(self):
+    def create_simulation(self, simulation_spec = None, reuse = False, fingerprint_extra = None):
+        
+        '''
+        Create the simulation from the simulation spec.
+        
+        Parameters
+        ----------
+        simulation_spec : SimulationSpec, optional
+            A spec derived from a SpecTemplate, used instead of the one 
+            built by set_simulation_spec.
+            
+        reuse : boolean, optional
+            If True and a simulation with an identical spec (same geometry, 
+            materials, boundary conditions and controls, the name is 
+            ignored) was created in this project before, that simulation 
+            is reused, together with its mesh if it has one. The mesh 
+            layer, advanced and refinement settings set so far must match 
+            as well. The default is False, a new simulation is always 
+            created.
+            
+        fingerprint_extra : object, optional
+            Anything else that must match for a simulation to be reused, 
+            e.g. the mesh fineness.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if simulation_spec is not None:
+            self.simulation_spec = simulation_spec
+        
+        mesh_settings = {"automatic_layer_settings": self.automatic_layer_settings,
+                         "advanced_mesh_settings": self.advanced_mesh_settings,
+                         "mesh_refinement": self.mesh_refinement,
+                         "extra": fingerprint_extra}
+        self.spec_fingerprint = spec_fingerprint(self.simulation_spec, self.api_client, extra = mesh_settings)
+        self.reused_simulation = False
+        
+        if reuse:
+            simulation_id = self.simulation_index.get(self.project_id, self.spec_fingerprint)
+            if simulation_id is not None:
+                try:
+                    existing_spec = self.simulation_api.get_simulation(self.project_id, simulation_id)
+                    self.simulation_id = simulation_id
+                    self.mesh_id = existing_spec.mesh_id
+                    self.reused_simulation = True
+                    print(f"Identical simulation already exists, reusing simulation_id: {self.simulation_id}")
+                    return
+                except ApiException as ae:
+                    if ae.status != 404:
+                        raise ae
+                    self.simulation_index.discard(self.project_id, self.spec_fingerprint)
+        
         self.simulation_id = self.simulation_api.create_simulation(
             self.project_id, 
             self.simulation_spec).simulation_id
         print(f"simulation_id: {self.simulation_id}")
+        self.resolver.add(("simulations", self.project_id), self.simulation_spec.name, self.simulation_id)
+        self.simulation_index.put(self.project_id, self.spec_fingerprint, self.simulation_id, self.simulation_spec.name)
     
     def reset_simulation_spec_components(self):
         
@@ -880,26 +1067,87 @@ class SimulationSetup:
                                     gap_elements = gap_ref_factor, global_gradation_rate = gradation_rate)
     
     
-    def complete_mesh_settings(self, mesh_name ,fineness = 5, physics_based_meshing = True):
-        # Start of mesh operation
+    def complete_mesh_settings(self, mesh_name ,fineness = 5, physics_based_meshing = True, reuse = False):
+        
+        '''
+        Create the mesh operation from the mesh settings.
+        
+        If reuse is True and a finished mesh of the same geometry with 
+        identical fineness, layer, advanced and refinement settings is in 
+        the mesh_cache, no mesh operation is created: the cached mesh_id is 
+        attached to the simulation by start_meshing_operation instead. By 
+        default a new mesh operation is always created.
+        
+        With physics based meshing the mesh also depends on the simulation 
+        setup, so the boundary condition and material assignments are part 
+        of the cache key; boundary condition values are not, so a warning 
+        is printed when such a mesh is reused.
+        '''
+        model = sim_sdk.SimmetrixMeshingFluid(
+                    physics_based_meshing= physics_based_meshing, hex_core = True, 
+                    sizing=AutomaticMeshSizingSimmetrix(type="AUTOMATIC_V9",fineness= fineness),
+                    refinements = self.mesh_refinement,
+                    automatic_layer_settings= self.automatic_layer_settings,
+                    advanced_simmetrix_settings = self.advanced_mesh_settings
+                 )
+        
+        physics = self._physics_signature() if physics_based_meshing else None
+        self.mesh_cache_key = self.mesh_cache.key(self.project_id, self.geometry_id, model, self.api_client, physics)
+        self.reused_mesh = False
+        
+        if reuse:
+            entry = self.mesh_cache.entry(self.mesh_cache_key)
+            mesh_id = entry["mesh_id"] if entry and self._cached_mesh_finished(entry) else None
+            if entry and mesh_id is None:
+                print("The cached mesh was deleted or did not finish, meshing again")
+                self.mesh_cache.discard(self.mesh_cache_key)
+            if mesh_id is not None:
+                self.mesh_id = mesh_id
+                self.mesh_operation = None
+                self.mesh_operation_id = None
+                self.reused_mesh = True
+                print(f"Identical mesh settings already meshed, reusing mesh_id: {mesh_id}")
+                if physics_based_meshing:
+                    print("Warning: physics based meshing is on, the reused mesh was refined for the "
+                          "boundary condition values of the simulation it was first made for")
+                return
         
+        # Start of mesh operation
         self.mesh_operation = self.mesh_operation_api.create_mesh_operation(
             self.project_id,
             sim_sdk.MeshOperation(
                 name= mesh_name,
                 geometry_id= self.geometry_id,
-                model= sim_sdk.SimmetrixMeshingFluid(
-                    physics_based_meshing= physics_based_meshing, hex_core = True, 
-                    sizing=AutomaticMeshSizingSimmetrix(type="AUTOMATIC_V9",fineness= fineness),
-                    refinements = self.mesh_refinement,
-                    automatic_layer_settings= self.automatic_layer_settings,
-                    advanced_simmetrix_settings = self.advanced_mesh_settings
-                 ),
+                model= model,
                 ),
             )
         
         self.mesh_operation_id = self.mesh_operation.mesh_operation_id
         self.mesh_operation_api.update_mesh_operation( self.project_id, self.mesh_operation_id, self.mesh_operation)
+    
+    def _cached_mesh_finished(self, entry):
+        
+        #The cached mesh may have been deleted or its operation failed since
+        if entry.get("mesh_operation_id") is None:
+            return False
+        try:
+            mesh_operation = self.mesh_operation_api.get_mesh_operation(self.project_id, entry["mesh_operation_id"])
+        except ApiException as ae:
+            if ae.status == 404:
+                return False
+            raise ae
+        return mesh_operation.status == "FINISHED" and mesh_operation.mesh_id == entry["mesh_id"]
+    
+    def _physics_signature(self):
+        
+        #Boundary condition types and assignments, without their values
+        def _entities(item):
+            reference = getattr(item, "topological_reference", None)
+            return sorted(reference.entities or []) if reference is not None else []
+        
+        return {"boundary_conditions": sorted([type(bc).__name__, _entities(bc)] for bc in self.boundary_conditions),
+                "solids": sorted(_entities(m) for m in self.solid_material),
+                "fluids": sorted(_entities(m) for m in self.fluid_material)}
 
     def set_local_element_size_refinement(self, element_size ,name = '',  key_list = []):
         #for later: add a method to add multiple entity selections automatically using get_entities
@@ -921,7 +1169,30 @@ class SimulationSetup:
             			),
             		))
         
-    def estimate_mesh_operation(self):
+    def estimate_mesh_operation(self, maximum_cpu_consumption_limit = 150):
+        
+        '''
+        Estimate the mesh operation and set the expected and maximum 
+        runtime used when waiting for it.
+
+        Parameters
+        ----------
+        maximum_cpu_consumption_limit : float, optional
+            Raise if the expected core hours are above this limit. None 
+            disables the check, e.g. when a BudgetScheduler decides.
+
+        Returns
+        -------
+        mesh_estimation : Estimation
+            The estimation of the API, or None if the mesh is reused or no 
+            estimation is available.
+
+        '''
+        self.mesh_estimation = None
+        if self.reused_mesh:
+            print("Mesh reused, no mesh operation to estimate")
+            self.mesh_max_runtime = 0
+            return None
         
         # Estimate Mesh operation
         try:
@@ -945,10 +1216,13 @@ class SimulationSetup:
                                                                avg   =  mesh_estimation.duration.value.replace('PT','')))          
             print("*"*10)
             
-            if mesh_estimation.compute_resource is not None and mesh_estimation.compute_resource.value > 150.0:
+            self.mesh_estimation = mesh_estimation
+            if (maximum_cpu_consumption_limit is not None and mesh_estimation.compute_resource is not None 
+                    and mesh_estimation.compute_resource.value > maximum_cpu_consumption_limit):
                 raise Exception("Too expensive", mesh_estimation)
         
             if mesh_estimation.duration is not None:
+                self.mesh_expected_runtime = isodate.parse_duration(mesh_estimation.duration.value).total_seconds()
                 self.mesh_max_runtime = isodate.parse_duration(mesh_estimation.duration.interval_max).total_seconds()
                 self.mesh_max_runtime = max(3600, self.mesh_max_runtime * 2)
             else:
@@ -960,49 +1234,182 @@ class SimulationSetup:
                 print(f"Mesh operation estimation not available, assuming max runtime of {self.mesh_max_runtime} seconds")
             else:
                 raise ae
+        return self.mesh_estimation
                 
-    def check_simulation_and_mesh_settings(self):
-        
-        mesh_check = self.mesh_operation_api.check_mesh_operation_setup(self.project_id, self.mesh_operation_id, simulation_id= self.simulation_id)
-        warnings = [entry for entry in mesh_check.entries if entry.severity == "WARNING"]
-        if warnings: 
-            # print(f"Meshing check warnings: {warnings}")
-            print("Meshing check warning: {}\n".format(warnings[0].message))
-        if len(warnings) > 1 :
-            print("*"*10)
-            # print(warnings[1].message)
-            print("\nSimulation setup check warnings: {}".format(warnings[1].message))
+    def check_simulation_and_mesh_settings(self, raise_on_error = True):
+        
+        '''
+        Check the mesh operation and simulation setup and print the 
+        warnings.
+
+        Parameters
+        ----------
+        raise_on_error : boolean, optional
+            Raise if the check reports errors. If False the errors are 
+            left to the caller, e.g. a Preflight report.
+
+        Returns
+        -------
+        mesh_check : LogEntries
+            The check result of the API. With a reused mesh only the 
+            simulation setup is checked.
+
+        '''
+        if self.reused_mesh:
+            #Only the mesh operation is not checked, the simulation setup still is
+            print("Mesh reused, skipping the mesh operation setup check")
+            mesh_check = self.simulation_api.check_simulation_setup(self.project_id, self.simulation_id)
+            for warning in [entry for entry in mesh_check.entries if entry.severity == "WARNING"]:
+                print("Simulation setup check warning: {}\n".format(warning.message))
+        else:
+            mesh_check = self.mesh_operation_api.check_mesh_operation_setup(self.project_id, self.mesh_operation_id, simulation_id= self.simulation_id)
+            warnings = [entry for entry in mesh_check.entries if entry.severity == "WARNING"]
+            if warnings: 
+                # print(f"Meshing check warnings: {warnings}")
+                print("Meshing check warning: {}\n".format(warnings[0].message))
+            if len(warnings) > 1 :
+                print("*"*10)
+                # print(warnings[1].message)
+                print("\nSimulation setup check warnings: {}".format(warnings[1].message))
         errors = [entry for entry in mesh_check.entries if entry.severity == "ERROR"]
-        if errors:
+        if errors and raise_on_error:
             raise Exception("Simulation check failed", mesh_check)
+        return mesh_check
 
     def start_meshing_operation(self, run_state = False):
-        #for later: Figure out how to run the mesh operations in parallel without having to wait for each one to finish
-        # The problem is related with retreiving the mesh id. It is possible that it is only attainable after the mesh operation is completed - investiagte...
         
-        if run_state :
-            self.mesh_operation_api.start_mesh_operation(self.project_id, self.mesh_operation_id, simulation_id= self.simulation_id)
+        '''
+        Start the mesh operation of this setup.
+        
+        Parameters
+        ----------
+        run_state : boolean
+        
+            if True - the mesh operation is started and the method returns 
+            straight away, the mesh_id is NOT attached to the simulation. Use 
+            start_meshing_operation_async() if the mesh_id should be attached 
+            once the mesh finishes without blocking.
+            
+            if False - wait until the mesh operation is finished and attach 
+            the resulting mesh_id to the simulation spec.
+
+        Returns
+        -------
+        None.
+
+        '''
+        
+        if self.reused_mesh:
+            self.attach_mesh_to_simulation()
+            return
         
-        else: 
+        self.mesh_operation_api.start_mesh_operation(self.project_id, self.mesh_operation_id, simulation_id= self.simulation_id)
+        
+        if not run_state:
+            self.wait_for_mesh_operation()
+            self.attach_mesh_to_simulation()
             
-            self.mesh_operation_api.start_mesh_operation(self.project_id, self.mesh_operation_id, simulation_id= self.simulation_id)            
-            # Wait until the meshing operation is complete
-            self.mesh_operation = self.mesh_operation_api.get_mesh_operation(self.project_id, self.mesh_operation_id)
-            mesh_operation_start = time.time()
-            while self.mesh_operation.status not in ("FINISHED", "CANCELED", "FAILED"):
-                if time.time() > mesh_operation_start + self.mesh_max_runtime:
-                    raise TimeoutError()
-                time.sleep(30)
-                self.mesh_operation = self.mesh_operation_api.get_mesh_operation(self.project_id, self.mesh_operation_id)
-                print(f"Meshing run status: {self.mesh_operation.status} - {self.mesh_operation.progress}")
+    def start_meshing_operation_async(self, executor = None):
+        
+        '''
+        Start the mesh operation and return straight away with a future that 
+        resolves to the mesh_id once the mesh has finished and been attached 
+        to the simulation spec.
+        
+        The mesh operation is submitted to SimScale immediately, only the 
+        waiting and the simulation spec update happen in the background, so 
+        many setups can mesh at the same time.
+
+        Parameters
+        ----------
+        executor : concurrent.futures.Executor, optional
+            The executor used for waiting on the mesh operation. If None, a 
+            single use thread is started for this mesh operation.
+
+        Returns
+        -------
+        future : concurrent.futures.Future
+            Resolves to the mesh_id, or raises if the mesh operation failed, 
+            was canceled or timed out.
+
+        '''
+        
+        #A reused mesh only needs to be attached to the simulation
+        if not self.reused_mesh:
+            self.mesh_operation_api.start_mesh_operation(self.project_id, self.mesh_operation_id, simulation_id= self.simulation_id)
+        
+        if executor is None:
+            future = Future()
             
-            self.mesh_operation = self.mesh_operation_api.get_mesh_operation(self.project_id, self.mesh_operation_id)
-            # print(f"final mesh_operation: {self.mesh_operation}")
+            def _run():
+                if not future.set_running_or_notify_cancel():
+                    return
+                try:
+                    future.set_result(self._finish_meshing_operation())
+                except BaseException as e:
+                    future.set_exception(e)
             
-            # Get the simulation spec and update it with mesh_id from the previous mesh operation
-            self.simulation_spec = self.simulation_api.get_simulation(self.project_id, self.simulation_id)
-            self.simulation_spec.mesh_id = self.mesh_operation.mesh_id
-            self.simulation_api.update_simulation(self.project_id, self.simulation_id, self.simulation_spec)
+            threading.Thread(target = _run, daemon = True).start()
+            return future
+        
+        return executor.submit(self._finish_meshing_operation)
+    
+    def _finish_meshing_operation(self):
+        
+        if not self.reused_mesh:
+            self.wait_for_mesh_operation()
+        self.attach_mesh_to_simulation()
+        return self.mesh_id
+    
+    def wait_for_mesh_operation(self, cancel_event = None):
+        
+        '''
+        Block until the mesh operation reaches a terminal state, polling 
+        adaptively based on the estimated duration and reported progress.
+
+        Raises
+        ------
+        TimeoutError
+            If the mesh operation takes longer than mesh_max_runtime.
+        PollCancelled
+            If cancel_event is set while waiting.
+        Exception
+            If the mesh operation failed or was canceled.
+
+        Returns
+        -------
+        None.
+
+        '''
+        
+        mesh_max_runtime = self.mesh_max_runtime if self.mesh_max_runtime is not None else 36000
+        
+        self.mesh_operation = self.poller.wait(
+            lambda: self.mesh_operation_api.get_mesh_operation(self.project_id, self.mesh_operation_id),
+            expected_duration = self.mesh_expected_runtime, timeout = mesh_max_runtime,
+            cancel_event = cancel_event,
+            on_poll = lambda mesh: print(f"Meshing run status: {mesh.status} - {mesh.progress}"))
+        
+        if self.mesh_operation.status != "FINISHED":
+            raise Exception(f"Mesh operation {self.mesh_operation_id} ended with status {self.mesh_operation.status}")
+        
+        self.mesh_id = self.mesh_operation.mesh_id
+        if self.mesh_cache_key is not None:
+            self.mesh_cache.put(self.mesh_cache_key, self.mesh_id, self.mesh_operation_id)
+        
+    def attach_mesh_to_simulation(self, mesh_id = None):
+        
+        '''
+        Get the simulation spec and update it with the given mesh_id, or the 
+        mesh_id of the finished mesh operation if none is given.
+        '''
+        
+        if mesh_id is not None:
+            self.mesh_id = mesh_id
+        
+        self.simulation_spec = self.simulation_api.get_simulation(self.project_id, self.simulation_id)
+        self.simulation_spec.mesh_id = self.mesh_id
+        self.simulation_api.update_simulation(self.project_id, self.simulation_id, self.simulation_spec)
 
 
     
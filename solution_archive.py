@@ -0,0 +1,481 @@
+import array
+import collections
+import gzip
+import io
+import re
+import sys
+import threading
+import zipfile
+
+try:
+    import numpy as np
+except ImportError:
+    #Rhino's Python may not have NumPy, fields are then plain lists
+    np = None
+
+#Number of components of the OpenFOAM value types
+COMPONENTS = {"scalar": 1, "label": 1, "vector": 3, "sphericalTensor": 1, "symmTensor": 6, "tensor": 9}
+
+_WORD = re.compile(rb'[^\s{}()\[\];]+')
+_CONTENT_RANGE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+class HttpRangeFile(io.RawIOBase):
+    def __init__(self, rest_client, url, headers = None, block_size = 1024 * 1024, cache_blocks = 32):
+        '''
+        Read only, seekable file over an HTTP url, reading only the byte
+        ranges asked for.
+
+        Small reads (e.g. zipfile reading the central directory and local
+        headers) are served from cached blocks of block_size, large reads
+        are requested as one range.
+
+        Parameters
+        ----------
+        rest_client : object
+            The SDK rest client, api_client.rest_client.
+
+        url : str
+            The download url of the file.
+
+        headers : dict, optional
+            Headers sent with every request, e.g. the API key.
+
+        '''
+        self.rest_client = rest_client
+        self.url = url
+        self.headers = dict(headers or {})
+        self.block_size = block_size
+        self.cache_blocks = cache_blocks
+        self.position = 0
+        self.requests = 0
+        self.bytes_fetched = 0
+        self._blocks = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.size = self._fetch_size()
+
+    def _get(self, start, end):
+
+        headers = dict(self.headers)
+        headers.update({"Range": f"bytes={start}-{end}", "accept-encoding": "identity"})
+        response = self.rest_client.GET(url = self.url, headers = headers, _preload_content = False)
+        try:
+            if response.status != 206:
+                raise Exception("Server does not support range requests", self.url)
+            data = response.data
+        finally:
+            response.release_conn()
+        self.requests += 1
+        self.bytes_fetched += len(data)
+        return response, data
+
+    def _fetch_size(self):
+
+        #A one byte range instead of HEAD, pre-signed urls are only valid for GET
+        response, _ = self._get(0, 0)
+        match = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+        if match is None or match.group(3) == "*":
+            raise Exception("Size of the remote file is unknown", self.url)
+        return int(match.group(3))
+
+    def _block(self, index):
+
+        with self._lock:
+            block = self._blocks.get(index)
+            if block is not None:
+                self._blocks.move_to_end(index)
+                return block
+        start = index * self.block_size
+        _, block = self._get(start, min(start + self.block_size, self.size) - 1)
+        with self._lock:
+            self._blocks[index] = block
+            while len(self._blocks) > self.cache_blocks:
+                self._blocks.popitem(last = False)
+        return block
+
+    def _read_range(self, start, size):
+
+        if size >= self.block_size:
+            return self._get(start, start + size - 1)[1]
+        index, offset = divmod(start, self.block_size)
+        data = self._block(index)[offset:offset + size]
+        if len(data) < size and (index + 1) * self.block_size < self.size:
+            data += self._block(index + 1)[:size - len(data)]
+        return data
+
+    def readable(self):
+
+        return True
+
+    def seekable(self):
+
+        return True
+
+    def tell(self):
+
+        return self.position
+
+    def seek(self, offset, whence = io.SEEK_SET):
+
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self.position = max(0, offset)
+        return self.position
+
+    def readinto(self, buffer):
+
+        size = min(len(buffer), self.size - self.position)
+        if size <= 0:
+            return 0
+        data = self._read_range(self.position, size)
+        buffer[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+def _number(token):
+
+    try:
+        return int(token)
+    except ValueError:
+        try:
+            return float(token)
+        except ValueError:
+            return token
+
+def _values(numbers, count, ncomp):
+
+    #Flat numbers to a (count, ncomp) array, or a list (of tuples) without NumPy
+    if np is not None:
+        values = np.asarray(numbers, dtype = float) if not isinstance(numbers, np.ndarray) else numbers
+        return values.reshape(count, ncomp) if ncomp > 1 else values
+    numbers = list(numbers)
+    if ncomp == 1:
+        return numbers
+    return [tuple(numbers[i:i + ncomp]) for i in range(0, count * ncomp, ncomp)]
+
+class _FoamParser:
+    def __init__(self, data):
+
+        self.data = data
+        self.pos = 0
+        self.binary = False
+        self.label_size = 4
+        self.scalar_size = 8
+        self.byte_order = "<"
+
+    def _configure(self, header):
+
+        #The FoamFile header says how the field lists are written
+        if not isinstance(header, dict):
+            return
+        self.binary = header.get("format") == "binary"
+        arch = str(header.get("arch", "")).strip('"')
+        self.byte_order = ">" if "MSB" in arch else "<"
+        match = re.search(r"label=(\d+)", arch)
+        if match:
+            self.label_size = int(match.group(1)) // 8
+        match = re.search(r"scalar=(\d+)", arch)
+        if match:
+            self.scalar_size = int(match.group(1)) // 8
+
+    def _skip(self):
+
+        data, n = self.data, len(self.data)
+        while self.pos < n:
+            if data[self.pos] in b" \t\r\n":
+                self.pos += 1
+            elif data.startswith(b"//", self.pos):
+                end = data.find(b"\n", self.pos)
+                self.pos = n if end < 0 else end + 1
+            elif data.startswith(b"/*", self.pos):
+                end = data.find(b"*/", self.pos + 2)
+                self.pos = n if end < 0 else end + 2
+            else:
+                break
+
+    def _peek(self):
+
+        self._skip()
+        return self.data[self.pos:self.pos + 1]
+
+    def token(self):
+
+        self._skip()
+        if self.pos >= len(self.data):
+            return None
+        c = self.data[self.pos:self.pos + 1]
+        if c in b"{}()[];":
+            self.pos += 1
+            return c.decode()
+        if c == b'"':
+            end = self.data.index(b'"', self.pos + 1)
+            token = self.data[self.pos:end + 1]
+            self.pos = end + 1
+            return token.decode()
+        match = _WORD.match(self.data, self.pos)
+        self.pos = match.end()
+        return match.group().decode()
+
+    def parse_dict(self):
+
+        result = {}
+        while True:
+            token = self.token()
+            if token is None or token == "}":
+                return result
+            if token == ";":
+                continue
+            if self._peek() == b"{":
+                self.pos += 1
+                result[token] = self.parse_dict()
+            else:
+                result[token] = self.parse_value()
+            if token == "FoamFile":
+                self._configure(result[token])
+
+    def parse_value(self):
+
+        items = []
+        while True:
+            token = self.token()
+            if token is None or token == ";":
+                break
+            if token == "}":
+                self.pos -= 1
+                break
+            if token in ("(", "["):
+                items.append(self.parse_list(")" if token == "(" else "]"))
+            elif token.startswith("List<"):
+                items.append(self.parse_field_list(token[5:-1]))
+            else:
+                items.append(_number(token))
+        return items[0] if len(items) == 1 else items
+
+    def parse_list(self, close):
+
+        items = []
+        while True:
+            token = self.token()
+            if token is None or token == close:
+                return items
+            if token in ("(", "["):
+                items.append(self.parse_list(")" if token == "(" else "]"))
+            elif token == "{":
+                items.append(self.parse_dict())
+            elif token != ";":
+                items.append(_number(token))
+
+    def parse_field_list(self, value_type):
+
+        count = int(self.token())
+        ncomp = COMPONENTS.get(value_type, 1)
+        opening = self.token()
+
+        if opening == "{":
+            #count{value}, the same value for every item
+            value = self.parse_value()
+            self.token()
+            value = value if isinstance(value, list) else [value]
+            return _values(value * count, count, ncomp)
+
+        data = self.data
+        if self.binary and count:
+            size = self.label_size if value_type == "label" else self.scalar_size
+            kind = {4: "i", 8: "q"}[size] if value_type == "label" else {4: "f", 8: "d"}[size]
+            nbytes = count * ncomp * size
+            raw = data[self.pos:self.pos + nbytes]
+            self.pos += nbytes
+            self.token()
+            if np is not None:
+                numbers = np.frombuffer(raw, dtype = np.dtype(self.byte_order + kind))
+                return _values(numbers.astype(float), count, ncomp)
+            numbers = array.array(kind, raw)
+            if (self.byte_order == ">") != (sys.byteorder == "big"):
+                numbers.byteswap()
+            return _values(numbers, count, ncomp)
+
+        #ASCII: the list ends at the first ')' after the count value tuples
+        end = self.pos
+        if ncomp > 1:
+            for _ in range(count):
+                end = data.index(b")", end) + 1
+        end = data.index(b")", end)
+        text = data[self.pos:end]
+        self.pos = end + 1
+        if ncomp > 1:
+            text = text.replace(b"(", b" ").replace(b")", b" ")
+        tokens = text.split()
+        if np is not None:
+            return _values(np.array(tokens, dtype = float), count, ncomp)
+        return _values([float(token) for token in tokens], count, ncomp)
+
+class FoamField:
+    def __init__(self, name, field_class, dimensions, internal_field, boundary_field, uniform = False):
+        '''
+        An OpenFOAM field file.
+
+        internal_field holds one value per cell (an array, or a list
+        without NumPy; vectors and tensors as rows of components), or a
+        single value if the field is uniform. boundary_field is the
+        dictionary of the patches with their type and values.
+        '''
+        self.name = name
+        self.field_class = field_class
+        self.dimensions = dimensions
+        self.internal_field = internal_field
+        self.boundary_field = boundary_field
+        self.uniform = uniform
+
+    def __repr__(self):
+
+        return f"FoamField({self.name!r}, {self.field_class!r})"
+
+def parse_foam_field(data, name = None):
+    '''
+    Parse the content of an ASCII or binary OpenFOAM field file.
+    '''
+    content = _FoamParser(data).parse_dict()
+    header = content.get("FoamFile", {})
+
+    internal_field = content.get("internalField")
+    uniform = False
+    if isinstance(internal_field, list) and internal_field and internal_field[0] in ("uniform", "nonuniform"):
+        uniform = internal_field[0] == "uniform"
+        internal_field = internal_field[1]
+
+    return FoamField(name or str(header.get("object", "")).strip('"'), header.get("class"),
+                     content.get("dimensions"), internal_field, content.get("boundaryField", {}), uniform)
+
+#Case directories whose numeric sub directories are not solution times
+NON_TIME_DIRS = ("postProcessing", "constant", "system")
+
+def _is_time(name):
+
+    try:
+        float(name)
+        return True
+    except ValueError:
+        return False
+
+def _case_root(names):
+
+    #A single top level directory holding the whole case, e.g. "case/0/U"
+    tops = {name.split("/")[0] for name in names}
+    if len(tops) != 1 or not all("/" in name for name in names):
+        return None
+    top = tops.pop()
+    if _is_time(top) or top.startswith("processor") or top in NON_TIME_DIRS:
+        return None
+    return top
+
+class SolutionArchive:
+    def __init__(self, file):
+        '''
+        Read single fields of a SOLUTION archive without extracting it.
+
+        The central directory of the ZIP is read once and indexed by time
+        directory and field, a field is only read and parsed when asked
+        for. With a HttpRangeFile the archive does not even have to be
+        downloaded, only the bytes of the directory and of the fields read
+        are transferred.
+
+        Parameters
+        ----------
+        file : str, pathlib.Path or file object
+            The downloaded archive, or a HttpRangeFile of its url.
+
+        '''
+        self.file = file
+        self.zip = zipfile.ZipFile(file)
+        #time -> field -> ZipInfo, fields of regions and processors as "<region>/<field>"
+        self.index = {}
+
+        infos = [info for info in self.zip.infolist() if not info.is_dir()]
+        self.case_root = _case_root([info.filename.strip("/") for info in infos])
+
+        for info in infos:
+            parts = info.filename.strip("/").split("/")
+            if self.case_root is not None:
+                parts = parts[1:]
+            #Time directories are only at the case root or directly in a processor directory,
+            #numeric directories of e.g. postProcessing/probes/100 are not times
+            processor = parts[:1] if parts[0].startswith("processor") else []
+            parts = parts[len(processor):]
+            if len(parts) < 2 or not _is_time(parts[0]):
+                continue
+            time, field = parts[0], parts[1:]
+            if "uniform" in field[:-1]:
+                continue
+            field[-1] = field[-1][:-3] if field[-1].endswith(".gz") else field[-1]
+            self.index.setdefault(time, {})["/".join(processor + field)] = info
+
+    @classmethod
+    def from_url(cls, rest_client, url, headers = None, block_size = 1024 * 1024):
+
+        return cls(HttpRangeFile(rest_client, url, headers, block_size))
+
+    def times(self):
+
+        return sorted(self.index, key = float)
+
+    @property
+    def latest_time(self):
+
+        times = self.times()
+        return times[-1] if times else None
+
+    def fields(self, time = None):
+
+        time = self.latest_time if time is None else self._time(time)
+        return sorted(self.index.get(time, {}))
+
+    def _time(self, time):
+
+        #Accept 100, 100.0 or "100" for the time directory "100"
+        if str(time) in self.index:
+            return str(time)
+        for name in self.index:
+            if float(name) == float(time):
+                return name
+        raise KeyError(f"No time directory {time}, available: {self.times()}")
+
+    def _info(self, field, time):
+
+        time = self.latest_time if time is None else self._time(time)
+        try:
+            return self.index[time][field]
+        except KeyError:
+            raise KeyError(f"No field {field} at time {time}, available: {self.fields(time)}")
+
+    def open(self, field, time = None):
+        '''
+        Return a file object of a field, decompressed if the field was
+        written compressed. The latest time is used if time is None.
+        '''
+        info = self._info(field, time)
+        file = self.zip.open(info)
+        return gzip.GzipFile(fileobj = file) if info.filename.endswith(".gz") else file
+
+    def read_bytes(self, field, time = None):
+
+        with self.open(field, time) as file:
+            return file.read()
+
+    def read_field(self, field, time = None):
+        '''
+        Read and parse a field, see FoamField.
+        '''
+        return parse_foam_field(self.read_bytes(field, time), name = field)
+
+    def close(self):
+
+        self.zip.close()
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *exc):
+
+        self.close()
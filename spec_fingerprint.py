@@ -0,0 +1,68 @@
+import hashlib
+import json
+
+from .local_index import LocalIndex
+
+#Top level fields that do not change the physics of a simulation
+IGNORED_FIELDS = ("name", "mesh_id", "simulation_id", "created_at", "modified_at")
+
+def canonical_spec(simulation_spec, api_client = None):
+    '''
+    Return the spec as plain JSON types, without the fields that do not
+    change the result (name, mesh_id...).
+
+    Parameters
+    ----------
+    simulation_spec : SimulationSpec
+        The spec to serialize.
+
+    api_client : object, optional
+        Used for the same serialization as the API requests. Without it
+        the SDK model's to_dict() is used.
+
+    '''
+    if api_client is not None:
+        data = api_client.sanitize_for_serialization(simulation_spec)
+    else:
+        data = simulation_spec.to_dict()
+    return {key: value for key, value in data.items() if key not in IGNORED_FIELDS and value is not None}
+
+def spec_fingerprint(simulation_spec, api_client = None, extra = None):
+    '''
+    Return a sha256 hex digest identifying the geometry, materials,
+    boundary conditions and controls of a spec.
+
+    extra can hold anything else that must match for a simulation to be
+    reused, e.g. the mesh settings, as SDK models or JSON types.
+    '''
+    data = {"spec": canonical_spec(simulation_spec, api_client)}
+    if extra is not None:
+        data["extra"] = api_client.sanitize_for_serialization(extra) if api_client is not None else extra
+    canonical = json.dumps(data, sort_keys = True, separators = (",", ":"), default = str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class SimulationIndex:
+    def __init__(self, directory = None):
+        '''
+        Local index of the simulations created per spec fingerprint, so an
+        identical spec reuses the existing simulation.
+        '''
+        self.simulations = LocalIndex("simulations", directory)
+
+    @staticmethod
+    def key(project_id, fingerprint):
+
+        return f"{project_id}:{fingerprint}"
+
+    def get(self, project_id, fingerprint):
+
+        entry = self.simulations.get(self.key(project_id, fingerprint))
+        return entry["simulation_id"] if entry else None
+
+    def put(self, project_id, fingerprint, simulation_id, name):
+
+        self.simulations.set(self.key(project_id, fingerprint), {"simulation_id": simulation_id, "name": name})
+
+    def discard(self, project_id, fingerprint):
+
+        self.simulations.pop(self.key(project_id, fingerprint))
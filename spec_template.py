@@ -0,0 +1,148 @@
+import copy
+import re
+
+_TOKEN = re.compile(r"([^.\[\]]+)|\[([^\]]*)\]")
+
+def parse_path(path):
+    '''
+    Split a spec path into steps.
+
+    "model.materials.solids[name=Brick].transport" gives
+    ["model", "materials", "solids", ("name", "Brick"), "transport"], and
+    "model.boundary_conditions[2]" gives [..., "boundary_conditions", 2].
+    '''
+    steps = []
+    for attribute, selector in _TOKEN.findall(path):
+        if attribute:
+            steps.append(attribute)
+        elif "=" in selector:
+            key, value = selector.split("=", 1)
+            steps.append((key.strip(), value.strip()))
+        else:
+            steps.append(int(selector))
+    return steps
+
+def _get(node, step):
+
+    if isinstance(step, int):
+        return node[step]
+    if isinstance(step, tuple):
+        key, value = step
+        for item in node:
+            if str(getattr(item, key, None)) == value:
+                return item
+        raise KeyError(f"No item with {key}={value}")
+    return getattr(node, step)
+
+def _index(node, step):
+
+    #Position of a list step, for writing the copied item back
+    if isinstance(step, int):
+        return step
+    key, value = step
+    for i, item in enumerate(node):
+        if str(getattr(item, key, None)) == value:
+            return i
+    raise KeyError(f"No item with {key}={value}")
+
+def _set(node, step, value):
+
+    if isinstance(step, str):
+        setattr(node, step, value)
+    else:
+        node[_index(node, step)] = value
+
+class SpecTemplate:
+    def __init__(self, simulation_spec):
+        '''
+        A base simulation spec from which variants are derived by patching
+        single values, e.g. a material conductivity or a wall ambient
+        temperature.
+
+        Only the objects on the path to a patched value are copied, every
+        other part of the spec (mesh settings, numerics, untouched
+        materials and boundary conditions...) is shared between the base
+        and all the variants, so deriving many variants is fast and light
+        on memory. Treat derived specs as read-only apart from derive().
+
+        Parameters
+        ----------
+        simulation_spec : SimulationSpec
+            The base spec, e.g. SimulationSetup.simulation_spec after
+            set_simulation_spec().
+
+        '''
+        self.base = simulation_spec
+
+    @classmethod
+    def from_setup(cls, setup):
+
+        return cls(setup.simulation_spec)
+
+    def derive(self, name = None, overrides = None, conductivities = None,
+               ambient_temperatures = None, heat_transfer_coefficients = None):
+        '''
+        Return a new spec with the given values patched in.
+
+        Parameters
+        ----------
+        name : str, optional
+            Name of the derived simulation.
+
+        overrides : dict, optional
+            {path: value} for any value of the spec, see parse_path.
+
+        conductivities : dict, optional
+            {solid material name: thermal conductivity}.
+
+        ambient_temperatures : dict, optional
+            {wall boundary condition name: ambient temperature} of DERIVED
+            external wall heat flux conditions.
+
+        heat_transfer_coefficients : dict, optional
+            {wall boundary condition name: heat transfer coefficient} of
+            DERIVED external wall heat flux conditions.
+
+        Returns
+        -------
+        simulation_spec : SimulationSpec
+
+        '''
+        paths = dict(overrides or {})
+        if name is not None:
+            paths["name"] = name
+        for material, value in (conductivities or {}).items():
+            for path in self.conductivity_paths(material):
+                paths[path] = value
+        for bc, value in (ambient_temperatures or {}).items():
+            paths[f"model.boundary_conditions[name={bc}].temperature.heat_flux.ambient_temperature.value"] = value
+        for bc, value in (heat_transfer_coefficients or {}).items():
+            paths[f"model.boundary_conditions[name={bc}].temperature.heat_flux.heat_transfer_coefficient.value"] = value
+
+        spec = copy.copy(self.base)
+        copied = {id(spec)}
+        for path, value in paths.items():
+            steps = parse_path(path)
+            node = spec
+            for step in steps[:-1]:
+                child = _get(node, step)
+                if id(child) not in copied:
+                    #Copy on write: only the nodes on the path are duplicated
+                    child = list(child) if isinstance(child, list) else copy.copy(child)
+                    copied.add(id(child))
+                    _set(node, step, child)
+                node = child
+            _set(node, steps[-1], value)
+        return spec
+
+    def conductivity_paths(self, material):
+        '''
+        Return the paths of the conductivity values of a solid material,
+        for isotropic and cross plane orthotropic transport.
+        '''
+        base = f"model.materials.solids[name={material}].transport.conductivity"
+        solid = _get(self.base.model.materials.solids, ("name", material))
+        conductivity = solid.transport.conductivity
+        if getattr(conductivity, "in_plane_conductivity", None) is not None:
+            return [base + ".in_plane_conductivity.value.value", base + ".cross_plane_conductivity.value.value"]
+        return [base + ".thermal_conductivity.value.value"]
@@ -0,0 +1,226 @@
+import collections
+import random
+import threading
+import time
+
+TERMINAL_STATES = ("FINISHED", "CANCELED", "FAILED")
+
+class PollCancelled(Exception):
+    pass
+
+class StatusPoller:
+    def __init__(self, min_interval = 2.0, max_interval = 60.0, backoff = 1.5,
+                 jitter = 0.1, remaining_fraction = 0.25, max_latencies = 1000):
+        '''
+        Wait for SimScale jobs (geometry imports, mesh operations, runs,
+        reports) to reach a terminal state, polling adaptively.
+
+        Without an estimate the interval grows exponentially from
+        min_interval to max_interval. With an expected duration (from
+        estimate_mesh_operation/estimate_simulation) or a reported progress
+        the next poll is scheduled after a fraction of the estimated
+        remaining time, so polls get denser close to the expected end.
+
+        Parameters
+        ----------
+        min_interval : float, optional
+            Shortest time between two polls in seconds.
+
+        max_interval : float, optional
+            Longest time between two polls in seconds.
+
+        backoff : float, optional
+            Growth factor of the interval when nothing better is known.
+
+        jitter : float, optional
+            Relative random spread applied to every interval, so many
+            waiting jobs do not poll in lockstep.
+
+        remaining_fraction : float, optional
+            Fraction of the estimated remaining time to wait before the
+            next poll.
+
+        max_latencies : int, optional
+            Number of most recent detection latencies kept for stats().
+
+        '''
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.remaining_fraction = remaining_fraction
+
+        #Cancels the waits of this poller in progress, replaced by cancel()
+        self.cancel_event = threading.Event()
+
+        #Counters
+        self._lock = threading.Lock()
+        self.polls_issued = 0
+        self.waits_completed = 0
+        #Only the most recent ones, the shared default poller lives as long as the process
+        self.detection_latencies = collections.deque(maxlen = max_latencies)
+
+    @staticmethod
+    def _normalise_progress(progress):
+
+        if progress is None:
+            return None
+        try:
+            progress = float(progress)
+        except (TypeError, ValueError):
+            return None
+        #The API reports either a fraction or a percentage
+        if progress > 1.0:
+            progress = progress / 100.0
+        return progress if 0.0 < progress < 1.0 else None
+
+    def next_interval(self, elapsed, poll_count, expected_duration = None, progress = None):
+        '''
+        Return the time in seconds to wait before the next poll.
+        '''
+        remaining = None
+        progress = self._normalise_progress(progress)
+        if progress is not None and elapsed > 0:
+            remaining = elapsed / progress * (1.0 - progress)
+        elif expected_duration:
+            remaining = expected_duration - elapsed
+
+        if remaining is not None and remaining > 0:
+            interval = remaining * self.remaining_fraction
+        else:
+            #No estimate, or past the estimate: back off exponentially
+            interval = self.min_interval * (self.backoff ** poll_count)
+
+        interval = min(self.max_interval, max(self.min_interval, interval))
+        if self.jitter:
+            interval *= random.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+        return interval
+
+    def wait(self, fetch, initial = None, expected_duration = None, timeout = None,
+             cancel_event = None, on_poll = None,
+             status = lambda job: job.status,
+             progress = lambda job: getattr(job, "progress", None)):
+        '''
+        Poll fetch() until the returned job is in a terminal state.
+
+        Parameters
+        ----------
+        fetch : callable
+            Returns the current job, e.g. a lambda around
+            get_mesh_operation.
+
+        initial : object, optional
+            An already fetched job. If it is terminal no poll is made.
+
+        expected_duration : float, optional
+            Expected duration of the job in seconds.
+
+        timeout : float, optional
+            Raise TimeoutError if the job is not done after this many
+            seconds.
+
+        cancel_event : threading.Event, optional
+            Raise PollCancelled as soon as this event is set.
+
+        on_poll : callable, optional
+            Called with every polled job, e.g. to print its status.
+
+        Returns
+        -------
+        job : object
+            The job in its terminal state.
+
+        '''
+        start = time.time()
+        job = initial
+        poll_count = 0
+        last_poll = start
+        #Only a cancel() issued while this wait runs stops it
+        poller_event = self.cancel_event
+
+        if job is None:
+            job = fetch()
+            self._count_poll()
+            last_poll = time.time()
+
+        while status(job) not in TERMINAL_STATES:
+            elapsed = time.time() - start
+            interval = self.next_interval(elapsed, poll_count, expected_duration, progress(job))
+
+            if timeout is not None:
+                if elapsed >= timeout:
+                    raise TimeoutError()
+                interval = min(interval, max(0.0, start + timeout - time.time()))
+
+            if self._sleep(interval, cancel_event, poller_event):
+                raise PollCancelled()
+
+            job = fetch()
+            self._count_poll()
+            poll_count += 1
+            previous_poll, last_poll = last_poll, time.time()
+            if on_poll is not None:
+                on_poll(job)
+
+            if status(job) in TERMINAL_STATES:
+                #The job finished at some point since the previous poll, the
+                #worst case detection latency is the gap between the two
+                with self._lock:
+                    self.detection_latencies.append(last_poll - previous_poll)
+
+        with self._lock:
+            self.waits_completed += 1
+        return job
+
+    def _sleep(self, interval, cancel_event, poller_event):
+
+        #Returns True if cancelled while sleeping
+        if cancel_event is None:
+            return poller_event.wait(interval)
+        deadline = time.time() + interval
+        while True:
+            if cancel_event.is_set() or poller_event.is_set():
+                return True
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            cancel_event.wait(min(remaining, 1.0))
+
+    def _count_poll(self):
+
+        with self._lock:
+            self.polls_issued += 1
+
+    def cancel(self):
+        '''
+        Cancel the waits in progress, they raise PollCancelled. Waits 
+        started afterwards are not affected.
+        '''
+        with self._lock:
+            cancel_event, self.cancel_event = self.cancel_event, threading.Event()
+        cancel_event.set()
+
+    def stats(self):
+        '''
+        Return the poll counters of this poller, the detection latencies
+        are those of the last max_latencies finished waits.
+        '''
+        with self._lock:
+            latencies = list(self.detection_latencies)
+            return {
+                "polls_issued": self.polls_issued,
+                "waits_completed": self.waits_completed,
+                "polls_per_wait": (self.polls_issued / self.waits_completed) if self.waits_completed else 0.0,
+                "mean_detection_latency": (sum(latencies) / len(latencies)) if latencies else 0.0,
+                "max_detection_latency": max(latencies) if latencies else 0.0,
+            }
+
+    def reset_stats(self):
+
+        with self._lock:
+            self.polls_issued = 0
+            self.waits_completed = 0
+            self.detection_latencies.clear()
+
+#Shared by all the wait loops so the counters cover every job
+default_poller = StatusPoller()
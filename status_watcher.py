@@ -0,0 +1,270 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+
+import simscale_sdk as sim_sdk
+
+from .status_poller import StatusPoller, TERMINAL_STATES
+
+class _Watch:
+    def __init__(self, key, fetch, future, callback, expected_duration, timeout, on_poll):
+
+        self.key = key
+        self.fetch = fetch
+        self.future = future
+        self.callback = callback
+        self.expected_duration = expected_duration
+        self.timeout = timeout
+        self.on_poll = on_poll
+        self.start = time.time()
+        self.poll_count = 0
+        self.errors = 0
+        self.last_job = None
+
+class StatusWatcher:
+    def __init__(self, api_client, max_requests_per_second = 2.0, poller = None, max_errors = 5):
+        '''
+        Watch any number of simulation runs, mesh operations and geometry
+        imports from a single background thread.
+
+        Every watched job gets its own adaptive poll schedule (see
+        StatusPoller.next_interval), but all the status requests share one
+        global request rate budget. Terminal states resolve the future
+        returned by the watch_* methods and fire the optional callback.
+
+        Parameters
+        ----------
+        api_client : object
+            The shared SimScale API client.
+
+        max_requests_per_second : float, optional
+            Global budget of status requests for all watched jobs.
+
+        poller : StatusPoller, optional
+            Used for the poll interval of each job. Defaults to a poller
+            with 5 s to 120 s intervals.
+
+        max_errors : int, optional
+            Number of consecutive failed status requests after which a
+            watched job is resolved with the error.
+
+        '''
+        self.api_client = api_client
+        self.simulation_run_api = sim_sdk.SimulationRunsApi(self.api_client)
+        self.mesh_operation_api = sim_sdk.MeshOperationsApi(self.api_client)
+        self.geometry_import_api = sim_sdk.GeometryImportsApi(self.api_client)
+
+        self.max_requests_per_second = max_requests_per_second
+        self.poller = poller if poller is not None else StatusPoller(min_interval = 5.0, max_interval = 120.0)
+        self.max_errors = max_errors
+
+        self._heap = []
+        self._watches = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        #Stop event of the running watcher thread, None once stopped
+        self._thread_stop = None
+        self._next_request = 0.0
+
+        #Counters
+        self.requests_issued = 0
+        self.jobs_resolved = 0
+
+    def watch(self, key, fetch, callback = None, expected_duration = None, timeout = None, on_poll = None):
+        '''
+        Start watching a job.
+
+        Parameters
+        ----------
+        key : hashable
+            Identifies the job, watching the same key twice returns the
+            same future.
+
+        fetch : callable
+            Returns the current state of the job (an object with a status
+            and optionally a progress).
+
+        callback : callable, optional
+            Called as callback(job) with the job in its terminal state, from
+            the watcher thread.
+
+        expected_duration : float, optional
+            Expected duration in seconds, e.g. from the estimate.
+
+        timeout : float, optional
+            Resolve the future with a TimeoutError after this many seconds.
+
+        on_poll : callable, optional
+            Called with every polled job.
+
+        Returns
+        -------
+        future : concurrent.futures.Future
+            Resolves to the job in its terminal state.
+
+        '''
+        with self._condition:
+            if key in self._watches:
+                return self._watches[key].future
+
+            future = Future()
+            watch = _Watch(key, fetch, future, callback, expected_duration, timeout, on_poll)
+            self._watches[key] = watch
+            heapq.heappush(self._heap, (time.time(), next(self._sequence), watch))
+            self._ensure_thread()
+            self._condition.notify()
+        return future
+
+    def watch_simulation_run(self, project_id, simulation_id, run_id, callback = None,
+                             expected_duration = None, timeout = None, on_poll = None):
+
+        return self.watch(("run", project_id, simulation_id, run_id),
+                          lambda: self.simulation_run_api.get_simulation_run(project_id, simulation_id, run_id),
+                          callback, expected_duration, timeout, on_poll)
+
+    def watch_mesh_operation(self, project_id, mesh_operation_id, callback = None,
+                             expected_duration = None, timeout = None, on_poll = None):
+
+        return self.watch(("mesh", project_id, mesh_operation_id),
+                          lambda: self.mesh_operation_api.get_mesh_operation(project_id, mesh_operation_id),
+                          callback, expected_duration, timeout, on_poll)
+
+    def watch_geometry_import(self, project_id, geometry_import_id, callback = None,
+                              expected_duration = None, timeout = 900, on_poll = None):
+
+        return self.watch(("geometry_import", project_id, geometry_import_id),
+                          lambda: self.geometry_import_api.get_geometry_import(project_id, geometry_import_id),
+                          callback, expected_duration, timeout, on_poll)
+
+    def unwatch(self, key):
+        '''
+        Stop watching a job and cancel its future.
+        '''
+        with self._condition:
+            watch = self._watches.pop(key, None)
+        if watch is not None:
+            watch.future.cancel()
+
+    @property
+    def pending(self):
+
+        with self._condition:
+            return len(self._watches)
+
+    def _ensure_thread(self):
+
+        #Called with self._condition held, so it cannot interleave with stop()
+        if self._thread_stop is None:
+            self._thread_stop = threading.Event()
+            self._thread = threading.Thread(target = self._run, args = (self._thread_stop,),
+                                            name = "status-watcher", daemon = True)
+            self._thread.start()
+
+    def _run(self, stop_event):
+
+        while True:
+            with self._condition:
+                while not stop_event.is_set():
+                    if self._heap and self._heap[0][0] <= time.time():
+                        break
+                    self._condition.wait(timeout = (self._heap[0][0] - time.time()) if self._heap else None)
+                if stop_event.is_set():
+                    return
+                _, _, watch = heapq.heappop(self._heap)
+                if self._watches.get(watch.key) is not watch or watch.future.cancelled():
+                    continue
+
+            self._throttle()
+            try:
+                self._poll(watch)
+            except Exception as e:
+                #A failing on_poll or an unexpected job only ends its own watch
+                self._resolve(watch, error = e)
+
+    def _throttle(self):
+
+        #Space the requests of all the watched jobs to respect the budget
+        now = time.time()
+        if now < self._next_request:
+            time.sleep(self._next_request - now)
+            now = self._next_request
+        self._next_request = now + 1.0 / self.max_requests_per_second
+
+    def _poll(self, watch):
+
+        try:
+            job = watch.fetch()
+            watch.errors = 0
+        except Exception as e:
+            watch.errors += 1
+            job = None
+            if watch.errors >= self.max_errors:
+                self._resolve(watch, error = e)
+                return
+        finally:
+            self.requests_issued += 1
+
+        if job is not None:
+            watch.last_job = job
+            watch.poll_count += 1
+            if watch.on_poll is not None:
+                watch.on_poll(job)
+            if job.status in TERMINAL_STATES:
+                self._resolve(watch, job = job)
+                return
+
+        elapsed = time.time() - watch.start
+        if watch.timeout is not None and elapsed >= watch.timeout:
+            self._resolve(watch, error = TimeoutError(f"{watch.key} not finished after {watch.timeout} s"))
+            return
+
+        progress = getattr(watch.last_job, "progress", None) if watch.last_job is not None else None
+        interval = self.poller.next_interval(elapsed, watch.poll_count, watch.expected_duration, progress)
+        with self._condition:
+            heapq.heappush(self._heap, (time.time() + interval, next(self._sequence), watch))
+
+    def _resolve(self, watch, job = None, error = None):
+
+        with self._condition:
+            if self._watches.get(watch.key) is watch:
+                del self._watches[watch.key]
+        self.jobs_resolved += 1
+
+        try:
+            if error is not None:
+                watch.future.set_exception(error)
+            else:
+                watch.future.set_result(job)
+        except Exception:
+            #The future was cancelled in the meantime
+            return
+
+        if watch.callback is not None and error is None:
+            try:
+                watch.callback(job)
+            except Exception as e:
+                print(f"Status watcher callback for {watch.key} failed: {e}")
+
+    def stop(self, wait = True):
+        '''
+        Stop the watcher thread, pending futures stay unresolved.
+        '''
+        with self._condition:
+            thread = self._thread
+            if self._thread_stop is not None:
+                self._thread_stop.set()
+                self._thread_stop = None
+            self._condition.notify_all()
+        if wait and thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def stats(self):
+
+        return {
+            "pending": self.pending,
+            "requests_issued": self.requests_issued,
+            "jobs_resolved": self.jobs_resolved,
+        }
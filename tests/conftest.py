@@ -0,0 +1,40 @@
+import math
+import pathlib
+import sys
+import types
+
+import pytest
+
+#The package __init__ imports the SimScale SDK, register the package without
+#running it so the modules that do not need the SDK can be tested on their own
+if "simscale_BCA" not in sys.modules:
+    package = types.ModuleType("simscale_BCA")
+    package.__path__ = [str(pathlib.Path(__file__).resolve().parents[1])]
+    sys.modules["simscale_BCA"] = package
+
+@pytest.fixture(params = ["python", "numpy"])
+def numpy_mode(request, monkeypatch):
+    '''
+    Run a test with NumPy, if installed, and with the pure Python
+    fallbacks of the modules that use it.
+    '''
+    from simscale_BCA import result_table, solution_archive
+
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        for module in (result_table, solution_archive):
+            monkeypatch.setattr(module, "np", None)
+    return request.param
+
+def as_list(values):
+
+    #Arrays and lists of tuples as nested lists
+    if hasattr(values, "tolist"):
+        return values.tolist()
+    return [list(value) if isinstance(value, tuple) else value for value in values]
+
+def same(first, second):
+
+    #Equal, NaN included
+    return len(first) == len(second) and all(a == b or (math.isnan(a) and math.isnan(b)) for a, b in zip(first, second))
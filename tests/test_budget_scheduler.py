@@ -0,0 +1,122 @@
+import types
+
+import pytest
+
+pytest.importorskip("simscale_sdk")
+
+from simscale_BCA.budget_scheduler import BudgetJob, BudgetLedger, BudgetScheduler
+from simscale_BCA.preflight import PreflightResult
+
+class Run:
+    def __init__(self, setup):
+
+        self.setup = setup
+        self.run_id = None
+        self.simulation_run = None
+
+    def create_simulation_run(self, name):
+
+        self.run_id = f"{self.setup.simulation_id} {name}"
+
+    def start_simulation_run(self, wait_for_results = True):
+
+        self.setup.check_budget()
+        if self.setup.fail == "simulation":
+            raise Exception("Simulation run failed to start")
+        self.simulation_run = types.SimpleNamespace(status = "FINISHED", compute_resource = self.setup.actual)
+
+class Setup:
+    def __init__(self, scheduler, name, mesh, simulation, actual = None, fail = None, ok = True):
+
+        self.scheduler = scheduler
+        self.simulation_id = name
+        self.simulation_spec = types.SimpleNamespace(name = name)
+        self.estimates = {"mesh": mesh, "simulation": simulation}
+        #Consumption reported by each stage, None if not reported
+        self.actual = actual
+        self.fail = fail
+        self.ok = ok
+        self.reused_mesh = False
+        self.mesh_operation = None
+        self.mesh_operation_id = None
+        self.started = False
+
+    def check_budget(self):
+
+        #What is reserved and spent never goes over the budget while jobs run
+        assert self.scheduler.spent + self.scheduler.reserved <= self.scheduler.core_hour_budget + 1e-9
+
+    def start_meshing_operation(self, run_state = False):
+
+        self.started = True
+        self.check_budget()
+        if self.fail == "mesh":
+            raise Exception("Mesh operation failed")
+        self.mesh_operation_id = f"mesh {self.simulation_id}"
+        self.mesh_operation = types.SimpleNamespace(status = "FINISHED", compute_resource = self.actual)
+
+class Preflight:
+    def run(self, setups):
+
+        results = []
+        for setup in setups:
+            result = PreflightResult(setup, Run(setup))
+            result.mesh_estimation = {"compute_resource": {"value": setup.estimates["mesh"]}}
+            result.simulation_estimation = {"compute_resource": {"value": setup.estimates["simulation"]}}
+            if not setup.ok:
+                result.errors.append("Setup check failed")
+            results.append(result)
+        return results
+
+def scheduler(budget, tmp_path, **kwargs):
+
+    return BudgetScheduler(budget, max_meshing = 2, max_running = 2, ledger = BudgetLedger(tmp_path),
+                           preflight = Preflight(), **kwargs)
+
+def jobs(scheduler, *setups):
+
+    return [BudgetJob(Setup(scheduler, name, *args, **kwargs)) for name, args, kwargs in setups]
+
+def test_jobs_are_admitted_within_the_budget(tmp_path):
+
+    batch = scheduler(10.0, tmp_path)
+    result = batch.run(jobs(batch, ("a", (2, 2, 2), {}), ("b", (2, 2, 2), {}), ("c", (2, 2, 2), {})))
+
+    assert [job.status for job in result] == ["finished", "finished", "over_budget"]
+    assert not result[2].setup.started
+    assert batch.spent == 8.0 and batch.reserved == 0.0
+    assert len(batch.ledger.history()) == 4
+
+def test_cheaper_jobs_free_the_budget_for_the_others(tmp_path):
+
+    batch = scheduler(10.0, tmp_path)
+    result = batch.run(jobs(batch, *[(name, (2, 2, 1), {}) for name in "abcd"]))
+
+    #4 core hours planned per job but 2 spent, so all of them fit one after the other
+    assert [job.status for job in result] == ["finished"] * 4
+    assert [job.actual for job in result] == [{"mesh": 1.0, "simulation": 1.0}] * 4
+    assert batch.spent == 8.0 and batch.reserved == 0.0
+
+def test_failed_jobs_release_their_reservation(tmp_path):
+
+    batch = scheduler(20.0, tmp_path)
+    result = batch.run(jobs(batch, ("mesh", (2, 3), {"fail": "mesh"}), ("simulation", (2, 3), {"fail": "simulation"}),
+                            ("setup", (2, 3), {"ok": False})))
+
+    assert [job.status for job in result] == ["failed"] * 3
+    assert not result[2].setup.started
+    #The failed stage is charged at its plan, the stages after it are released
+    assert batch.spent == pytest.approx(2 + 2 + 3)
+    assert batch.reserved == 0.0
+    assert batch.remaining == pytest.approx(13.0)
+
+def test_estimate_over_the_remaining_budget(tmp_path):
+
+    batch = scheduler(10.0, tmp_path)
+    result = batch.run(jobs(batch, ("big", (6, 6, 6), {}), ("small", (1, 2, 1), {}), ("unknown", (None, 8), {})))
+
+    #big and the mean mesh estimate of unknown ((6 + 1) / 2 + 8) never fit, small does
+    assert [job.status for job in result] == ["over_budget", "finished", "over_budget"]
+    assert result[2].planned == {"mesh": 3.5, "simulation": 8.0}
+    assert not result[0].setup.started and not result[2].setup.started
+    assert batch.spent == 2.0 and batch.reserved == 0.0
@@ -0,0 +1,109 @@
+import pytest
+
+pytest.importorskip("simscale_sdk")
+
+from simscale_BCA.post_process import PostProcess
+
+class Response:
+    def __init__(self, status, headers, body, fail_after = None):
+
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.fail_after = fail_after
+
+    def stream(self, chunk_size, decode_content = False):
+
+        for start in range(0, len(self.body), 4):
+            if self.fail_after is not None and start >= self.fail_after:
+                raise IOError("connection reset")
+            yield self.body[start:start + 4]
+
+    def release_conn(self):
+
+        pass
+
+class Server:
+    def __init__(self, body, etag = '"v1"', fail_after = None):
+
+        self.body = body
+        self.etag = etag
+        self.fail_after = fail_after
+        self.requests = []
+
+    def GET(self, url, headers, _preload_content):
+
+        self.requests.append(dict(headers))
+        fail_after, self.fail_after = self.fail_after, None
+        response_headers = {"ETag": self.etag} if self.etag else {}
+        offset = int(headers["Range"][6:-1]) if "Range" in headers else 0
+        #A range is only served if If-Range still names this file
+        if offset and headers.get("If-Range") == self.etag:
+            body = self.body[offset:]
+            return Response(206, dict(response_headers, **{"Content-Length": str(len(body))}), body, fail_after)
+        return Response(200, dict(response_headers, **{"Content-Length": str(len(self.body))}), self.body, fail_after)
+
+class ApiClient:
+    def __init__(self, server):
+
+        self.rest_client = server
+
+def download(server, path, **kwargs):
+
+    post_process = PostProcess(ApiClient(server), None, "key", "X-API-KEY")
+    return post_process.download_file("url", path, progress_callback = False, retries = 1, **kwargs)
+
+BODY = b"0123456789abcdefghijklmnopqrstuvwxyz"
+
+def test_interrupted_download_resumes(tmp_path, monkeypatch):
+
+    monkeypatch.setattr("simscale_BCA.post_process.time.sleep", lambda seconds: None)
+    server = Server(BODY, fail_after = 12)
+    path = download(server, tmp_path / "file.zip")
+
+    assert path.read_bytes() == BODY
+    assert server.requests[1]["Range"] == "bytes=12-"
+    assert server.requests[1]["If-Range"] == '"v1"'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["file.zip"]
+
+def test_part_file_of_the_same_file_resumes(tmp_path):
+
+    (tmp_path / "file.zip.part").write_bytes(BODY[:10])
+    (tmp_path / "file.zip.part.validator").write_text('"v1"')
+    server = Server(BODY)
+
+    assert download(server, tmp_path / "file.zip").read_bytes() == BODY
+    assert server.requests[0]["Range"] == "bytes=10-"
+
+def test_stale_part_file_is_replaced(tmp_path):
+
+    #Left by an interrupted download of an earlier run to the same path
+    (tmp_path / "file.zip.part").write_bytes(b"OLD RUN DATA")
+    (tmp_path / "file.zip.part.validator").write_text('"v0"')
+    server = Server(BODY)
+
+    assert download(server, tmp_path / "file.zip").read_bytes() == BODY
+    assert server.requests[0]["If-Range"] == '"v0"'
+    assert not (tmp_path / "file.zip.part.validator").exists()
+
+def test_part_file_without_validator_is_discarded(tmp_path):
+
+    (tmp_path / "file.zip.part").write_bytes(b"OLD RUN DATA")
+    server = Server(BODY)
+
+    assert download(server, tmp_path / "file.zip").read_bytes() == BODY
+    assert "Range" not in server.requests[0]
+
+def test_no_validator_starts_again(tmp_path, monkeypatch):
+
+    monkeypatch.setattr("simscale_BCA.post_process.time.sleep", lambda seconds: None)
+    server = Server(BODY, etag = None, fail_after = 12)
+
+    assert download(server, tmp_path / "file.zip").read_bytes() == BODY
+    assert "Range" not in server.requests[1]
+
+def test_checksum_mismatch_discards_the_part_file(tmp_path):
+
+    with pytest.raises(Exception, match = "Checksum mismatch"):
+        download(Server(BODY), tmp_path / "file.zip", checksum = "0" * 64)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,100 @@
+import json
+import types
+
+import pytest
+
+from simscale_BCA.geometry_mapping_index import GeometryMappingIndex
+
+class Mapping:
+    def __init__(self, data):
+
+        self.data = data
+
+    def to_dict(self):
+
+        return dict(self.data)
+
+class ApiClient:
+    def sanitize_for_serialization(self, mapping):
+
+        return mapping.to_dict()
+
+    def deserialize(self, response, response_type):
+
+        assert response_type == "GeometryMapping"
+        return Mapping(json.loads(response.data))
+
+class GeometryApi:
+    def __init__(self, mappings):
+
+        self.api_client = ApiClient()
+        self.mappings = mappings
+        self.pages = 0
+
+    def get_geometry_mappings(self, project_id, geometry_id, limit, page):
+
+        self.pages += 1
+        return types.SimpleNamespace(embedded = self.mappings[(page - 1) * limit:page * limit])
+
+def mapping(name, _class, body, entity = None, attributes = ()):
+
+    return Mapping({"name": name, "_class": _class,
+                    "originate_from": [{"body": body, "entity": entity}],
+                    "attributes": [{"attribute": a, "values": v} for a, v in attributes]})
+
+MAPPINGS = [
+    mapping("B1_TE1", "body", "Wall", attributes = [("SDL/TYSA_NAME", "Wall")]),
+    mapping("B1_TE5", "face", "Wall", "F5", [("SDL/TYSA_NAME", ["Outside", "North"])]),
+    mapping("B1_TE6", "face", "Wall", "F6", [("SDL/TYSA_NAME", "Inside"), ("SDL/TYSA_COLOUR", 3)]),
+    mapping("B2_TE1", "body", "Window", attributes = [("SDL/TYSA_NAME", "Window")]),
+    mapping("B2_TE3", "face", "Window", "F3", [("SDL/TYSA_NAME", "Outside")]),
+]
+
+@pytest.fixture
+def index():
+
+    geometry_api = GeometryApi(MAPPINGS)
+    index = GeometryMappingIndex.fetch(geometry_api, "project", "geometry", page_size = 2)
+    assert geometry_api.pages == 3
+    return index
+
+def test_queries(index):
+
+    assert index.names() == ["B1_TE1", "B1_TE5", "B1_TE6", "B2_TE1", "B2_TE3"]
+    assert index.names(_class = "face") == ["B1_TE5", "B1_TE6", "B2_TE3"]
+    assert index.names(_class = "face", bodies = ["Window"]) == ["B2_TE3"]
+    assert index.names(bodies = ["Wall", "Roof"]) == ["B1_TE1", "B1_TE5", "B1_TE6"]
+    #Entities match the entity of the mapping or its name
+    assert index.names(entities = ["F6", "B2_TE1"]) == ["B1_TE6", "B2_TE1"]
+    assert index.names(values = ["Outside"]) == ["B1_TE5", "B2_TE3"]
+    assert index.names(attributes = ["SDL/TYSA_COLOUR"]) == ["B1_TE6"]
+    assert index.names(attributes = ["SDL/TYSA_COLOUR"], values = [3]) == ["B1_TE6"]
+    assert index.names(_class = "body", attributes = ["SDL/TYSA_NAME"], values = ["Window", "North"]) == ["B2_TE1"]
+    assert index.names(_class = "edge") == []
+    #The paging arguments of get_geometry_mappings are accepted and ignored
+    assert index.names(_class = "body", limit = 100, page = 1) == ["B1_TE1", "B2_TE1"]
+    with pytest.raises(TypeError):
+        index.query(colour = 3)
+
+def test_mappings_are_the_listed_objects(index):
+
+    assert index.mappings(entities = ["F5"]) == [MAPPINGS[1]]
+
+def test_round_trip(index, tmp_path):
+
+    path = tmp_path / "mappings.json"
+    index.save(path)
+    loaded = GeometryMappingIndex.load(path, ApiClient())
+
+    assert loaded.geometry_id == "geometry"
+    assert loaded.to_dict() == index.to_dict()
+    assert loaded.names(values = ["Outside"]) == ["B1_TE5", "B2_TE3"]
+    #The SDK objects are rebuilt from the stored data
+    assert [m.to_dict() for m in loaded.mappings(_class = "body")] == [MAPPINGS[0].data, MAPPINGS[3].data]
+
+def test_missing_mapping_data():
+
+    index = GeometryMappingIndex.from_dict({"geometry_id": "geometry", "entries": [{"name": "B1_TE1"}]})
+    assert index.names() == ["B1_TE1"]
+    with pytest.raises(Exception, match = "No mapping data"):
+        index.mappings()
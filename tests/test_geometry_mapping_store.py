@@ -0,0 +1,104 @@
+import sqlite3
+import types
+
+import pytest
+
+from simscale_BCA import geometry_mapping_store
+from simscale_BCA.geometry_mapping_index import GeometryMappingIndex
+from simscale_BCA.geometry_mapping_store import GeometryMappingStore
+
+class Clock:
+    def __init__(self):
+
+        self.now = 1000.0
+
+    def time(self):
+
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+
+    clock = Clock()
+    monkeypatch.setattr(geometry_mapping_store, "time", types.SimpleNamespace(time = clock.time))
+    return clock
+
+@pytest.fixture
+def store(tmp_path, clock):
+
+    store = GeometryMappingStore(tmp_path, max_age = 100.0)
+    yield store
+    store.close()
+
+def index(geometry_id, data = True):
+
+    entries = [{"name": f"B1_TE{i}", "entity_class": "face", "bodies": ["Wall"], "entities": [f"F{i}"],
+                "attributes": [["SDL/TYSA_NAME", f"Face {i}"]],
+                "data": {"name": f"B1_TE{i}", "_class": "face"} if data else None} for i in range(20)]
+    return GeometryMappingIndex.from_dict({"geometry_id": geometry_id, "entries": entries})
+
+def stored(store):
+
+    with sqlite3.connect(str(store.path)) as connection:
+        return sorted(row[0] for row in connection.execute("SELECT geometry_id FROM mappings"))
+
+def max_size(store):
+
+    with sqlite3.connect(str(store.path)) as connection:
+        return connection.execute("SELECT MAX(size) FROM mappings").fetchone()[0]
+
+def test_round_trip(store, tmp_path):
+
+    assert store.get("geometry 1") is None
+    store.put(index("geometry 1"), "project")
+    store.close()
+
+    #A new store on the same directory, as in a new Python session
+    loaded = GeometryMappingStore(tmp_path).get("geometry 1")
+    assert loaded.to_dict() == index("geometry 1").to_dict()
+    assert loaded.names(entities = ["F3"]) == ["B1_TE3"]
+
+def test_checksum_mismatch(store):
+
+    store.put(index("geometry 1"))
+    with sqlite3.connect(str(store.path)) as connection:
+        connection.execute("UPDATE mappings SET payload = ? WHERE geometry_id = ?", (b"corrupt", "geometry 1"))
+
+    assert store.get("geometry 1") is None
+    assert stored(store) == []
+
+def test_entries_without_mapping_data(store):
+
+    store.put(index("geometry 1", data = False))
+    assert store.get("geometry 1") is None
+    assert stored(store) == []
+
+def test_age_eviction(store, clock):
+
+    store.put(index("geometry 1"))
+    clock.now += 60
+    store.put(index("geometry 2"))
+    clock.now += 60
+
+    #geometry 1 is too old to be served, and dropped by the next put
+    assert store.get("geometry 1") is None
+    store.put(index("geometry 3"))
+    clock.now += 60
+    store.put(index("geometry 4"))
+    assert stored(store) == ["geometry 3", "geometry 4"]
+
+def test_lru_eviction(store, clock):
+
+    store.put(index("geometry 1"))
+    size = max_size(store)
+    store.max_bytes = 2 * size + size // 2
+
+    clock.now += 1
+    store.put(index("geometry 2"))
+    clock.now += 1
+    assert store.get("geometry 1") is not None
+    clock.now += 1
+    store.put(index("geometry 3"))
+
+    #geometry 2 is the least recently used
+    assert stored(store) == ["geometry 1", "geometry 3"]
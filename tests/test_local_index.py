@@ -0,0 +1,65 @@
+import pathlib
+import subprocess
+import sys
+import threading
+
+from simscale_BCA.local_index import LocalIndex
+
+def test_set_get_pop(tmp_path):
+
+    index = LocalIndex("test", tmp_path)
+    index.set("a", 1)
+    index.update({"b": 2, "c": 3})
+    assert index.get("a") == 1
+    assert index.pop("b") == 2
+    assert index.pop("b", "missing") == "missing"
+    assert sorted(index.items()) == [("a", 1), ("c", 3)]
+    assert LocalIndex("test", tmp_path).get("c") == 3
+
+def test_instances_see_each_others_writes(tmp_path):
+
+    first = LocalIndex("test", tmp_path)
+    second = LocalIndex("test", tmp_path)
+    assert first.get("key") is None
+    second.set("key", "value")
+    assert first.get("key") == "value"
+    first.pop("key")
+    assert second.get("key") is None
+
+def test_corrupt_file_starts_again(tmp_path):
+
+    (tmp_path / "test.json").write_text("{not json")
+    index = LocalIndex("test", tmp_path)
+    assert index.items() == []
+    index.set("a", 1)
+    assert LocalIndex("test", tmp_path).get("a") == 1
+
+def test_concurrent_instances_keep_all_entries(tmp_path):
+
+    #One instance per thread, like GeometryCache objects of parallel uploads
+    def write(worker):
+        index = LocalIndex("test", tmp_path)
+        for i in range(25):
+            index.set(f"{worker}-{i}", i)
+
+    threads = [threading.Thread(target = write, args = (worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(LocalIndex("test", tmp_path).items()) == 8 * 25
+
+def test_concurrent_processes_keep_all_entries(tmp_path):
+
+    script = ("import sys, conftest\n"
+              "from simscale_BCA.local_index import LocalIndex\n"
+              "for i in range(20):\n"
+              "    LocalIndex('test', sys.argv[1]).set(sys.argv[2] + str(i), i)\n")
+    tests_dir = str(pathlib.Path(__file__).parent)
+    processes = [subprocess.Popen([sys.executable, "-c", script, str(tmp_path), f"p{worker}-"], cwd = tests_dir)
+                 for worker in range(4)]
+    for process in processes:
+        assert process.wait(timeout = 60) == 0
+
+    assert len(LocalIndex("test", tmp_path).items()) == 4 * 20
@@ -0,0 +1,39 @@
+import pytest
+
+from conftest import as_list, same
+from simscale_BCA.result_table import ResultTable, merge_series
+
+pytestmark = pytest.mark.usefixtures("numpy_mode")
+
+def series(times, values):
+
+    return ResultTable.from_columns({"time": times, "value": values})
+
+def test_merge_exact_keeps_common_times():
+
+    merged = merge_series([series([0, 1, 2, 3], [0, 10, 20, 30]), series([3, 1, 2.0000001], [3, 1, 2])],
+                          ["a", "b"], tolerance = 1e-3)
+    assert merged.columns == ["time", "a", "b"]
+    assert merged.rows() == [[1.0, 10.0, 1.0], [2.0, 20.0, 2.0], [3.0, 30.0, 3.0]]
+
+def test_merge_nearest_with_tolerance():
+
+    merged = merge_series([series([0, 1, 2], [0, 0, 0]), series([0.1, 1.6], [5, 6])], how = "nearest", tolerance = 0.5)
+    assert merged.columns == ["time", "series_0", "series_1"]
+    assert same(as_list(merged["series_1"]), [5.0, float("nan"), 6.0])
+
+def test_merge_linear_on_given_times():
+
+    merged = merge_series([series([0, 2], [0, 20]), series([1, 3], [1, 3])], ["a", "b"], how = "linear",
+                          times = [2, 0, 1, 3])
+    assert as_list(merged.time) == [0.0, 1.0, 2.0, 3.0]
+    assert same(as_list(merged["a"]), [0.0, 10.0, 20.0, float("nan")])
+    assert same(as_list(merged["b"]), [float("nan"), 1.0, 2.0, 3.0])
+
+def test_merge_arguments():
+
+    with pytest.raises(ValueError):
+        merge_series([series([0], [0])], how = "cubic")
+    with pytest.raises(ValueError):
+        merge_series([series([0], [0])], ["a", "b"])
+    assert merge_series([]).columns == ["time"]
@@ -0,0 +1,72 @@
+import types
+
+import pytest
+
+pytest.importorskip("simscale_sdk")
+
+from simscale_BCA.name_resolver import NameResolver
+
+class Projects:
+    def __init__(self, names):
+
+        self.names = list(names)
+        self.pages = 0
+
+    def get_projects(self, limit, page):
+
+        self.pages += 1
+        projects = [types.SimpleNamespace(name = name, project_id = f"id {name}") for name in self.names]
+        return types.SimpleNamespace(embedded = projects[(page - 1) * limit:page * limit])
+
+def resolver(names, **kwargs):
+
+    resolver = NameResolver(object(), page_size = 2, **kwargs)
+    resolver.project_api = Projects(names)
+    return resolver
+
+def test_misses_within_the_ttl_do_not_list_again():
+
+    names = resolver([f"project {i}" for i in range(5)])
+    assert names.project_id("project 3") == "id project 3"
+    for name in ("new 1", "new 2", "new 3"):
+        assert names.project_id(name) is None
+    assert names.listings == 1
+    assert names.project_api.pages == 3
+
+def test_added_and_removed_names():
+
+    names = resolver(["a"])
+    assert names.project_id("b") is None
+    names.add(("projects",), "b", "id b")
+    assert names.project_id("b") == "id b"
+    names.remove(("projects",), "a")
+    assert names.project_id("a") is None
+    assert names.listings == 1
+
+def test_refresh_lists_again_at_most_once_per_interval():
+
+    names = resolver(["a"], refresh_interval = 0)
+    assert names.project_id("b") is None
+    names.project_api.names.append("b")
+    assert names.project_id("b") is None
+    assert names.project_id("b", refresh = True) == "id b"
+    assert names.listings == 2
+
+    limited = resolver(["a"], refresh_interval = 3600)
+    assert limited.project_id("b", refresh = True) is None
+    limited.project_api.names.append("b")
+    assert limited.project_id("b", refresh = True) is None
+    assert limited.listings == 1
+
+def test_invalidate_and_ttl():
+
+    names = resolver(["a"], ttl = -1)
+    names.project_id("a")
+    names.project_id("a")
+    assert names.listings == 2
+
+    names = resolver(["a"])
+    names.project_id("a")
+    names.project_api.names.append("b")
+    names.invalidate(("projects",))
+    assert names.project_id("b") == "id b"
@@ -0,0 +1,44 @@
+import types
+
+import pytest
+
+from simscale_BCA.pagination import iter_items, find_first
+
+class ListCall:
+    def __init__(self, count):
+
+        self.items = [types.SimpleNamespace(name = f"item {i}") for i in range(count)]
+        self.pages = []
+
+    def __call__(self, project_id, limit, page, **filters):
+
+        assert project_id == "project"
+        self.pages.append(page)
+        return types.SimpleNamespace(embedded = self.items[(page - 1) * limit:page * limit])
+
+@pytest.mark.parametrize("prefetch", [False, True])
+@pytest.mark.parametrize("count", [0, 3, 10, 11])
+def test_all_items_in_order(count, prefetch):
+
+    list_call = ListCall(count)
+    items = list(iter_items(list_call, "project", page_size = 5, prefetch = prefetch))
+    assert [item.name for item in items] == [f"item {i}" for i in range(count)]
+    #A short page ends the listing, a full last page needs one empty page more
+    assert sorted(list_call.pages) == list(range(1, count // 5 + 2))
+
+def test_pages_are_fetched_lazily():
+
+    list_call = ListCall(100)
+    assert find_first(iter_items(list_call, "project", page_size = 10), "item 12").name == "item 12"
+    assert list_call.pages == [1, 2]
+
+def test_filters_are_passed():
+
+    calls = []
+
+    def list_call(limit, page, **filters):
+        calls.append(filters)
+        return types.SimpleNamespace(embedded = None)
+
+    assert list(iter_items(list_call, category = "PLOT")) == []
+    assert calls == [{"category": "PLOT"}]
@@ -0,0 +1,54 @@
+import pytest
+
+from conftest import as_list, same
+from simscale_BCA.result_table import ResultTable
+
+pytestmark = pytest.mark.usefixtures("numpy_mode")
+
+def test_from_csv_string():
+
+    table = ResultTable.from_csv_string("\ufefftime,Inlet,Outlet\r\n0,1,2\r\n1,3.5,-4e1\r\n")
+    assert table.columns == ["time", "Inlet", "Outlet"]
+    assert len(table) == 2
+    assert table.rows() == [[0.0, 1.0, 2.0], [1.0, 3.5, -40.0]]
+    assert as_list(table["Outlet"]) == [2.0, -40.0]
+    assert as_list(table.time) == [0.0, 1.0]
+
+def test_empty_values_are_nan():
+
+    table = ResultTable.from_csv_string("time,a,b\n0,1,\n1,3,4\n")
+    assert same(table.rows()[0], [0.0, 1.0, float("nan")])
+
+def test_header_only():
+
+    table = ResultTable.from_csv_string("time,a\n")
+    assert len(table) == 0
+    assert table.rows() == []
+
+@pytest.mark.parametrize("csv_string", ["time,a\n0,1,2\n1\n", "time,a,b\n0,1\n1,2,3\n", "time,a\n0,1,2\n1,2,3\n"])
+def test_ragged_rows_raise(csv_string):
+
+    with pytest.raises(ValueError):
+        ResultTable.from_csv_string(csv_string)
+
+def test_row_sum_and_columns():
+
+    table = ResultTable.from_columns({"time": [0, 1], "a": [1, 2], "b": [10, 20]})
+    assert as_list(table.row_sum()) == [11.0, 22.0]
+    assert as_list(table.row_sum(["a"])) == [1.0, 2.0]
+    summed = table.with_column("sum", table.row_sum())
+    assert summed.columns == ["time", "a", "b", "sum"]
+    assert summed.select(["time", "sum"]).rows() == [[0.0, 11.0], [1.0, 22.0]]
+
+def test_sorted_by_time_keeps_the_last_duplicate():
+
+    table = ResultTable.from_columns({"time": [0, 2, 1, 2], "a": [0, 1, 2, 3]})
+    assert table.sorted_by_time().rows() == [[0.0, 0.0], [1.0, 2.0], [2.0, 3.0]]
+    ordered = ResultTable.from_columns({"time": [0, 1], "a": [0, 1]})
+    assert ordered.sorted_by_time() is ordered
+
+def test_csv_round_trip(tmp_path):
+
+    table = ResultTable.from_columns({"time": [0, 0.5], "a": [1.25, -2]})
+    table.to_csv(tmp_path / "table.csv")
+    assert ResultTable.read_csv(tmp_path / "table.csv").rows() == table.rows()
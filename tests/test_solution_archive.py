@@ -0,0 +1,112 @@
+import gzip
+import io
+import struct
+import zipfile
+
+import pytest
+
+from conftest import as_list
+from simscale_BCA.solution_archive import SolutionArchive, parse_foam_field
+
+pytestmark = pytest.mark.usefixtures("numpy_mode")
+
+SCALAR_FIELD = b'''FoamFile
+{
+    version     2.0;
+    format      ascii;
+    class       volScalarField;
+    object      T;
+}
+dimensions      [0 0 0 1 0 0 0];
+
+internalField   nonuniform List<scalar> 3(300 301.5 3.02e2);
+
+boundaryField
+{
+    inlet
+    {
+        type            fixedValue;
+        value           uniform 293;
+    }
+    wall
+    {
+        type            zeroGradient;
+    }
+}
+'''
+
+def test_ascii_scalar_field():
+
+    field = parse_foam_field(SCALAR_FIELD)
+    assert (field.name, field.field_class, field.uniform) == ("T", "volScalarField", False)
+    assert field.dimensions == [0, 0, 0, 1, 0, 0, 0]
+    assert as_list(field.internal_field) == [300.0, 301.5, 302.0]
+    assert field.boundary_field["inlet"] == {"type": "fixedValue", "value": ["uniform", 293]}
+    assert field.boundary_field["wall"] == {"type": "zeroGradient"}
+
+def test_ascii_vector_field():
+
+    field = parse_foam_field(b"FoamFile{format ascii; class volVectorField; object U;}\n"
+                             b"internalField nonuniform List<vector> 2((1 0 0) (0 2 3.5));\nboundaryField{}\n")
+    assert as_list(field.internal_field) == [[1.0, 0.0, 0.0], [0.0, 2.0, 3.5]]
+
+def test_uniform_field():
+
+    field = parse_foam_field(b"FoamFile{format ascii; class volVectorField; object U;}\n"
+                             b"internalField uniform (1 2 3);\nboundaryField{}\n", name = "U")
+    assert field.uniform
+    assert field.internal_field == [1, 2, 3]
+
+def test_binary_fields():
+
+    scalars = parse_foam_field(b'FoamFile{format binary; arch "LSB;label=32;scalar=64"; class volScalarField;}\n'
+                               b"internalField nonuniform List<scalar> 3(" + struct.pack("<3d", 1.5, 2.5, 3.5) +
+                               b");\nboundaryField{}\n")
+    assert as_list(scalars.internal_field) == [1.5, 2.5, 3.5]
+
+    vectors = parse_foam_field(b'FoamFile{format binary; arch "LSB;label=32;scalar=64"; class volVectorField;}\n'
+                               b"internalField nonuniform List<vector> 2(" + struct.pack("<6d", 1, 2, 3, 4, 5, 6) +
+                               b");\nboundaryField{}\n")
+    assert as_list(vectors.internal_field) == [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]
+
+def archive(files):
+
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w") as file:
+        for name, content in files.items():
+            file.writestr(name, content)
+    data.seek(0)
+    return SolutionArchive(data)
+
+def index(solution):
+
+    return {time: sorted(fields) for time, fields in solution.index.items()}
+
+def test_index_only_takes_time_directories_of_the_case():
+
+    solution = archive({"0/T": SCALAR_FIELD, "100/T.gz": gzip.compress(SCALAR_FIELD), "100/U": b"",
+                        "100/uniform/time": b"", "100/fluid/T": b"", "constant/polyMesh/0/points": b"",
+                        "system/controlDict": b"", "postProcessing/probes/100/T": b"",
+                        "postProcessing/probes/200/T": b"", "processor0/100/p": b"", "processor1/100/p": b""})
+    assert solution.case_root is None
+    assert index(solution) == {"0": ["T"], "100": ["T", "U", "fluid/T", "processor0/p", "processor1/p"]}
+    assert solution.times() == ["0", "100"]
+    assert solution.latest_time == "100"
+
+def test_index_below_a_case_directory():
+
+    solution = archive({"case/0/T": b"", "case/100.5/solid/T": b"", "case/postProcessing/probes/200/T": b"",
+                        "case/processor0/100.5/p": b""})
+    assert solution.case_root == "case"
+    assert index(solution) == {"0": ["T"], "100.5": ["processor0/p", "solid/T"]}
+
+def test_read_field():
+
+    solution = archive({"0/T": SCALAR_FIELD, "100/T.gz": gzip.compress(SCALAR_FIELD)})
+    assert solution.read_bytes("T", 0) == SCALAR_FIELD
+    assert as_list(solution.read_field("T").internal_field) == [300.0, 301.5, 302.0]
+    assert solution.read_field("T", 100.0).name == "T"
+    with pytest.raises(KeyError):
+        solution.read_field("U")
+    with pytest.raises(KeyError):
+        solution.read_field("T", 50)
@@ -0,0 +1,43 @@
+from simscale_BCA.spec_fingerprint import spec_fingerprint, canonical_spec, SimulationIndex
+
+class Spec:
+    def __init__(self, **fields):
+
+        self.fields = fields
+
+    def to_dict(self):
+
+        return dict(self.fields)
+
+def test_ignored_fields_do_not_change_the_fingerprint():
+
+    first = Spec(name = "Variant 1", mesh_id = "m1", model = {"a": 1, "b": [1, 2]})
+    second = Spec(name = "Variant 2", mesh_id = None, model = {"b": [1, 2], "a": 1})
+    assert canonical_spec(first) == {"model": {"a": 1, "b": [1, 2]}}
+    assert spec_fingerprint(first) == spec_fingerprint(second)
+
+def test_physics_and_extra_change_the_fingerprint():
+
+    spec = Spec(name = "Variant", model = {"a": 1})
+    assert spec_fingerprint(spec) != spec_fingerprint(Spec(name = "Variant", model = {"a": 2}))
+    assert spec_fingerprint(spec, extra = {"fineness": 5}) != spec_fingerprint(spec, extra = {"fineness": 6})
+    assert spec_fingerprint(spec, extra = {"fineness": 5}) == spec_fingerprint(spec, extra = {"fineness": 5})
+
+def test_api_client_serialization_is_used():
+
+    class ApiClient:
+        def sanitize_for_serialization(self, value):
+            return value.to_dict() if isinstance(value, Spec) else {"sanitized": value}
+
+    spec = Spec(model = {"a": 1})
+    assert spec_fingerprint(spec, ApiClient(), extra = 1) == spec_fingerprint(spec, extra = {"sanitized": 1})
+
+def test_simulation_index(tmp_path):
+
+    index = SimulationIndex(tmp_path)
+    assert index.get("project", "abc") is None
+    index.put("project", "abc", "simulation-1", "Variant 1")
+    assert SimulationIndex(tmp_path).get("project", "abc") == "simulation-1"
+    assert index.get("other project", "abc") is None
+    index.discard("project", "abc")
+    assert index.get("project", "abc") is None
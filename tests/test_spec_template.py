@@ -0,0 +1,61 @@
+from types import SimpleNamespace as Node
+
+from simscale_BCA.spec_template import SpecTemplate, parse_path
+
+def base_spec():
+
+    def solid(name, conductivity):
+        return Node(name = name, transport = Node(conductivity = Node(
+            thermal_conductivity = Node(value = Node(value = conductivity)))))
+
+    wall = Node(name = "Wall", temperature = Node(heat_flux = Node(
+        ambient_temperature = Node(value = 20), heat_transfer_coefficient = Node(value = 8))))
+    inlet = Node(name = "Inlet", velocity = Node(value = 1))
+    return Node(name = "Base", mesh_settings = Node(fineness = 5),
+                model = Node(materials = Node(solids = [solid("Brick", 0.8), solid("Steel", 50)]),
+                             boundary_conditions = [wall, inlet]))
+
+def _value(spec, path):
+
+    node = spec
+    for step in parse_path(path):
+        if isinstance(step, tuple):
+            node = next(item for item in node if getattr(item, step[0]) == step[1])
+        else:
+            node = getattr(node, step)
+    return node
+
+def test_parse_path():
+
+    assert parse_path("model.materials.solids[name=Brick].transport") == \
+        ["model", "materials", "solids", ("name", "Brick"), "transport"]
+    assert parse_path("model.boundary_conditions[2].name") == ["model", "boundary_conditions", 2, "name"]
+
+def test_variants_do_not_change_template_or_siblings():
+
+    base = base_spec()
+    template = SpecTemplate(base)
+    a = template.derive("A", conductivities = {"Brick": 1.2}, ambient_temperatures = {"Wall": 30})
+    b = template.derive("B", overrides = {"model.boundary_conditions[1].velocity.value": 3})
+
+    brick = "model.materials.solids[name=Brick].transport.conductivity.thermal_conductivity.value.value"
+    assert [spec.name for spec in (base, a, b)] == ["Base", "A", "B"]
+    assert [_value(spec, brick) for spec in (base, a, b)] == [0.8, 1.2, 0.8]
+    assert [spec.model.boundary_conditions[0].temperature.heat_flux.ambient_temperature.value
+            for spec in (base, a, b)] == [20, 30, 20]
+    assert [spec.model.boundary_conditions[1].velocity.value for spec in (base, a, b)] == [1, 1, 3]
+    assert base.model.boundary_conditions[0].temperature.heat_flux.heat_transfer_coefficient.value == 8
+
+def test_untouched_sub_trees_stay_shared():
+
+    base = base_spec()
+    variant = SpecTemplate(base).derive("A", conductivities = {"Brick": 1.2})
+
+    assert variant is not base
+    assert variant.model is not base.model
+    assert variant.model.materials.solids is not base.model.materials.solids
+    assert variant.model.materials.solids[0] is not base.model.materials.solids[0]
+    #Everything off the patched path is the same object as in the template
+    assert variant.mesh_settings is base.mesh_settings
+    assert variant.model.boundary_conditions is base.model.boundary_conditions
+    assert variant.model.materials.solids[1] is base.model.materials.solids[1]
@@ -0,0 +1,56 @@
+import types
+
+import pytest
+
+from simscale_BCA.status_poller import StatusPoller
+
+def poller(**kwargs):
+
+    return StatusPoller(min_interval = 2.0, max_interval = 60.0, backoff = 2.0, jitter = 0.0, **kwargs)
+
+def test_backoff_without_estimate():
+
+    intervals = [poller().next_interval(0.0, poll_count) for poll_count in range(7)]
+    assert intervals == [2.0, 4.0, 8.0, 16.0, 32.0, 60.0, 60.0]
+
+def test_expected_duration():
+
+    #A quarter of the remaining time, at least min_interval
+    assert poller().next_interval(20.0, 3, expected_duration = 100.0) == pytest.approx(20.0)
+    assert poller().next_interval(99.0, 3, expected_duration = 100.0) == 2.0
+    #Past the estimate, back off again
+    assert poller().next_interval(150.0, 2, expected_duration = 100.0) == 8.0
+
+def test_progress_fraction_and_percentage():
+
+    #Half done after 40 s, 40 s remaining
+    assert poller().next_interval(40.0, 1, progress = 0.5) == pytest.approx(10.0)
+    assert poller().next_interval(40.0, 1, progress = 50) == pytest.approx(10.0)
+    #Progress wins over the expected duration
+    assert poller().next_interval(40.0, 1, expected_duration = 1000.0, progress = 0.5) == pytest.approx(10.0)
+
+@pytest.mark.parametrize("progress", [None, 0, 100, 1.0, "n/a"])
+def test_unusable_progress_is_ignored(progress):
+
+    assert poller().next_interval(40.0, 1, progress = progress) == 4.0
+
+def test_jitter_stays_within_bounds():
+
+    jittered = StatusPoller(min_interval = 10.0, jitter = 0.1)
+    for _ in range(100):
+        assert 9.0 <= jittered.next_interval(0.0, 0) <= 11.0
+
+def test_detection_latencies_are_capped():
+
+    fast = StatusPoller(min_interval = 0.0, max_interval = 0.0, jitter = 0.0, max_latencies = 3)
+    for _ in range(5):
+        statuses = ["RUNNING", "FINISHED"]
+        job = fast.wait(lambda: types.SimpleNamespace(status = statuses.pop(0)))
+        assert job.status == "FINISHED"
+
+    assert len(fast.detection_latencies) == 3
+    stats = fast.stats()
+    assert stats["polls_issued"] == 10 and stats["waits_completed"] == 5
+    assert 0.0 <= stats["mean_detection_latency"] <= stats["max_detection_latency"]
+    fast.reset_stats()
+    assert len(fast.detection_latencies) == 0 and fast.detection_latencies.maxlen == 3
@@ -0,0 +1,97 @@
+import time
+import types
+
+import pytest
+
+pytest.importorskip("simscale_sdk")
+
+from simscale_BCA.status_watcher import StatusWatcher
+
+class Poller:
+    def next_interval(self, elapsed, poll_count, expected_duration = None, progress = None):
+
+        #The expected duration of a test job is its poll interval
+        return expected_duration
+
+def job(*statuses, polls = None, key = None):
+
+    #Fake status function, returns the given states then stays in the last one
+    statuses = list(statuses)
+
+    def fetch():
+        if polls is not None:
+            polls.append(key)
+        status = statuses.pop(0) if len(statuses) > 1 else statuses[0]
+        return types.SimpleNamespace(status = status, progress = None)
+    return fetch
+
+def watcher(**kwargs):
+
+    return StatusWatcher(object(), max_requests_per_second = 1000.0, poller = Poller(), **kwargs)
+
+def test_jobs_are_polled_in_schedule_order():
+
+    polls = []
+    watcher_ = watcher()
+    try:
+        slow = watcher_.watch("slow", job("RUNNING", "FINISHED", polls = polls, key = "slow"), expected_duration = 0.3)
+        fast = watcher_.watch("fast", job("RUNNING", "RUNNING", "FINISHED", polls = polls, key = "fast"),
+                              expected_duration = 0.01)
+        assert fast.result(timeout = 5).status == "FINISHED"
+        assert slow.result(timeout = 5).status == "FINISHED"
+    finally:
+        watcher_.stop()
+    assert polls == ["slow", "fast", "fast", "fast", "slow"]
+    assert watcher_.stats() == {"pending": 0, "requests_issued": 5, "jobs_resolved": 2}
+
+def test_failing_watch_does_not_affect_the_others():
+
+    def broken():
+        raise ConnectionError("status request failed")
+
+    def on_poll(job):
+        raise ValueError("on_poll failed")
+
+    finished = []
+    watcher_ = watcher(max_errors = 2)
+    try:
+        failing = watcher_.watch("failing", broken, expected_duration = 0.01)
+        bad_hook = watcher_.watch("bad hook", job("RUNNING"), expected_duration = 0.01, on_poll = on_poll)
+        bad_callback = watcher_.watch("bad callback", job("FINISHED"), callback = lambda job: 1 / 0)
+        good = watcher_.watch("good", job("RUNNING", "FAILED"), callback = finished.append, expected_duration = 0.01)
+
+        with pytest.raises(ConnectionError):
+            failing.result(timeout = 5)
+        with pytest.raises(ValueError):
+            bad_hook.result(timeout = 5)
+        assert bad_callback.result(timeout = 5).status == "FINISHED"
+        assert good.result(timeout = 5).status == "FAILED"
+        assert [job.status for job in finished] == ["FAILED"]
+    finally:
+        watcher_.stop()
+    assert watcher_.pending == 0
+
+def test_restart_after_the_thread_stopped():
+
+    watcher_ = watcher()
+    assert watcher_.watch("first", job("FINISHED")).result(timeout = 5).status == "FINISHED"
+    thread = watcher_._thread
+    watcher_.stop()
+    assert not thread.is_alive()
+
+    polls = []
+    try:
+        pending = watcher_.watch("pending", job("RUNNING", "FINISHED", polls = polls), expected_duration = 0.2)
+        while not polls:
+            time.sleep(0.01)
+        watcher_.stop()
+        time.sleep(0.3)
+        assert not pending.done()
+
+        #A new watch starts a new thread, which also picks up the watch pending at stop()
+        second = watcher_.watch("second", job("CANCELED"))
+        assert watcher_._thread is not thread and watcher_._thread.is_alive()
+        assert second.result(timeout = 5).status == "CANCELED"
+        assert pending.result(timeout = 5).status == "FINISHED"
+    finally:
+        watcher_.stop()